@@ -0,0 +1,61 @@
+"""
+Commands-per-second comparison of the AdbWrapper transports.
+
+The cli and socket rows run one adb request per command (no session pool, no
+query cache); the session row reuses a pooled persistent shell over the socket.
+
+Usage:
+    python benchmarks/bench_adb_transport.py [--serial SERIAL] [--count 200] [--command "echo 1"]
+
+Requires a running adb server with at least one device attached.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.adb_wrapper import AdbWrapper
+
+
+def run(label, serial, command, count, mode, persistent_shell=False):
+    adb = AdbWrapper(mode=mode, persistent_shell=persistent_shell, query_cache=False)
+    adb.shell(serial, command) # warm up (server start, feature probe, pool fill)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        _, err, code = adb.shell(serial, command)
+        latencies.append(time.perf_counter() - t0)
+        if code != 0:
+            print(f"[{label}] command failed ({code}): {err}")
+            break
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:>7}: {len(latencies) / elapsed:8.1f} cmd/s  p50 {p50:6.1f} ms  p99 {p99:6.1f} ms")
+    return len(latencies) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serial", help="Device serial (defaults to the first device)")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--command", default="echo 1")
+    args = parser.parse_args()
+
+    serial = args.serial or next(iter(AdbWrapper(mode="cli").get_devices()), None)
+    if not serial:
+        sys.exit("No ADB devices connected!")
+
+    print(f"Device {serial}: {args.count} x '{args.command}'")
+    cli = run("cli", serial, args.command, args.count, "cli")
+    sock = run("socket", serial, args.command, args.count, "socket")
+    session = run("session", serial, args.command, args.count, "socket", persistent_shell=True)
+    print(f"speedup vs cli: socket {sock / cli:.1f}x  session {session / cli:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Burst capture rate: sequential staged screenshots (old "Burst (5x)") vs the BurstCapture stream.
+
+Usage:
+    python benchmarks/bench_burst.py [--serial SERIAL] [--seconds 5] [--format png|webp] [--frames 5]
+
+Requires a running adb server with at least one device attached. Frames are
+written to a temp directory and removed afterwards.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication
+
+from services.adb_wrapper import AdbWrapper
+from services.burst_capture import BurstCapture
+from services.screen_capture import ScreenCapture
+
+
+def staged_sequence(adb, serial, out_dir, frames):
+    remote = "/sdcard/temp_screenshot.png"
+    t0 = time.perf_counter()
+    for index in range(frames):
+        adb.shell(serial, f"screencap -p {remote}")
+        adb.pull(serial, remote, os.path.join(out_dir, f"staged_{index}.png"))
+        adb.shell(serial, f"rm {remote}")
+    return frames / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serial", help="Device serial (defaults to the first device)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Burst duration")
+    parser.add_argument("--format", default="png", choices=("png", "webp"))
+    parser.add_argument("--frames", type=int, default=5, help="Frames for the staged baseline")
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    adb = AdbWrapper(query_cache=False)
+    serial = args.serial or next(iter(adb.get_devices()), None)
+    if not serial:
+        sys.exit("No ADB devices connected!")
+
+    out_dir = tempfile.mkdtemp(prefix="tp_burst_")
+    try:
+        staged_fps = staged_sequence(adb, serial, out_dir, args.frames)
+        print(f"staged sequential: {staged_fps:5.2f} FPS ({1000 / staged_fps:.0f} ms per frame)")
+
+        burst = BurstCapture(ScreenCapture(adb), serial, out_dir, args.format, max_seconds=args.seconds)
+        result = {}
+        burst.burst_finished.connect(lambda stats: (result.update(stats), app.quit()))
+        burst.start()
+        app.exec()
+        burst.wait()
+        if "error" in result:
+            sys.exit(f"burst failed: {result['error']}")
+        print(f"burst ({args.format}): {result['capture_fps']:5.2f} FPS captured, {result['saved_fps']:5.2f} FPS saved, "
+              f"{result['saved']} frames, {result['duplicates']} duplicates dropped")
+        print(f"  frame p50 {result['frame_ms_p50']} ms / p95 {result['frame_ms_p95']} ms, "
+              f"encode p50 {result['encode_ms_p50']} ms / p95 {result['encode_ms_p95']} ms")
+        print(f"speedup: {result['capture_fps'] / staged_fps:.1f}x")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Crash index: recording and listing cost as occurrences accumulate.
+
+Usage:
+    python benchmarks/bench_crash_index.py [--occurrences 100000] [--signatures 500] [--db /tmp/testpilot_crash_index.db]
+
+Records synthetic Java crash faults (no device needed) spread over
+--signatures distinct stacks, 20 devices and 5 builds. Each one varies in
+pid, line numbers, exception message and anonymous class numbers, which
+normalize() must ignore. It prints the rate of record() (not counting
+building the faults) per block of occurrences, so any slowdown as the
+tables grow shows, and then times the listing queries the Monitoring tab runs.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.crash_index import CrashIndex
+from services.fault_detector import Fault
+from services.log_store import LogParser
+
+EXCEPTIONS = ["java.lang.NullPointerException", "java.lang.IllegalStateException", "android.os.DeadObjectException",
+              "java.lang.IndexOutOfBoundsException", "java.lang.SecurityException"]
+
+
+def crash_lines(n, kind, stamp):
+    pid = 2000 + n % 3000
+    package = f"com.example.app{kind % 40}"
+    head = f"{stamp} {pid:5d} {pid:5d} E AndroidRuntime: "
+    lines = ["FATAL EXCEPTION: main", f"Process: {package}, PID: {pid}",
+             f"{EXCEPTIONS[kind % len(EXCEPTIONS)]}: failed at step {n}"]
+    lines += [f"\tat {package}.Screen{kind}$Inner{depth}${n % 9 + 1}.call{depth}(Screen{kind}.java:{n % 300 + depth})"
+              for depth in range(8)]
+    return [head + line for line in lines], pid, package
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--occurrences", type=int, default=100_000)
+    parser.add_argument("--signatures", type=int, default=500)
+    parser.add_argument("--db", default=os.path.join(os.environ.get("TMPDIR", "/tmp"), "testpilot_crash_index.db"))
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    index = CrashIndex(args.db)
+    log_parser = LogParser()
+    t0 = time.time() - args.occurrences
+    block = max(1, args.occurrences // 5)
+    spent = 0.0
+    for n in range(args.occurrences):
+        when = t0 + n
+        stamp = time.strftime("%m-%d %H:%M:%S.000", time.localtime(when))
+        lines, pid, package = crash_lines(n, n * 7919 % args.signatures, stamp)
+        records = log_parser.parse_many(lines)
+        fault = Fault("CRASH", f"device{n % 20:02d}", records[0], [])
+        fault.lines = [record.line for record in records]
+        fault.finish()
+        begin = time.perf_counter()
+        index.record(fault, f"build-{n % 5}") # normalize + one transaction
+        spent += time.perf_counter() - begin
+        if (n + 1) % block == 0:
+            print(f"{n + 1:>8} occurrences  {block / spent:8.0f} records/s  ({spent / block * 1e6:6.0f} us each)")
+            spent = 0.0
+
+    for name, query in (("top 100 by last seen", lambda: index.top(100)),
+                        ("top 100 since an hour ago", lambda: index.top(100, since=time.time() - 3600)),
+                        ("details of one signature", lambda: index.details(1))):
+        begin = time.perf_counter()
+        for _ in range(20):
+            query()
+        print(f"{name:28} {(time.perf_counter() - begin) / 20 * 1000:7.2f} ms")
+    rows = index.top(args.signatures + 1)
+    print(f"\n{len(rows)} signatures (expected {args.signatures}), {os.path.getsize(args.db) / 1e6:.1f} MB + WAL")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
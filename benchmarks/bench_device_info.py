@@ -0,0 +1,66 @@
+"""
+Device Info latency: one command per property (legacy) vs one batched round trip.
+
+Usage:
+    python benchmarks/bench_device_info.py [--rtt 0.03] [--runs 5]
+
+Runs against the scripted FakeDevice, so no hardware is needed. --rtt models the
+cost of one adb round trip.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_device import FakeDevice
+from core.adb_constants import AdbCommands
+from services.device_info_gatherer import DeviceInfoGatherer
+
+# The per-command sequence issued by the pre-batch gatherer
+LEGACY_COMMANDS = [
+    AdbCommands.SERIAL, AdbCommands.MODEL, AdbCommands.MANUFACTURER, AdbCommands.BOARD,
+    AdbCommands.ABI, AdbCommands.HARDWARE_REV, AdbCommands.ANDROID_VER, AdbCommands.SDK_LEVEL,
+    AdbCommands.BUILD_ID, AdbCommands.KERNEL, AdbCommands.SECURITY_PATCH,
+    AdbCommands.BOOT_COMPLETED, AdbCommands.UPTIME, "cat /proc/meminfo | grep MemTotal",
+    AdbCommands.CAR_CHARACTERISTICS, "lshal | grep -m 1 IVehicle", AdbCommands.DF_DATA,
+    AdbCommands.SELINUX, "whoami", AdbCommands.DEBUGGABLE, AdbCommands.TIMEZONE,
+    AdbCommands.LOCALE, AdbCommands.SYSTEM_TIME, AdbCommands.DISPLAY_SIZE, AdbCommands.DISPLAY_DENSITY,
+]
+
+
+def timed(fn, runs):
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt", type=float, default=0.03, help="Seconds per adb round trip")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    device = FakeDevice(rtt=args.rtt)
+    serial = device.get_devices()[0]
+    gatherer = DeviceInfoGatherer(device)
+
+    device.round_trips = 0
+    before = timed(lambda: [device.shell(serial, cmd) for cmd in LEGACY_COMMANDS], args.runs)
+    legacy_trips = device.round_trips // args.runs
+
+    device.round_trips = 0
+    after = timed(lambda: gatherer.gather_full_info(serial), args.runs)
+    batch_trips = device.round_trips // args.runs
+
+    print(f"legacy : {before * 1000:7.1f} ms ({legacy_trips} round trips)")
+    print(f"batched: {after * 1000:7.1f} ms ({batch_trips} round trip)")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Binary transfer throughput: staged file (command > remote file, pull, rm) vs exec-out streaming.
+
+Usage:
+    python benchmarks/bench_exec_out.py [--serial SERIAL] [--command "screencap -p"] [--runs 5]
+                                        [--remote /sdcard/tp_bench.bin] [--chunk-size 262144]
+
+Requires a running adb server with at least one device attached.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.adb_wrapper import AdbWrapper
+
+
+def staged(adb, serial, command, remote, local):
+    adb.shell(serial, f"{command} > {remote}", timeout=60)
+    adb.pull(serial, remote, local)
+    adb.shell(serial, f"rm -f {remote}")
+    return os.path.getsize(local)
+
+
+def streamed_fd(adb, serial, command, local, chunk_size):
+    with open(local, "wb") as f:
+        size, err, code = adb.exec_out_to_fd(serial, command, f, chunk_size)
+    if code != 0:
+        raise RuntimeError(err)
+    return size
+
+
+def streamed_bytes(adb, serial, command):
+    data, err, code = adb.exec_out_bytes(serial, command, timeout=60)
+    if code != 0:
+        raise RuntimeError(err)
+    return len(data)
+
+
+def measure(label, fn, runs):
+    best, size = float("inf"), 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        size = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<16} {size / 1e6:8.2f} MB  {best * 1000:8.1f} ms  {size / 1e6 / best:8.1f} MB/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serial", help="Device serial (defaults to the first device)")
+    parser.add_argument("--command", default="screencap -p", help="Command producing binary stdout")
+    parser.add_argument("--remote", default="/sdcard/tp_bench.bin", help="Staging path for the legacy flow")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    adb = AdbWrapper(persistent_shell=False, query_cache=False)
+    serial = args.serial or next(iter(adb.get_devices()), None)
+    if not serial:
+        sys.exit("No ADB devices connected!")
+
+    local = os.path.join(tempfile.gettempdir(), "tp_bench_exec_out.bin")
+    print(f"Device {serial}: '{args.command}', best of {args.runs}")
+    base = measure("staged+pull", lambda: staged(adb, serial, args.command, args.remote, local), args.runs)
+    fd = measure("exec_out_to_fd", lambda: streamed_fd(adb, serial, args.command, local, args.chunk_size), args.runs)
+    mem = measure("exec_out_bytes", lambda: streamed_bytes(adb, serial, args.command), args.runs)
+    print(f"speedup: {base / fd:.1f}x (fd), {base / mem:.1f}x (bytes)")
+    os.remove(local)
+
+
+if __name__ == "__main__":
+    main()
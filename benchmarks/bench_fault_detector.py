@@ -0,0 +1,85 @@
+"""
+Fault detection: one pass for all signatures vs one regex per signature per line.
+
+Usage:
+    python benchmarks/bench_fault_detector.py [--lines 1000000] [--batch 2000] [--fault-every 50000]
+
+Feeds synthetic logcat batches (no device needed), the way LogcatThread
+delivers them, to FaultDetector and to a naive detector that runs each
+signature's regex over every line. Every --fault-every lines one of the
+signature lines is planted, followed by a few lines of stack.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.fault_detector import FaultDetector, SIGNATURES
+from services.log_store import LogParser
+
+TAGS = ["ActivityManager", "CarService", "VehicleHal", "AudioFlinger", "chatty", "WindowManager"]
+FAULTS = [
+    "E AndroidRuntime: FATAL EXCEPTION: main",
+    "F DEBUG   : *** *** *** *** *** *** *** *** *** *** *** *** *** *** *** ***",
+    "E ActivityManager: ANR in com.android.car.media (com.android.car.media/.MediaActivity)",
+    "W Watchdog: *** WATCHDOG KILLING SYSTEM PROCESS: Blocked in handler on main thread (main)",
+    "I lowmemorykiller: Kill 'com.example.bg' (4567), uid 10045, oom_score_adj 900 to free 45000kB",
+    "E Zygote  : Exit zygote because system server (pid 1000) has died",
+    "W auditd  : type=1400 audit(0.0:1): avc: denied { read } for comm=\"init\" scontext=u:r:init:s0 "
+    "tcontext=u:object_r:system_file:s0 tclass=file",
+]
+
+
+def synthesise(count, every):
+    lines = []
+    for n in range(count):
+        stamp = f"12-18 10:{(n // 60000) % 60:02d}:{(n // 1000) % 60:02d}.{n % 1000:03d}"
+        pid = 1000 + n % 40
+        if n % every == every - 1:
+            body = FAULTS[(n // every) % len(FAULTS)]
+        else:
+            body = f"{'VDIWE'[n % 5]} {TAGS[n % len(TAGS)]}: synthetic message {n} state={n % 13}"
+        lines.append(f"{stamp} {pid:5d} {pid + 3:5d} {body}")
+    return LogParser().parse_many(lines)
+
+
+class NaiveDetector:
+    def __init__(self):
+        self.patterns = [(kind, re.compile(pattern)) for kind, pattern in SIGNATURES.items()]
+
+    def feed(self, serial, records):
+        hits = []
+        for record in records:
+            for kind, pattern in self.patterns:
+                if pattern.search(record.line):
+                    hits.append((kind, record))
+                    break
+        return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--fault-every", type=int, default=50_000)
+    args = parser.parse_args()
+
+    records = synthesise(args.lines, args.fault_every)
+    batches = [records[i:i + args.batch] for i in range(0, len(records), args.batch)]
+    print(f"{args.lines} lines in batches of {args.batch}, a fault every {args.fault_every} lines\n")
+    for name, detector in (("per-line, per-pattern", NaiveDetector()), ("FaultDetector", FaultDetector())):
+        found = 0
+        t0 = time.perf_counter()
+        for batch in batches:
+            found += len(detector.feed("bench", batch))
+        if isinstance(detector, FaultDetector):
+            found += len(detector.expire(float("inf")))
+        elapsed = time.perf_counter() - t0
+        print(f"{name:22} {found:>5} faults  {elapsed * 1000:7.0f} ms  {args.lines / elapsed / 1e6:6.2f}M lines/s")
+
+
+if __name__ == "__main__":
+    main()
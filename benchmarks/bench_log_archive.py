@@ -0,0 +1,108 @@
+"""
+Log archive: ingest rate, size on disk and query latency over a long capture.
+
+Usage:
+    python benchmarks/bench_log_archive.py [--lines 5000000] [--rate 1000] [--dir /tmp/testpilot_archive]
+
+Writes synthetic records (no device needed) as a capture at --rate lines/s, so
+5M lines span ~1.4 hours of device time, into a fresh LogArchive. It then
+times a few searches and compares each one with a linear scan that inflates
+and parses every segment. That scan is the best case for the previous approach
+of grepping saved text files.
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.log_archive import ArchiveSegment, LogArchive
+from services.log_filter import LogFilter
+from services.log_store import LogRecord
+
+TAGS = ["ActivityManager", "CarService", "VehicleHal", "AudioFlinger", "chatty", "WindowManager",
+        "PackageManager", "InputDispatcher", "SurfaceFlinger", "BluetoothAdapter"]
+# Realistic skew: mostly verbose/debug/info, few errors
+LEVELS = "VVVDDDDIIIIIIWWE"
+
+
+def generate(count, rate, t0, batch=10000):
+    for start in range(0, count, batch):
+        records = []
+        for n in range(start, min(count, start + batch)):
+            t = t0 + n / rate
+            level, tag = LEVELS[n % len(LEVELS)], TAGS[(n // 3) % len(TAGS)]
+            pid = 1000 + (n * 7) % 40
+            stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(t)) + f".{int(t * 1000) % 1000:03d}"
+            head = f"{stamp} {pid:5d} {pid + 7:5d} {level} {tag:<8}: "
+            message = f"synthetic event {n} state={n % 13} " + ("timeout waiting for vhal" if n % 9973 == 0 else "ok")
+            records.append(LogRecord(t, pid, pid + 7, level, tag, head + message, len(head)))
+        yield records
+
+
+def linear_scan(archive, log_filter, start, end):
+    db = archive._connect()
+    found = 0
+    for level, file, offset, size in db.execute("SELECT level, file, offset, size FROM segments ORDER BY first_seq"):
+        with open(os.path.join(archive.directory, file), "rb") as f:
+            f.seek(offset)
+            segment = ArchiveSegment(zlib.decompress(f.read(size)), level)
+        for i in range(len(segment.times)):
+            record = segment.record(i)
+            if start <= record.time <= end and log_filter.accepts(record):
+                found += 1
+    db.close()
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5_000_000)
+    parser.add_argument("--rate", type=int, default=1000, help="Simulated device lines/s")
+    parser.add_argument("--dir", default=os.path.join(os.environ.get("TMPDIR", "/tmp"), "testpilot_archive"))
+    parser.add_argument("--no-scan", action="store_true", help="Skip the (slow) linear scan comparison")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+    archive = LogArchive(args.dir)
+    t0 = time.mktime(time.strptime("2025-12-18 10:00:00", "%Y-%m-%d %H:%M:%S"))
+    raw_bytes = 0
+    started = time.perf_counter()
+    for records in generate(args.lines, args.rate, t0):
+        raw_bytes += sum(len(record.line) + 1 for record in records)
+        archive.append("bench", records)
+    archive.flush()
+    elapsed = time.perf_counter() - started
+    index_bytes = os.path.getsize(archive.db_path)
+    print(f"{args.lines} lines, {raw_bytes / 1e6:.0f} MB as text -> {archive.size() / 1e6:.0f} MB segments "
+          f"+ {index_bytes / 1e6:.1f} MB index, written at {args.lines / elapsed / 1000:.0f}k lines/s\n")
+
+    def at(clock):
+        return time.mktime(time.strptime(f"2025-12-18 {clock}", "%Y-%m-%d %H:%M:%S"))
+
+    queries = [
+        ("tag:CarService level:E", "10:02:00", "10:05:00"),
+        ("level>=E", "10:14:00", "10:15:00"),
+        ("pid:1009 tag:VehicleHal", "10:10:00", "10:12:00"),
+        ('"timeout waiting"', "10:00:00", "23:59:59"),
+        ("AudioFlinger state=7", "10:12:00", "10:12:10"),
+    ]
+    for text, start, end in queries:
+        log_filter = LogFilter(0, text)
+        begin = time.perf_counter()
+        found = archive.search(log_filter, at(start), at(end))
+        search_ms = (time.perf_counter() - begin) * 1000
+        line = f"{text:26} {start}-{end}  {len(found):>7} lines  {search_ms:8.1f} ms"
+        if not args.no_scan:
+            begin = time.perf_counter()
+            scanned = linear_scan(archive, log_filter, at(start), at(end))
+            line += f"  | full scan {(time.perf_counter() - begin):6.1f} s ({scanned} lines)"
+        print(line)
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
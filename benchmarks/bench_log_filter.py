@@ -0,0 +1,103 @@
+"""
+Log filter: time until a changed filter is visible over a full log store.
+
+Usage:
+    python benchmarks/bench_log_filter.py [--lines 1000000]
+
+Fills a LogStore with synthetic `-v threadtime` records (no device needed), then
+for a few filter expressions measures
+  - legacy: the original per-line check (re.search with the raw text, substring
+    level scans) over every retained line, which is what re-filtering the old
+    viewer would have cost
+  - first rows: LogFilterJob's first (newest) chunk reaching the LogView model
+  - complete: the whole history re-filtered and loaded into the model
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+
+from components.log_view import LogView
+from services.device_tool_service import LogFilterJob
+from services.log_filter import LogFilter
+from services.log_store import LogParser, LogStore
+
+TEMPLATE = "12-18 00:01:{s:02d}.{ms:03d}  {pid}  {tid} {level} {tag}: synthetic message number {n} payload"
+TAGS = ["ActivityManager", "CarService", "VehicleHal", "AudioFlinger", "chatty", "WindowManager"]
+
+# (min_level, text, legacy text): legacy has no structured predicates, so its closest equivalent is used
+FILTERS = [
+    (3, "", ""),
+    (0, "CarService", "CarService"),
+    (0, "tag:Car* level>=W", "CarService"),
+    (0, "pid:1007,1013 -chatty", "1007"),
+    (0, '"number 12.*4"', "number 12.*4"),
+]
+
+
+def legacy_filter(lines, selected_idx, flt):
+    levels = ["V", "D", "I", "W", "E", "F"]
+    shown = 0
+    for line in lines:
+        if selected_idx > 0:
+            if not any(f" {levels[i]}/" in line or f" {levels[i]} " in line for i in range(selected_idx, len(levels))):
+                continue
+        if flt and not re.search(flt, line, re.IGNORECASE):
+            continue
+        shown += 1
+    return shown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    log_parser = LogParser()
+    store = LogStore(args.lines)
+    for start in range(0, args.lines, 10000):
+        lines = [TEMPLATE.format(s=(n // 1000) % 60, ms=n % 1000, pid=1000 + n % 50, tid=2000 + n % 7,
+                                 level="VDIWEF"[n % 6], tag=TAGS[(n // 4) % len(TAGS)], n=n)
+                 for n in range(start, min(args.lines, start + 10000))]
+        store.extend(log_parser.parse_many(lines))
+    raw_lines = [record.line for record in store.range()]
+    view = LogView(store)
+    view.resize(1000, 700)
+    view.show()
+    print(f"{len(store)} records retained\n")
+
+    for min_level, text, legacy_text in FILTERS:
+        t0 = time.perf_counter()
+        legacy_shown = legacy_filter(raw_lines, min_level, legacy_text)
+        legacy_s = time.perf_counter() - t0
+
+        marks = {}
+        def on_rows(generation, seqs, done):
+            view.prepend(seqs)
+            marks.setdefault("first", time.perf_counter())
+            if done:
+                marks["done"] = time.perf_counter()
+
+        t0 = time.perf_counter()
+        first_seq, records = store.snapshot()
+        view.clear()
+        job = LogFilterJob(LogFilter(min_level, text), first_seq, records, 1)
+        job.signals.rows_ready.connect(on_rows)
+        job.run() # Synchronously; in the app this runs on the thread pool
+        app.processEvents()
+        shown = view.log_model.rowCount()
+        print(f"level>={'VDIWEF'[min_level]} {text:26} {shown:>8} rows  "
+              f"first rows {(marks['first'] - t0) * 1000:6.1f} ms  complete {(marks['done'] - t0) * 1000:6.0f} ms  "
+              f"| legacy {legacy_s * 1000:6.0f} ms ({legacy_shown} rows)")
+    view.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Multi-stream logcat: merge cost, ordering and GUI signal rate for k streams.
+
+Usage:
+    python benchmarks/bench_log_merge.py [--streams 1,2,4,8] [--records 200000] [--rate 5000] [--seconds 4]
+
+Part 1 feeds LogMerger directly (no device, no Qt): --records records split
+over k streams, delivered in chunks of random size with each stream lagging
+by a different amount, and reports the merge rate and how many adjacent pairs
+in the output are out of time order (0 expected).
+
+Part 2 runs the real LogcatThread over k paced synthetic `-v threadtime`
+streams of --rate lines/s each, stamped with the current time minus a
+per-stream transport delay. It reports the batch signals per second the GUI
+thread receives (near 1000 / LOGCAT_BATCH_INTERVAL_MS whatever k is, until the
+total rate fills LOGCAT_BATCH_MAX_LINES batches), the records delivered,
+inversions, and how old the oldest record of a batch is on delivery.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication, QTimer
+
+from services.device_tool_service import LogcatThread, LogStream
+from services.log_merge import LogMerger
+from services.log_store import LogRecord
+
+TAGS = ["ActivityManager", "CarService", "VehicleHal", "AudioFlinger", "chatty", "WindowManager"]
+
+
+def inversions(records):
+    return sum(1 for a, b in zip(records, records[1:]) if b.time < a.time)
+
+
+def run_merger(k, count):
+    rng = random.Random(k)
+    t0 = time.time() - 60
+    per_stream = count // k
+    streams = []
+    for s in range(k):
+        times = sorted(t0 + rng.random() * 50 for _ in range(per_stream))
+        streams.append([LogRecord(when, 0, 0, "I", "Bench", f"stream {s}", 0) for when in times])
+    # Interleave deliveries: each stream sends chunks of 1-500 records, lagging by 50 ms * stream index
+    deliveries = []
+    for s, records in enumerate(streams):
+        i = 0
+        while i < len(records):
+            n = rng.randint(1, 500)
+            deliveries.append((records[min(i + n, len(records)) - 1].time + 0.05 * s, s, records[i:i + n]))
+            i += n
+    deliveries.sort(key=lambda delivery: delivery[0])
+
+    merger = LogMerger(range(k))
+    out = []
+    begin = time.perf_counter()
+    for _, s, chunk in deliveries:
+        merger.add(s, chunk)
+        out.extend(merger.take())
+    out.extend(merger.take(flush=True))
+    elapsed = time.perf_counter() - begin
+    print(f"{k:>3} streams  {len(out):>8} records  {len(out) / elapsed / 1e6:6.2f}M records/s"
+          f"  {len(deliveries):>6} deliveries  {inversions(out):>4} inversions")
+
+
+class PacedLogcat(io.RawIOBase):
+    """`-v threadtime` lines stamped with the current local time minus `delay`, `rate` per second."""
+    def __init__(self, rate, delay, stream):
+        super().__init__()
+        self.rate = rate
+        self.delay = delay
+        self.stream = stream
+        self.produced = 0
+        self.started = time.perf_counter()
+        self._closed = threading.Event()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._closed.is_set():
+            due = int((time.perf_counter() - self.started) * self.rate) - self.produced
+            if due > 0:
+                now = time.time() - self.delay
+                stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(now)) + f".{int(now % 1 * 1000):03d}"
+                out, size = [], 0
+                while due and size < len(buffer) - 200:
+                    n = self.produced
+                    line = (f"{stamp} {1000 + self.stream:5d} {2000 + n % 7:5d} I {TAGS[n % len(TAGS)]}: "
+                            f"stream {self.stream} message {n}\n").encode()
+                    out.append(line)
+                    size += len(line)
+                    self.produced += 1
+                    due -= 1
+                data = b"".join(out)
+                buffer[:len(data)] = data
+                return len(data)
+            time.sleep(0.002)
+        return 0
+
+    def close(self):
+        self._closed.set()
+        super().close()
+
+
+class FakeAdb:
+    def __init__(self, sources):
+        self.sources = sources
+
+    def exec_out_reader(self, serial, command, timeout=30):
+        return self.sources[serial]
+
+
+def run_thread(app, k, rate, seconds):
+    sources = {f"dev{s}": PacedLogcat(rate, 0.02 * s, s) for s in range(k)}
+    adb = FakeAdb(sources)
+    thread = LogcatThread([LogStream(serial, adb) for serial in sources])
+    received = []
+    holds = []
+    batches = [0]
+
+    def on_batch(records, visible, log_filter):
+        batches[0] += 1
+        now = time.time()
+        holds.append(now - records[0].time) # The oldest record of the batch waited longest
+        received.extend(records)
+
+    thread.batch_received.connect(on_batch)
+    thread.start()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+    thread.stop()
+    thread.wait()
+    app.processEvents()
+    holds.sort()
+    p95 = holds[int(len(holds) * 0.95)] * 1000 if holds else 0
+    print(f"{k:>3} streams  {len(received) / seconds:>8.0f} records/s  {batches[0] / seconds:5.1f} batches/s"
+          f"  {inversions(received):>4} inversions  p95 batch age {p95:5.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", default="1,2,4,8")
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--rate", type=int, default=5000, help="Lines/s per stream in part 2")
+    parser.add_argument("--seconds", type=float, default=4.0)
+    args = parser.parse_args()
+    counts = [int(k) for k in args.streams.split(",")]
+
+    print("LogMerger")
+    for k in counts:
+        run_merger(k, args.records)
+    print("\nLogcatThread (streams lag by 20 ms each)")
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    for k in counts:
+        run_thread(app, k, args.rate, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
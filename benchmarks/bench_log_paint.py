@@ -0,0 +1,140 @@
+"""
+Log view repaint: cost of painting 1000 rows, per painting path.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_log_paint.py [--lines 100000] [--repaints 300] [--rules 8]
+
+Fills a LogView with synthetic records (no device needed) and pages through
+it, forcing a repaint per step, with
+  - default: Qt's QStyledItemDelegate (whole line in the level color)
+  - record: LogLineDelegate painting header/level+tag/message from the record
+  - record+rules: the same with --rules user highlight rules
+  - legacy: the QPlainTextEdit viewer with its regex QSyntaxHighlighter (four
+    re.finditer per block), sized to show as many rows as the LogView and
+    paged with the same number of repaints
+Reports ms per 1000 painted rows. The legacy highlighter runs when text is
+inserted rather than when it is painted, so that pass is reported separately,
+per 1000 lines. Runs headless with the offscreen QPA platform.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication, QPlainTextEdit, QStyledItemDelegate
+from PySide6.QtGui import QColor, QSyntaxHighlighter, QTextCharFormat
+
+from components.log_view import LogView
+from services.log_store import LogParser, LogStore
+
+TAGS = ["ActivityManager", "CarService", "VehicleHal", "AudioFlinger", "chatty", "WindowManager"]
+RULES = [("timeout", "#FF79C6"), ("CarService", "#F1FA8C"), (r"state=\d+", "#BD93F9"), ("not responding", "#FF5555"),
+         ("audio", "#50FA7B"), (r"pid \d+", "#8BE9FD"), ("denied", "#FFB86C"), ("surface", "#6272A4")]
+
+
+def synthesise(count):
+    lines = []
+    for n in range(count):
+        stamp = f"12-18 10:{(n // 60000) % 60:02d}:{(n // 1000) % 60:02d}.{n % 1000:03d}"
+        pid = 1000 + n % 40
+        lines.append(f"{stamp} {pid:5d} {pid + 3:5d} {'VDIWE'[n % 5]} {TAGS[n % len(TAGS)]}: "
+                     f"synthetic message {n} state={n % 13} {'timeout waiting for audio' if n % 7 == 0 else 'ok'}")
+    return lines
+
+
+class LegacyHighlighter(QSyntaxHighlighter):
+    """The regex highlighter the QPlainTextEdit viewer used to run on every block."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rules = []
+        for pattern, color in ((r" E ", "#FF5555"), (r" W ", "#FFB86C"), (r" I ", "#8BE9FD"), (r" D ", "#50FA7B")):
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self.rules.append((pattern, fmt))
+
+    def highlightBlock(self, text):
+        for pattern, fmt in self.rules:
+            for match in re.finditer(pattern, text):
+                self.setFormat(match.start(), match.end() - match.start(), fmt)
+
+
+def page(viewer, repaints, rows):
+    """:return: seconds spent repainting, rows painted."""
+    bar = viewer.verticalScrollBar()
+    step = max(1, bar.maximum() // repaints)
+    spent = 0.0
+    painted = 0
+    for value in range(0, bar.maximum(), step)[:repaints]:
+        bar.setValue(value)
+        begin = time.perf_counter()
+        viewer.viewport().repaint()
+        spent += time.perf_counter() - begin
+        painted += rows
+    return spent, painted
+
+
+def run_view(app, store, name, repaints, rules=None, default=False):
+    viewer = LogView(store, highlight_rules=rules or ())
+    if default:
+        viewer.setItemDelegate(QStyledItemDelegate(viewer))
+    viewer.resize(1200, 800)
+    viewer.show()
+    viewer.append(store.first_seq, len(store))
+    app.processEvents()
+    rows = viewer.viewport().height() // viewer.ROW_HEIGHT
+    spent, painted = page(viewer, repaints, rows)
+    report(name, spent, painted)
+    viewer.close()
+    return rows
+
+
+def run_legacy(app, lines, repaints, rows):
+    """The QPlainTextEdit viewer, set up as it was, showing `rows` lines like the LogView."""
+    editor = QPlainTextEdit()
+    editor.setReadOnly(True)
+    editor.setStyleSheet("background-color: #0F0F0F; color: #DDD; font-family: Consolas, monospace; font-size: 12px;")
+    highlighter = LegacyHighlighter(editor.document())
+    editor.resize(1200, 800)
+    editor.show()
+    app.processEvents()
+    line_height = editor.fontMetrics().lineSpacing()
+    margins = editor.height() - editor.viewport().height()
+    editor.resize(1200, margins + rows * line_height + int(editor.document().documentMargin() * 2))
+    editor.setPlainText("\n".join(lines))
+    app.processEvents()
+    begin = time.perf_counter()
+    highlighter.rehighlight()
+    highlighted = time.perf_counter() - begin
+    spent, painted = page(editor, repaints, rows)
+    report("legacy", spent, painted)
+    print(f"{'':14} + {highlighted / len(lines) * 1000 * 1000:.2f} ms / 1000 lines highlighted when inserted")
+    editor.close()
+
+
+def report(name, spent, painted):
+    print(f"{name:14} {spent / painted * 1000 * 1000:7.2f} ms / 1000 rows  ({painted} rows in {spent * 1000:.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repaints", type=int, default=300)
+    parser.add_argument("--rules", type=int, default=8, help=f"Highlight rules for record+rules (max {len(RULES)})")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    lines = synthesise(args.lines)
+    store = LogStore(args.lines)
+    store.extend(LogParser().parse_many(lines))
+    print(f"{args.lines} lines, {args.repaints} repaints of a 1200x800 view\n")
+    rows = run_view(app, store, "default", args.repaints, default=True)
+    run_view(app, store, "record", args.repaints)
+    run_view(app, store, "record+rules", args.repaints, RULES[:args.rules])
+    run_legacy(app, lines, args.repaints, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Logcat ingestion: `logcat -B` binary decoding vs `-v threadtime` text parsing.
+
+Usage:
+    python benchmarks/bench_logcat_binary.py [--entries 500000] [--chunk 65536] [--repeat 3]
+
+Synthesises the same log twice (no device needed): as logger_entry v4 records,
+the way `logcat -B` streams them, and as the equivalent threadtime text. Both
+are fed in LOGCAT_READ_CHUNK-sized pieces, like LogcatThread's reader does, to
+LogParser.feed and BinaryLogDecoder.feed. Every 50th entry is on the events
+buffer and every 200th message spans two lines, which the text path turns into
+an extra, unparseable record. Each path keeps its best of --repeat runs.
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import LOGCAT_READ_CHUNK
+from services.log_store import LogParser
+from services.logcat_binary import BinaryLogDecoder, ENTRY_HEADER, EVENT_INT, EVENT_LIST, EVENT_STRING
+
+TAGS = ["ActivityManager", "CarService", "VehicleHal", "AudioFlinger", "chatty", "WindowManager"]
+EVENT_TAGS = {30001: "am_on_resume_called", 2722: "battery_level"}
+V4_HEADER = struct.Struct("<II") # lid, uid after the v1 header
+
+
+def synthesise(count):
+    entries, lines = [], []
+    base = int(time.time())
+    for n in range(count):
+        sec, nsec = base + n // 1000, (n % 1000) * 1000000
+        pid, tid = 1000 + n % 50, 2000 + n % 7
+        stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(sec)) + f".{n % 1000:03d}"
+        if n % 50 == 49:
+            payload = struct.pack("<iBB", 30001, EVENT_LIST, 2) + struct.pack("<Bi", EVENT_INT, n) \
+                + struct.pack("<Bi", EVENT_STRING, 12) + b"MainActivity"
+            log_id, line = 2, f"{stamp} {pid:5d} {tid:5d} I am_on_resume_called: [{n},MainActivity]"
+        else:
+            level, tag = "VDIWEF"[n % 6], TAGS[(n // 4) % len(TAGS)]
+            message = f"synthetic message number {n} payload"
+            if n % 200 == 100:
+                message += "\n\tat com.example.Foo.bar(Foo.java:42)"
+            payload = bytes([2 + n % 6]) + tag.encode() + b"\0" + message.encode() + b"\0"
+            log_id, line = 0, f"{stamp} {pid:5d} {tid:5d} {level} {tag}: {message}"
+        entries.append(ENTRY_HEADER.pack(len(payload), 28, pid, tid, sec, nsec) + V4_HEADER.pack(log_id, 1000) + payload)
+        lines.append(line)
+    return b"".join(entries), ("\n".join(lines) + "\n").encode()
+
+
+def ingest(decoder, data, chunk):
+    records = 0
+    view = memoryview(data)
+    t0 = time.perf_counter()
+    for off in range(0, len(data), chunk):
+        records += len(decoder.feed(view[off:off + chunk]))
+    return records, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=500_000)
+    parser.add_argument("--chunk", type=int, default=LOGCAT_READ_CHUNK)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    binary, text = synthesise(args.entries)
+    print(f"{args.entries} entries: binary {len(binary) / 1e6:.1f} MB, text {len(text) / 1e6:.1f} MB\n")
+    rates = []
+    for name, make, data in (("text  (-v threadtime)", LogParser, text),
+                             ("binary (-B)", lambda: BinaryLogDecoder(EVENT_TAGS), binary)):
+        records, elapsed = min((ingest(make(), data, args.chunk) for _ in range(args.repeat)), key=lambda run: run[1])
+        rates.append(args.entries / elapsed)
+        print(f"{name:22} {records:>8} records  {elapsed * 1000:7.0f} ms  "
+              f"{records / elapsed / 1000:7.0f}k records/s  {len(data) / elapsed / 1e6:6.1f} MB/s")
+    print(f"\nbinary / text: {rates[1] / rates[0]:.2f}x entries/s")
+
+
+if __name__ == "__main__":
+    main()
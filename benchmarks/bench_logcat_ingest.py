@@ -0,0 +1,233 @@
+"""
+Logcat ingest: highest sustained line rate the Live Logcat view keeps up with.
+
+Usage:
+    python benchmarks/bench_logcat_ingest.py [--rates 2000,5000,10000,20000,50000,100000] [--seconds 3]
+    python benchmarks/bench_logcat_ingest.py --retained 1000000
+
+A synthetic logcat stream (no device needed) is fed at each rate through
+  - legacy: one signal per line, appendPlainText per line into a highlighted
+    QPlainTextEdit (the original path)
+  - batched: LogcatThread batches -> LogStore -> virtualized LogView
+into an offscreen log viewer. A rate counts as sustained when >= 95% of the
+lines reach the viewer within the run and the GUI event loop never stalls for
+more than --max-lag-ms (measured with a 10 ms heartbeat timer).
+
+--retained N fills a LogView with N lines and reports memory growth and the
+time to repaint while paging through it.
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QElapsedTimer, QThread, QTimer, Signal
+from PySide6.QtGui import QColor, QSyntaxHighlighter, QTextCharFormat
+from PySide6.QtWidgets import QApplication, QPlainTextEdit
+
+from components.log_view import LogView
+from services.device_tool_service import LogcatThread, LogStream
+from services.log_store import LogParser, LogStore
+
+TEMPLATE = ("12-18 00:01:54.{ms:03d}  {pid}  {tid} {level} {tag}: synthetic message number {n} "
+            "with some payload text to look like a real line\n")
+TAGS = ["ActivityManager", "CarService", "VehicleHal", "AudioFlinger", "chatty", "WindowManager"]
+
+
+class SyntheticLogcat(io.RawIOBase):
+    """Paced `-v threadtime` stream: produces `rate` lines per second until closed."""
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self.produced = 0
+        self.started = time.perf_counter()
+        self._closed = threading.Event()
+        self.block = [TEMPLATE.format(ms=i % 1000, level="VDIWEF"[i % 6], tag=TAGS[i % len(TAGS)],
+                                      pid=1000 + i % 50, tid=2000 + i % 7, n=i).encode() for i in range(600)]
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._closed.is_set():
+            due = int((time.perf_counter() - self.started) * self.rate) - self.produced
+            if due > 0:
+                out, size = [], 0
+                while due and size < len(buffer) - 200:
+                    line = self.block[self.produced % len(self.block)]
+                    out.append(line)
+                    size += len(line)
+                    self.produced += 1
+                    due -= 1
+                data = b"".join(out)
+                buffer[:len(data)] = data
+                return len(data)
+            time.sleep(0.002)
+        return 0
+
+    def close(self):
+        self._closed.set()
+        super().close()
+
+
+class FakeAdb:
+    def __init__(self, source):
+        self.source = source
+
+    def exec_out_reader(self, serial, command, timeout=30):
+        return self.source
+
+
+class LegacyHighlighter(QSyntaxHighlighter):
+    """The regex highlighter the QPlainTextEdit viewer used to run on every block."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rules = []
+        for pattern, color in ((r" E ", "#FF5555"), (r" W ", "#FFB86C"), (r" I ", "#8BE9FD"), (r" D ", "#50FA7B")):
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self.rules.append((pattern, fmt))
+
+    def highlightBlock(self, text):
+        for pattern, fmt in self.rules:
+            for match in re.finditer(pattern, text):
+                self.setFormat(match.start(), match.end() - match.start(), fmt)
+
+
+class LegacyLogcatThread(QThread):
+    """The pre-batching reader: one signal per line."""
+    line_received = Signal(str)
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+
+    def run(self):
+        for line in io.BufferedReader(self.source):
+            self.line_received.emit(line.decode("utf-8", "replace"))
+
+
+def run_rate(app, mode, rate, seconds, max_lag_ms):
+    store = LogStore(1_000_000)
+    if mode == "legacy":
+        viewer = QPlainTextEdit()
+        viewer.setReadOnly(True)
+        LegacyHighlighter(viewer.document())
+    else:
+        viewer = LogView(store)
+    viewer.resize(1000, 700)
+    viewer.show()
+
+    source = SyntheticLogcat(rate)
+    received = [0]
+    if mode == "legacy":
+        thread = LegacyLogcatThread(source)
+        def on_line(line):
+            received[0] += 1
+            viewer.appendPlainText(line.strip())
+        thread.line_received.connect(on_line)
+        stop = source.close
+    else:
+        thread = LogcatThread([LogStream("bench", FakeAdb(source))])
+        def on_batch(records, visible, log_filter):
+            received[0] += len(records)
+            start = store.end_seq
+            store.extend(records)
+            viewer.append(start, len(records), visible)
+        thread.batch_received.connect(on_batch)
+        stop = thread.stop
+
+    lag = [0.0]
+    beat = QElapsedTimer()
+    beat.start()
+    def heartbeat():
+        lag[0] = max(lag[0], beat.restart() - 10)
+    timer = QTimer()
+    timer.timeout.connect(heartbeat)
+    timer.start(10)
+
+    thread.start()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+    stop()
+    thread.wait(2000)
+    produced = source.produced
+    # Give queued signals a short grace period, then measure what arrived
+    deadline = time.perf_counter() + 0.2
+    while time.perf_counter() < deadline:
+        app.processEvents()
+    timer.stop()
+    viewer.close()
+    delivered = received[0] / produced if produced else 0.0
+    ok = delivered >= 0.95 and lag[0] <= max_lag_ms
+    print(f"{mode:>8} {rate:>7} lines/s: delivered {delivered * 100:5.1f}%  max GUI stall {lag[0]:6.0f} ms  "
+          f"{'OK' if ok else 'FALLING BEHIND'}")
+    return ok
+
+
+def run_retained(app, count):
+    """Memory and paging cost with `count` lines retained in the virtualized view."""
+    parser = LogParser()
+    source = SyntheticLogcat(1)
+    tracemalloc.start()
+    store = LogStore(count)
+    viewer = LogView(store)
+    viewer.resize(1000, 700)
+    viewer.show()
+    t0 = time.perf_counter()
+    for start in range(0, count, 1000):
+        lines = [source.block[(start + i) % len(source.block)].decode() for i in range(min(1000, count - start))]
+        seq = store.end_seq
+        store.extend(parser.parse_many(lines))
+        viewer.append(seq, len(lines))
+    app.processEvents()
+    fill_s = time.perf_counter() - t0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"retained {count} lines: filled in {fill_s:.1f} s, {current / 1e6:.0f} MB ({current / count:.0f} B/line)")
+
+    # Page from bottom to top and jump around, forcing a repaint each step
+    bar = viewer.verticalScrollBar()
+    samples = []
+    for value in list(range(bar.maximum(), 0, -max(1, bar.maximum() // 200))) + [0, bar.maximum() // 2, bar.maximum()]:
+        t = time.perf_counter()
+        bar.setValue(value)
+        viewer.viewport().repaint()
+        samples.append(time.perf_counter() - t)
+    samples.sort()
+    print(f"  scroll+repaint: p50 {samples[len(samples) // 2] * 1000:.1f} ms, "
+          f"max {samples[-1] * 1000:.1f} ms over {len(samples)} steps")
+    viewer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="2000,5000,10000,20000,50000,100000")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--max-lag-ms", type=float, default=100.0)
+    parser.add_argument("--retained", type=int, help="Only run the retained-lines memory/scroll check")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    if args.retained:
+        run_retained(app, args.retained)
+        return
+    rates = [int(r) for r in args.rates.split(",")]
+    for mode in ("legacy", "batched"):
+        best = 0
+        for rate in rates:
+            if not run_rate(app, mode, rate, args.seconds, args.max_lag_ms):
+                break
+            best = rate
+        print(f"{mode:>8}: sustained {best} lines/s\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Meminfo parsing: `dumpsys meminfo -c` dumps into typed records and per-process history.
+
+Usage:
+    python benchmarks/bench_meminfo.py [--processes 1000] [--dumps 360] [--repeat 50]
+
+Builds a synthetic compact dump with --processes processes spread over the
+oom buckets (a few of them leaking and moving between buckets from dump to
+dump; no device needed) and times parse_meminfo() on one dump. Then
+streams --dumps dumps interleaved with other lines, the way they sit in
+perf_monitor_dump.txt, through iter_meminfo() into a MeminfoHistory (an
+hour of dumps at the default 10 s), and times the leak scan over the
+resulting history. The leakers grow by at least twice MEMINFO_GROWTH_MIN_KB
+over the run, so the scan finds all of them at any --dumps (minimum 6, the
+samples the scan needs).
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import MEMINFO_GROWTH_MIN_KB
+from services.meminfo import MeminfoHistory, iter_meminfo, parse_meminfo
+
+MIN_DUMPS = 6 # MeminfoHistory.growth() min_samples
+BUCKETS = ("native", "sys", "pers", "fore", "vis", "percept", "servicea", "home", "prev", "serviceb", "cached")
+
+
+def leak_per_dump(dumps):
+    """kB a leaking process grows per dump: 200, or enough to rise 2x MEMINFO_GROWTH_MIN_KB over a short run."""
+    return max(200, -(-2 * MEMINFO_GROWTH_MIN_KB // (dumps - 1)))
+
+
+def make_dump(processes, index, leak_kb=200):
+    """One dump; processes every 100th leak leak_kb a dump, every 50th moves between vis and cached."""
+    rows = {bucket: [] for bucket in BUCKETS}
+    for n in range(processes):
+        bucket = BUCKETS[n * len(BUCKETS) // processes]
+        if n % 50 == 7:
+            bucket = "cached" if index % 4 >= 2 else "vis"
+        pss = 2000 + (n * 7919) % 90000 + (index * leak_kb if n % 100 == 3 else (index * 31 + n) % 300)
+        rows[bucket].append(f"proc,{bucket},com.example.app{n}:service,{1000 + n},{pss},{pss // 20},{'ae'[n % 2]}")
+    lines = ["version,1", f"time,{index * 10000},{index * 10000}"]
+    for bucket in BUCKETS:
+        total = sum(int(row.split(",")[4]) for row in rows[bucket])
+        lines.append(f"oom,{bucket},{total},{total // 20}")
+        lines.extend(rows[bucket])
+    lines += [f"cat,{name},{50000 + i * 1000},N/A" for i, name in enumerate(("Native", "Dalvik", ".so mmap", "Unknown"))]
+    lines += ["ram,3800000,1200000,2000000", "lostram,123456", "zram,100000,2000000,1500000", "tuning,256,512,65536"]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=1000)
+    parser.add_argument("--dumps", type=int, default=360)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    if args.dumps < MIN_DUMPS:
+        parser.error(f"--dumps must be at least {MIN_DUMPS} for the leak scan")
+
+    dump = make_dump(args.processes, 0)
+    parse_meminfo(dump)
+    begin = time.perf_counter()
+    for _ in range(args.repeat):
+        snapshot = parse_meminfo(dump)
+    ms = (time.perf_counter() - begin) / args.repeat * 1000
+    print(f"parse one dump: {ms:.2f} ms for {len(snapshot.processes)} processes "
+          f"({len(dump.splitlines())} rows, {len(dump) / 1024:.0f} KB)")
+
+    leak_kb = leak_per_dump(args.dumps)
+    text = "".join(f"--- {index} ---\ncpu.total=12.5\nMemory Raw:\n{make_dump(args.processes, index, leak_kb)}\n"
+                   for index in range(args.dumps))
+    history = MeminfoHistory(args.dumps)
+    parse_s = add_s = 0.0
+    events = 0
+    stream = iter_meminfo(io.StringIO(text))
+    began = time.perf_counter()
+    for index, snapshot in enumerate(stream):
+        parsed = time.perf_counter()
+        events += len(history.add("bench", snapshot, index * 10.0))
+        added = time.perf_counter()
+        add_s += added - parsed
+        parse_s += parsed - began
+        began = added
+    print(f"stream {args.dumps} dumps ({len(text) / 1e6:.1f} MB): parse {parse_s / args.dumps * 1000:.2f} ms, "
+          f"history add {add_s / args.dumps * 1000:.2f} ms per dump, {events} oom events")
+
+    begin = time.perf_counter()
+    growing = history.growth("bench", min_growth_kb=MEMINFO_GROWTH_MIN_KB)
+    print(f"leak scan over {len(history.processes('bench'))} processes x {args.dumps} samples: "
+          f"{(time.perf_counter() - begin) * 1000:.1f} ms, {len(growing)} growing "
+          f"(expected {len(range(3, args.processes, 100))}, leaking {leak_kb} kB per dump)")
+
+
+if __name__ == "__main__":
+    main()
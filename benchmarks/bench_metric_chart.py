@@ -0,0 +1,91 @@
+"""
+Monitoring charts: redraw time with a large history retained, decimated vs drawing every point.
+
+Usage:
+    python benchmarks/bench_metric_chart.py [--points 1000000] [--width 1200] [--height 300] [--repeat 20]
+
+Runs offscreen (no display or device needed). Fills a MetricsStore with
+--points samples of one metric at 10 Hz, all kept at full resolution,
+and times MetricChart repaints into an image at --width x --height for
+windows from one minute to the whole session. Each repaint decimates the
+window to one min/max pair per pixel column, so its cost should stay
+flat while the window holds 600 or 1M points. For comparison, the same
+windows are drawn naively as one polyline through every sample.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QImage, QPainter, QPolygonF, QColor
+
+from components.metric_chart import MetricChart
+from core.config import CHART_FRAME_MS
+from services.metrics_store import MetricsStore
+
+HZ = 10
+
+
+def timed(fn, repeat):
+    fn() # Warm up (font and glyph caches)
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - begin) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    store = MetricsStore(args.points, 1024, 5000) # Raw tier holds the whole session
+    end = time.time()
+    start = end - args.points / HZ
+    for n in range(args.points):
+        store.append("bench", start + n / HZ, {"cpu.total": 50 + 30 * math.sin(n / 5000) + (n * 7919 % 97) / 5})
+    print(f"{args.points} points retained ({args.points / HZ / 3600:.1f} h at {HZ} Hz), "
+          f"{store.nbytes / 1e6:.1f} MB\n")
+
+    chart = MetricChart(store, "CPU", "%", y_range=(0, 100))
+    chart.set_series([("bench", "cpu.total", "total")])
+    chart.resize(args.width, args.height)
+    image = QImage(args.width, args.height, QImage.Format_ARGB32_Premultiplied)
+
+    def redraw():
+        chart.render(image)
+
+    def naive(window_start):
+        # What drawing without decimation costs: one vertex per retained sample in the window
+        times, values = store.window("bench", "cpu.total", window_start, end)[:2]
+        xs = (times - window_start * 1000) * (args.width / ((end - window_start) * 1000))
+        ys = args.height - values * (args.height / 100)
+        painter = QPainter(image)
+        painter.fillRect(image.rect(), QColor("#111"))
+        painter.setPen(QColor("#40E0D0"))
+        painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())]))
+        painter.end()
+
+    print(f"{'window':>14} {'points':>9} {'decimated':>11} {'naive':>11}")
+    for label, seconds in (("1 min", 60), ("1 h", 3600), ("full session", end - start)):
+        chart.set_range(end - seconds, end, False)
+        points = len(store.window("bench", "cpu.total", end - seconds, end)[0])
+        decimated = timed(redraw, args.repeat)
+        plain = timed(lambda: naive(end - seconds), max(1, args.repeat // 10))
+        print(f"{label:>14} {points:9} {decimated:8.2f} ms {plain:8.1f} ms")
+    print(f"\nframe budget: at most one repaint per chart every {CHART_FRAME_MS} ms, however fast samples arrive")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Metrics store: append cost, memory and query time over a full-length session.
+
+Usage:
+    python benchmarks/bench_metrics_store.py [--hours 24] [--hz 10] [--metrics 10]
+
+Appends a synthetic session (--hours of samples at --hz, --metrics values
+per sample, no device needed) the way PerformanceThread samples arrive,
+reporting the append rate per block of hours so any slowdown as history
+grows shows, and the store's memory, which is fixed when a series is
+created. Then times the window statistics and display downsampling the
+Monitoring tab runs, against plain Python over a list of the same raw
+samples for the last hour.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import METRICS_RAW_SECONDS, METRICS_HISTORY_HOURS, METRICS_ROLLUP_MS
+from services.metrics_store import MetricsStore
+
+
+def timed(fn, repeat=20):
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - begin) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--hz", type=float, default=10)
+    parser.add_argument("--metrics", type=int, default=10)
+    args = parser.parse_args()
+
+    store = MetricsStore(int(METRICS_RAW_SECONDS * args.hz), int(METRICS_HISTORY_HOURS * 3600 * 1000 // METRICS_ROLLUP_MS),
+                         METRICS_ROLLUP_MS)
+    names = [f"metric.{index}" for index in range(args.metrics)]
+    samples = int(args.hours * 3600 * args.hz)
+    t0 = time.time() - args.hours * 3600
+    block = max(1, samples // 6)
+    spent = 0.0
+    last_hour = []
+    for n in range(samples):
+        when = t0 + n / args.hz
+        wave = 50 + 40 * math.sin(n / 3000)
+        metrics = {name: wave + index + (n * 7919 % 97) / 10 for index, name in enumerate(names)}
+        begin = time.perf_counter()
+        store.append("bench", when, metrics)
+        spent += time.perf_counter() - begin
+        if n >= samples - METRICS_RAW_SECONDS * args.hz:
+            last_hour.append(metrics[names[0]])
+        if (n + 1) % block == 0:
+            print(f"{(n + 1) / args.hz / 3600:6.1f} h  {block * args.metrics / spent / 1e6:5.2f}M values/s"
+                  f"  ({spent / block / args.metrics * 1e6:4.2f} us per value)")
+            spent = 0.0
+    raw_bytes = samples * args.metrics * 16 # float + int timestamp per value, before any Python object overhead
+    print(f"\nmemory: {store.nbytes / 1e6:.1f} MB for {args.metrics} series "
+          f"(every raw sample as int64+float64 arrays would be {raw_bytes / 1e6:.0f} MB)")
+
+    end = t0 + samples / args.hz
+    print()
+    for label, seconds in (("1 min", 60), ("1 h", 3600), ("full session", args.hours * 3600)):
+        ms, stats = timed(lambda: store.stats("bench", names[0], end - seconds, end))
+        print(f"stats {label:13} {ms:7.2f} ms  (count {stats['count']}, mean {stats['mean']:.1f}, p95 {stats['p95']:.1f})")
+    for method in ("minmax", "lttb"):
+        ms, result = timed(lambda: store.downsample("bench", names[0], None, None, 1500, method), 5)
+        print(f"{method:6} 1500 points of the session {ms:7.2f} ms  ({len(result[0])} points)")
+
+    def python_stats():
+        ordered = sorted(last_hour)
+        return min(last_hour), max(last_hour), sum(last_hour) / len(last_hour), ordered[int(len(ordered) * 0.95)]
+    ms, _ = timed(python_stats, 5)
+    print(f"\nplain Python min/max/mean/p95 over the last hour's list: {ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Performance sampling: device CPU cost and round trip per sample, old polling vs ProcSampler.
+
+Usage:
+    python benchmarks/bench_proc_sampler.py [--serial SERIAL] [--samples 50] [--hz 10] [--seconds 10]
+
+For each method, the sample commands run --samples times in a loop inside
+one device shell, and the device's own counters are read around the loop:
+  - child CPU: utime+stime of the processes the loop ran (cutime/cstime of
+    the shell), i.e. what `top`/`dumpsys`/`grep` themselves burned
+  - system CPU: busy jiffies of the whole device over the loop, which also
+    counts the work dumpsys triggers in system_server (and any background load)
+Then the sampler is run from the host through AdbWrapper for --seconds at
+--hz to show the rate it sustains and the round trip per sample.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.adb_wrapper import AdbWrapper
+from services.proc_sampler import ProcSampler, SAMPLE_COMMAND
+
+METHODS = {
+    # What PerformanceThread ran every 2 s before
+    "top+dumpsys": ["top -n 1 -m 5 -s cpu", "dumpsys meminfo -c", "dumpsys battery", "service list"],
+    "ProcSampler": [SAMPLE_COMMAND],
+}
+
+
+def device_cost(adb, serial, commands, samples):
+    """:return: (child CPU ms, system busy CPU ms, wall ms) per sample, measured on the device."""
+    body = "; ".join(f"{command} >/dev/null 2>&1" for command in commands)
+    script = (f"head -n 1 /proc/stat; cat /proc/$$/stat; cat /proc/uptime; i=0; while [ $i -lt {samples} ]; do {body}; "
+              f"i=$((i+1)); done; cat /proc/uptime; cat /proc/$$/stat; head -n 1 /proc/stat; getconf CLK_TCK")
+    out, err, code = adb.shell(serial, script, timeout=600)
+    lines = out.splitlines()
+    if len(lines) < 7:
+        raise RuntimeError(f"unexpected output: {out!r} {err!r}")
+    hz = int(lines[6]) if lines[6].strip().isdigit() else 100
+
+    def busy(line):
+        fields = [int(x) for x in line.split()[1:9]]
+        return sum(fields) - fields[3] - fields[4]
+
+    def children(line):
+        fields = line.rsplit(")", 1)[1].split() # After "(comm)": state is field 3, cutime/cstime are 16/17
+        return int(fields[13]) + int(fields[14])
+
+    child = (children(lines[4]) - children(lines[1])) / hz
+    system = (busy(lines[5]) - busy(lines[0])) / hz
+    wall = float(lines[3].split()[0]) - float(lines[2].split()[0])
+    return child / samples * 1000, system / samples * 1000, wall / samples * 1000
+
+
+def host_rate(adb, serial, hz, seconds):
+    sampler = ProcSampler()
+    interval = 1 / hz
+    rtts = []
+    metrics = None
+    started = next_sample = time.monotonic()
+    while time.monotonic() - started < seconds:
+        sent = time.perf_counter()
+        out, _, _ = adb.shell(serial, SAMPLE_COMMAND)
+        rtts.append(time.perf_counter() - sent)
+        metrics = sampler.update(out) or metrics
+        next_sample += interval
+        delay = next_sample - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.monotonic() - started
+    rtts.sort()
+    print(f"\nhost loop at {hz} Hz target: {len(rtts) / elapsed:.1f} samples/s, round trip p50 "
+          f"{rtts[len(rtts) // 2] * 1000:.1f} ms, p95 {rtts[int(len(rtts) * 0.95)] * 1000:.1f} ms, "
+          f"{len(metrics or {})} metrics per sample")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serial", help="Device serial (defaults to the first device)")
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--hz", type=float, default=10.0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    adb = AdbWrapper(query_cache=False)
+    serial = args.serial or next(iter(adb.get_devices()), None)
+    if not serial:
+        sys.exit("No device connected")
+
+    print(f"{'method':14} {'child CPU':>12} {'system CPU':>12} {'wall':>10}   (per sample, on the device)")
+    for name, commands in METHODS.items():
+        try:
+            child, system, wall = device_cost(adb, serial, commands, args.samples)
+        except Exception as e:
+            print(f"{name:14} failed: {e}")
+            continue
+        print(f"{name:14} {child:9.1f} ms {system:9.1f} ms {wall:7.1f} ms")
+    host_rate(adb, serial, args.hz, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Per-process sampling: sustained rate, round trip and device CPU for the target packages' processes.
+
+Usage:
+    python benchmarks/bench_process_sampler.py --packages com.android.systemui,com.android.car.media
+        [--serial SERIAL] [--hz 10] [--seconds 10] [--samples 50]
+
+Samples the system metrics plus every process of --packages the way
+PerformanceThread does, with one adb round trip per tick, for --seconds
+at --hz, and reports the rate it sustains, the round trip and the output
+size per tick. Then the device CPU per tick of the process part alone is
+measured inside one device shell (see bench_proc_sampler.py), with and
+without the smaps_rollup (PSS) read that is throttled to
+PROC_PSS_INTERVAL_MS. Last, one tick done the obvious way: one adb
+command per file per process.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_proc_sampler import device_cost
+from services.adb_wrapper import AdbWrapper
+from services.proc_sampler import ProcSampler, SAMPLE_COMMAND
+from services.process_sampler import ProcessSampler
+
+
+def host_rate(adb, serial, packages, hz, seconds):
+    system, processes = ProcSampler(), ProcessSampler(packages)
+    interval = 1 / hz
+    rtts, sizes = [], []
+    metrics = {}
+    started = next_sample = time.monotonic()
+    while time.monotonic() - started < seconds:
+        extra = processes.command(time.monotonic())
+        sent = time.perf_counter()
+        out, _, _ = adb.shell(serial, f"{SAMPLE_COMMAND}; {extra}")
+        rtts.append(time.perf_counter() - sent)
+        sizes.append(len(out))
+        if system.update(out):
+            metrics = processes.update(out)
+        next_sample += interval
+        delay = next_sample - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.monotonic() - started
+    rtts.sort()
+    print(f"host loop at {hz} Hz target: {len(rtts) / elapsed:.1f} ticks/s, round trip p50 "
+          f"{rtts[len(rtts) // 2] * 1000:.1f} ms, p95 {rtts[int(len(rtts) * 0.95)] * 1000:.1f} ms, "
+          f"{sum(sizes) / len(sizes) / 1024:.1f} KB per tick")
+    for package in packages:
+        values = {name[len(package) + 6:]: value for name, value in metrics.items() if name.startswith(f"proc.{package}.")}
+        print(f"  {package}: " + ", ".join(f"{name} {value:.0f}" for name, value in values.items()))
+    return processes
+
+
+def naive_tick(adb, serial, pids):
+    """One adb command per file per process, as a per-process poll would do it."""
+    begin = time.perf_counter()
+    for pid in pids:
+        for path in ("stat", "status", "smaps_rollup"):
+            adb.shell(serial, f"cat /proc/{pid}/{path}")
+        adb.shell(serial, f"ls /proc/{pid}/fd | wc -l")
+    return (time.perf_counter() - begin) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packages", required=True, help="Comma-separated packages or process names")
+    parser.add_argument("--serial", help="Device serial (defaults to the first device)")
+    parser.add_argument("--hz", type=float, default=10.0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    adb = AdbWrapper(query_cache=False)
+    serial = args.serial or next(iter(adb.get_devices()), None)
+    if not serial:
+        sys.exit("No device connected")
+    packages = [package.strip() for package in args.packages.split(",") if package.strip()]
+
+    processes = host_rate(adb, serial, packages, args.hz, args.seconds)
+    pids = sorted(processes.pids)
+    print(f"\n{len(pids)} processes")
+    if not pids:
+        return
+
+    print(f"\n{'device CPU per tick':24} {'child CPU':>12} {'system CPU':>12} {'wall':>10}")
+    for label, pss_at in (("stat+status+fds", float("inf")), ("...+smaps_rollup (PSS)", 0.0)):
+        processes._pss_at, processes._resolve_at = pss_at, float("inf") # Pin this tick's shape
+        command = processes.command(time.monotonic())
+        try:
+            child, system, wall = device_cost(adb, serial, [f"{{ {command}; }}"], args.samples)
+        except Exception as e:
+            print(f"{label:24} failed: {e}")
+            continue
+        print(f"{label:24} {child:9.1f} ms {system:9.1f} ms {wall:7.1f} ms")
+
+    print(f"\none adb command per file per process: {naive_tick(adb, serial, pids):.0f} ms per tick "
+          f"({len(pids) * 4} round trips)")
+
+
+if __name__ == "__main__":
+    main()
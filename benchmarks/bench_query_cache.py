@@ -0,0 +1,60 @@
+"""
+Repeated Device Info / Stability Check visits with and without the QueryCache.
+
+Usage:
+    python benchmarks/bench_query_cache.py [--rtt 0.03] [--visits 10]
+
+Each visit gathers full device info and lists launchable activities, like opening
+both pages once. The cached run also reports hit rates and shows that a reboot
+invalidates the cache (the next visit misses again).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_device import FakeDevice
+from services.device_info_gatherer import DeviceInfoGatherer
+
+
+def visits(device, serial, count):
+    gatherer = DeviceInfoGatherer(device)
+    device.round_trips = 0
+    t0 = time.perf_counter()
+    first = None
+    for index in range(count):
+        gatherer.gather_full_info(serial)
+        device.get_launchable_activities(serial)
+        if index == 0:
+            first = device.round_trips
+    return time.perf_counter() - t0, first, device.round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt", type=float, default=0.03, help="Seconds per adb round trip")
+    parser.add_argument("--visits", type=int, default=10)
+    args = parser.parse_args()
+
+    plain = FakeDevice(rtt=args.rtt)
+    cached = FakeDevice(rtt=args.rtt, query_cache=True)
+    serial = plain.get_devices()[0]
+
+    elapsed, _, trips = visits(plain, serial, args.visits)
+    print(f"uncached: {elapsed * 1000:7.1f} ms, {trips} round trips for {args.visits} visits")
+    elapsed, first, trips = visits(cached, serial, args.visits)
+    print(f"cached  : {elapsed * 1000:7.1f} ms, {trips} round trips for {args.visits} visits "
+          f"({first} on the first, incl. boot id check)")
+
+    cached.cache.on_reboot(serial) # What AdbWrapper.reboot does
+    _, first, _ = visits(cached, serial, 1)
+    print(f"after reboot: {first} round trips (cache invalidated)")
+
+    for name, stat in cached.cache.stats().items():
+        print(f"  {name:9s} hits={stat['hits']:<4d} misses={stat['misses']:<4d} hit_rate={stat['hit_rate']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
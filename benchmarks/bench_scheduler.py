@@ -0,0 +1,101 @@
+"""
+Interactive command latency under background load, with and without CommandScheduler.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--seconds 10] [--monitors 4]
+
+Models one device whose transport serves 3 commands at a time (one per shell
+session). Background threads keep it busy with slow monitoring queries
+(~300 ms, like dumpsys) and a bulk pull, while "button presses" (~20 ms) arrive
+every 100 ms. Reports interactive p50/p99 latency for both setups.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.command_scheduler import CommandScheduler, Priority
+
+COSTS = {"dumpsys": 0.3, "pull": 1.5, "input": 0.02}
+
+
+class SlotLimitedDevice:
+    """Fake AdbWrapper: FIFO access to a fixed number of transport slots."""
+    def __init__(self, slots=3):
+        self.free = slots
+        self.waiting = deque()
+        self.cond = threading.Condition()
+
+    def shell(self, serial, command, timeout=10):
+        ticket = object()
+        with self.cond:
+            self.waiting.append(ticket)
+            while self.waiting[0] is not ticket or not self.free:
+                self.cond.wait()
+            self.waiting.popleft()
+            self.free -= 1
+            self.cond.notify_all()
+        time.sleep(COSTS[command.split()[0]])
+        with self.cond:
+            self.free += 1
+            self.cond.notify_all()
+        return "", "", 0
+
+
+def run(seconds, monitors, use_scheduler):
+    adb = SlotLimitedDevice()
+    scheduler = CommandScheduler(adb) if use_scheduler else None
+    stop = threading.Event()
+
+    def execute(command, priority, deadline=None):
+        if scheduler:
+            return scheduler.shell("bench", command, priority, deadline=deadline)
+        return adb.shell("bench", command)
+
+    def background(command, priority, deadline=None):
+        while not stop.is_set():
+            execute(command, priority, deadline)
+
+    threads = [threading.Thread(target=background, args=("dumpsys meminfo", Priority.MONITORING, 2.0))
+               for _ in range(monitors)]
+    threads.append(threading.Thread(target=background, args=("pull /sdcard/x", Priority.BULK)))
+    for t in threads:
+        t.start()
+
+    latencies = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        t0 = time.perf_counter()
+        execute("input keyevent 24", Priority.INTERACTIVE)
+        latencies.append(time.perf_counter() - t0)
+        time.sleep(0.1)
+
+    stop.set()
+    for t in threads:
+        t.join()
+    if scheduler:
+        scheduler.shutdown()
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+    label = "scheduler" if use_scheduler else "direct"
+    print(f"{label:>9}: interactive p50 {pct(0.5):6.1f} ms  p99 {pct(0.99):6.1f} ms  ({len(latencies)} presses)")
+    if scheduler:
+        for name, stat in scheduler.metrics()["bench"].items():
+            print(f"           {name:<11} {stat}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--monitors", type=int, default=4)
+    args = parser.parse_args()
+    run(args.seconds, args.monitors, use_scheduler=False)
+    run(args.seconds, args.monitors, use_scheduler=True)
+
+
+if __name__ == "__main__":
+    main()
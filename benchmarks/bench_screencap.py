@@ -0,0 +1,90 @@
+"""
+Screenshot latency: staged (screencap -p /sdcard/..., pull, rm) vs streamed PNG vs raw + host encode.
+
+Usage:
+    python benchmarks/bench_screencap.py [--serial SERIAL] [--runs 5] [--parallel 4]
+
+Requires a running adb server with at least one device attached. --parallel
+fires that many captures at once, spread round-robin over all connected devices.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication
+
+from services.adb_wrapper import AdbWrapper
+from services.screen_capture import ScreenCapture
+
+OUT_DIR = tempfile.gettempdir()
+
+
+def staged(adb, serial, path):
+    # The pre-streaming ScreenshotWorker flow
+    remote = "/sdcard/temp_screenshot.png"
+    adb.shell(serial, f"screencap -p {remote}")
+    adb.pull(serial, remote, path)
+    adb.shell(serial, f"rm {remote}")
+
+
+def streamed_png(capture, serial, path):
+    capture.save(serial, path, mode="png")
+
+
+def raw_host_encoded(capture, serial, path):
+    # Synchronous encode so the number includes host encoding time
+    capture.grab_raw(serial).save(path)
+
+
+def measure(label, fn, serials, runs):
+    samples = []
+    for index in range(runs):
+        t0 = time.perf_counter()
+        fn(serials[0], os.path.join(OUT_DIR, f"tp_bench_{label}_{index}.png"))
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    p50 = samples[len(samples) // 2]
+    print(f"{label:<12} p50 {p50 * 1000:7.1f} ms  best {samples[0] * 1000:7.1f} ms")
+    return p50
+
+
+def concurrent(label, fn, serials, parallel):
+    paths = [os.path.join(OUT_DIR, f"tp_bench_par_{label}_{i}.png") for i in range(parallel)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(parallel) as pool:
+        list(pool.map(lambda i: fn(serials[i % len(serials)], paths[i]), range(parallel)))
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<12} {parallel} in flight: {elapsed * 1000:7.1f} ms total ({parallel / elapsed:.1f} shots/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serial", help="Device serial (defaults to all devices)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--parallel", type=int, default=4)
+    args = parser.parse_args()
+
+    adb = AdbWrapper(query_cache=False)
+    serials = [args.serial] if args.serial else adb.get_devices()
+    if not serials:
+        sys.exit("No ADB devices connected!")
+    capture = ScreenCapture(adb)
+
+    print(f"Devices {', '.join(serials)}: best-of/median of {args.runs}")
+    base = measure("staged", lambda s, p: staged(adb, s, p), serials, args.runs)
+    png = measure("stream-png", lambda s, p: streamed_png(capture, s, p), serials, args.runs)
+    raw = measure("raw+encode", lambda s, p: raw_host_encoded(capture, s, p), serials, args.runs)
+    print(f"speedup vs staged: {base / png:.1f}x (png), {base / raw:.1f}x (raw)")
+
+    if args.parallel > 1:
+        concurrent("raw+encode", lambda s, p: raw_host_encoded(capture, s, p), serials, args.parallel)
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv) # image plugins; kept referenced while main() runs
+    main()
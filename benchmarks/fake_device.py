@@ -0,0 +1,68 @@
+"""
+Scripted fake device for benchmarks that must run without hardware.
+
+FakeDevice is an AdbWrapper whose shell commands execute in a local `sh` with
+Android tools (getprop, wm, lshal, getenforce, df) stubbed as shell functions.
+Every call sleeps `rtt` seconds first to model one adb round trip
+(client fork + transport + shell spawn on the device).
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.adb_wrapper import AdbWrapper
+
+DEFAULT_PROPS = {
+    "ro.serialno": "FAKE0001",
+    "ro.product.model": "AAOS Bench Unit",
+    "ro.product.manufacturer": "TestPilot",
+    "ro.board.platform": "fakesoc",
+    "ro.product.cpu.abi": "x86_64",
+    "ro.boot.hardware.revision": "EVT2",
+    "ro.build.version.release": "14",
+    "ro.build.version.sdk": "34",
+    "ro.build.fingerprint": "fake/aaos/bench:14/UP1A/1:userdebug/test-keys",
+    "ro.build.id": "UP1A.231005.007",
+    "ro.build.version.security_patch": "2025-10-01",
+    "ro.build.characteristics": "automotive,nosdcard",
+    "ro.debuggable": "1",
+    "ro.boot.verifiedbootstate": "orange",
+    "sys.boot_completed": "1",
+    "persist.sys.timezone": "Europe/Berlin",
+    "persist.sys.locale": "en-US",
+}
+
+PRELUDE = r"""
+getprop() {
+  if [ -z "$1" ]; then printf '%s\n' "$TP_FAKE_PROPS";
+  else printf '%s\n' "$TP_FAKE_PROPS" | sed -n "s/^\[$1\]: \[\(.*\)\]$/\1/p"; fi
+}
+wm() { case "$1" in size) echo "Physical size: 1920x720";; density) echo "Physical density: 160";; esac; }
+lshal() { echo "Y android.hardware.automotive.vehicle@2.0::IVehicle/default"; }
+getenforce() { echo Enforcing; }
+cmd() { [ "$1" = package ] && printf 'com.android.car.settings/.Settings\ncom.android.car.media/.MediaActivity\n'; }
+df() { printf 'Filesystem Size Used Avail Use%% Mounted on\n/dev/block/dm-5 24G 6.1G 18G 26%% /data\n'; }
+"""
+
+
+class FakeDevice(AdbWrapper):
+    def __init__(self, rtt=0.03, props=None, query_cache=False):
+        super().__init__(mode="cli", persistent_shell=False, query_cache=query_cache)
+        self.rtt = rtt
+        self.round_trips = 0
+        props = props or DEFAULT_PROPS
+        self.env = dict(os.environ)
+        self.env["TP_FAKE_PROPS"] = "\n".join(f"[{k}]: [{v}]" for k, v in sorted(props.items()))
+
+    def _shell(self, serial, command, timeout=10):
+        self.round_trips += 1
+        time.sleep(self.rtt)
+        result = subprocess.run(["sh", "-c", PRELUDE + command], capture_output=True, text=True,
+                                encoding="utf-8", errors="replace", env=self.env, timeout=timeout)
+        return result.stdout.strip(), result.stderr.strip(), result.returncode
+
+    def get_devices(self):
+        return ["FAKE0001"]
@@ -1,2 +1,4 @@
 from .sidebar import Sidebar
 from .title_bar import TitleBar
+from .log_view import LogView
+from .metric_chart import MetricChart
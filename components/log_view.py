@@ -0,0 +1,310 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+
+from PySide6.QtWidgets import QTableView, QAbstractItemView, QApplication, QHeaderView, QStyledItemDelegate, QStyle
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QPointF, QRectF
+from PySide6.QtGui import QColor, QFont, QFontInfo, QFontMetricsF, QKeySequence
+
+from services.log_store import STAMP_LEN
+
+LEVEL_COLORS = {
+    "F": QColor("#FF5555"),
+    "E": QColor("#FF5555"),
+    "W": QColor("#FFB86C"),
+    "I": QColor("#8BE9FD"),
+    "D": QColor("#50FA7B"),
+}
+DEFAULT_COLOR = QColor("#DDD")
+HEADER_COLOR = QColor("#777") # Timestamp, pid, tid, source serial
+HIGHLIGHT_TEXT_COLOR = QColor("#111")
+# Resolved once: PySide6's short enum names (Qt.DisplayRole) cost a slow lookup on every use,
+# and data() / paint() run for every visible row on every repaint
+DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole
+TOOLTIP_ROLE = Qt.ItemDataRole.ToolTipRole
+FOREGROUND_ROLE = Qt.ItemDataRole.ForegroundRole
+STATE_SELECTED = QStyle.StateFlag.State_Selected
+# Constructs that break once a rule is wrapped into the shared alternation: global inline flags (only
+# allowed at the very start), and backreferences (\1, (?P=name), (?(1)...)) whose group numbers shift
+UNSHAREABLE_RE = re.compile(r"^\(\?[aiLmsux]+\)|\\[1-9]|\(\?P=|\(\?\(")
+
+
+class HighlightRules:
+    """
+    User highlight rules, e.g. [("timeout|ANR", "#FF79C6"), ("CarService", "#F1FA8C")],
+    compiled once into a single alternation so a message is scanned once
+    however many rules there are. Matching is case-insensitive; a pattern
+    that is not a valid regex, or that cannot share the alternation (inline
+    global flags, named groups, backreferences), matches as plain text
+    (like the filter box).
+    """
+    def __init__(self, rules=()):
+        rules = list(rules)
+        self._colors = [QColor(color) for _, color in rules]
+        patterns = []
+        for pattern, _ in rules:
+            try:
+                if re.compile(pattern).groupindex or UNSHAREABLE_RE.search(pattern.replace("\\\\", "")):
+                    pattern = re.escape(pattern)
+            except re.error:
+                pattern = re.escape(pattern)
+            patterns.append(pattern)
+        try:
+            self._compile(patterns)
+        except re.error: # Anything the checks above missed: fall back to plain text for every rule
+            self._compile([re.escape(pattern) for pattern, _ in rules])
+
+    def _compile(self, patterns):
+        parts, first_groups = [], []
+        group = 1
+        for pattern in patterns:
+            parts.append(f"({pattern})")
+            first_groups.append(group)
+            group += 1 + re.compile(pattern).groups
+        self.pattern = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        self._first_groups = first_groups
+
+    def __bool__(self):
+        return self.pattern is not None
+
+    def spans(self, text):
+        """:return: [(start, end, color)] of the matches in text, in order."""
+        spans = []
+        for match in self.pattern.finditer(text):
+            if match.end() > match.start():
+                # The last group that matched belongs to the alternative (rule) that matched
+                rule = bisect_right(self._first_groups, match.lastindex) - 1
+                spans.append((match.start(), match.end(), self._colors[rule]))
+        return spans
+
+
+class LogListModel(QAbstractListModel):
+    """
+    List model over a LogStore. Rows hold only sequence numbers (8 bytes each in
+    an array), the records themselves stay in the store, and rows whose record
+    was evicted from the ring buffer are dropped from the top.
+    """
+    COMPACT_THRESHOLD = 65536
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._rows = array("q")
+        self._head = 0 # Rows before this offset were removed
+        self.show_source = False # Prefix lines with the device they came from (several devices merged)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) - self._head
+
+    def data(self, index, role=DISPLAY_ROLE):
+        if not index.isValid():
+            return None
+        if role == DISPLAY_ROLE or role == TOOLTIP_ROLE:
+            record = self.record(index.row())
+            return self.text(record) if record else None
+        if role == FOREGROUND_ROLE:
+            record = self.record(index.row())
+            return LEVEL_COLORS.get(record.level, DEFAULT_COLOR) if record else None
+        return None
+
+    def record(self, row):
+        return self.store.get(self._rows[self._head + row])
+
+    def text(self, record):
+        if self.show_source and record.source:
+            return f"[{record.source}] {record.line}"
+        return record.line
+
+    def append(self, start_seq, count, visible=None):
+        """
+        Add rows for newly stored records.
+        :param visible: Indexes (relative to start_seq) that passed the filter, None = all.
+        """
+        first_seq = self.store.first_seq
+        if visible is None:
+            seqs = range(max(start_seq, first_seq), start_seq + count)
+        else:
+            seqs = [seq for seq in (start_seq + i for i in visible) if seq >= first_seq]
+        self._drop_evicted()
+        if not seqs:
+            return
+        row = self.rowCount()
+        self.beginInsertRows(QModelIndex(), row, row + len(seqs) - 1)
+        self._rows.extend(seqs)
+        self.endInsertRows()
+
+    def prepend(self, seqs):
+        """Add older rows (e.g. a re-filter chunk); every seq must precede the current rows."""
+        first_seq = self.store.first_seq
+        if seqs and seqs[0] < first_seq:
+            seqs = seqs[bisect_left(seqs, first_seq):]
+        if not seqs:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(seqs) - 1)
+        self._rows = array("q", seqs) + self._rows[self._head:]
+        self._head = 0
+        self.endInsertRows()
+
+    def _drop_evicted(self):
+        gone = bisect_left(self._rows, self.store.first_seq, self._head) - self._head
+        if gone <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), 0, gone - 1)
+        self._head += gone
+        self.endRemoveRows()
+        if self._head >= self.COMPACT_THRESHOLD and self._head * 2 >= len(self._rows):
+            # Row numbers are relative to _head, so compacting is invisible to views
+            del self._rows[:self._head]
+            self._head = 0
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = array("q")
+        self._head = 0
+        self.endResetModel()
+
+
+class LogLineDelegate(QStyledItemDelegate):
+    """
+    Paints a row straight from its LogRecord: the header (time, pid, tid)
+    dimmed, level and tag in the level color from the parsed level and
+    message offset, and the message with any HighlightRules matches. Colors
+    and font metrics are cached, so a repaint only slices the visible lines;
+    nothing is regex-scanned unless highlight rules are set. With a fixed-pitch
+    font, ASCII segments are measured as length x character width.
+    """
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.rules = HighlightRules()
+        self._font = None
+        self._metrics = None
+        self._char_width = None # Advance of one character, None unless the font is fixed-pitch
+
+    def segments(self, record):
+        """:return: [(text, color, highlighted)] making up the row, left to right."""
+        line, msg_start = record.line, record.msg_start
+        color = LEVEL_COLORS.get(record.level, DEFAULT_COLOR)
+        segments = []
+        if self.model.show_source and record.source:
+            segments.append((f"[{record.source}] ", HEADER_COLOR, False))
+        if msg_start:
+            # The level letter is the first of its kind after the stamp in both -v threadtime and -v time
+            level_at = line.find(record.level, STAMP_LEN, msg_start)
+            if level_at > 0:
+                segments.append((line[:level_at], HEADER_COLOR, False))
+            segments.append((line[max(level_at, 0):msg_start], color, False))
+        if not self.rules:
+            segments.append((line[msg_start:], color, False))
+            return segments
+        message = line[msg_start:]
+        at = 0
+        for start, end, highlight in self.rules.spans(message):
+            if start > at:
+                segments.append((message[at:start], color, False))
+            segments.append((message[start:end], highlight, True))
+            at = end
+        if at < len(message):
+            segments.append((message[at:], color, False))
+        return segments
+
+    def paint(self, painter, option, index):
+        record = self.model.record(index.row())
+        rect = option.rect
+        if option.state & STATE_SELECTED:
+            painter.fillRect(rect, option.palette.highlight())
+        if record is None:
+            return
+        if option.font != self._font:
+            self._font = QFont(option.font)
+            self._metrics = QFontMetricsF(self._font)
+            self._char_width = self._metrics.horizontalAdvance("M") if QFontInfo(self._font).fixedPitch() else None
+        metrics = self._metrics
+        char_width = self._char_width
+        painter.save()
+        painter.setClipRect(rect)
+        painter.setFont(self._font)
+        x = rect.x() + 3.0
+        right = rect.right()
+        baseline = rect.y() + (rect.height() - metrics.height()) / 2 + metrics.ascent()
+        for text, color, highlighted in self.segments(record):
+            width = len(text) * char_width if char_width and text.isascii() else metrics.horizontalAdvance(text)
+            if highlighted:
+                painter.fillRect(QRectF(x, rect.y(), width, rect.height()), color)
+                color = HIGHLIGHT_TEXT_COLOR
+            painter.setPen(color)
+            painter.drawText(QPointF(x, baseline), text)
+            x += width
+            if x > right:
+                break
+        painter.restore()
+
+
+class LogView(QTableView):
+    """
+    Virtualized log viewer: only the visible rows are ever painted, so a
+    million retained lines scroll like a hundred. Follows the tail while
+    scrolled to the bottom; Ctrl+C copies the selected lines.
+
+    A single-column QTableView with fixed row heights rather than a QListView:
+    QListView re-lays out every row on each insert (O(n) per batch), while the
+    table's header maps rows to pixels arithmetically.
+    """
+    ROW_HEIGHT = 16
+
+    def __init__(self, store, parent=None, highlight_rules=()):
+        """:param highlight_rules: [(regex, color)] painted over matching message text."""
+        super().__init__(parent)
+        self.log_model = LogListModel(store, self)
+        self.setModel(self.log_model)
+        self.line_delegate = LogLineDelegate(self.log_model, self)
+        self.line_delegate.rules = HighlightRules(highlight_rules)
+        self.setItemDelegate(self.line_delegate)
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        rows = self.verticalHeader()
+        rows.hide()
+        rows.setSectionResizeMode(QHeaderView.Fixed)
+        rows.setDefaultSectionSize(self.ROW_HEIGHT)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        font.setPixelSize(12)
+        self.setFont(font)
+        self.setStyleSheet("QTableView { background-color: #0F0F0F; color: #DDD; border: none; }")
+
+    def append(self, start_seq, count, visible=None):
+        bar = self.verticalScrollBar()
+        follow = bar.value() >= bar.maximum()
+        self.log_model.append(start_seq, count, visible)
+        if follow:
+            self.scrollToBottom()
+
+    def prepend(self, seqs):
+        bar = self.verticalScrollBar()
+        follow = bar.value() >= bar.maximum()
+        self.log_model.prepend(seqs)
+        if follow:
+            self.scrollToBottom()
+
+    def clear(self):
+        self.log_model.clear()
+
+    def set_highlight_rules(self, rules):
+        """:param rules: [(regex, color)], [] for none."""
+        self.line_delegate.rules = HighlightRules(rules)
+        self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+            records = (self.log_model.record(row) for row in rows)
+            QApplication.clipboard().setText("\n".join(self.log_model.text(record) for record in records if record))
+            return
+        super().keyPressEvent(event)
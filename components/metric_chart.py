@@ -0,0 +1,234 @@
+import time
+
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QTimer, QPointF, QRectF, Signal
+from PySide6.QtGui import QPainter, QColor, QPen, QFont, QPolygonF
+
+from core.config import CHART_FRAME_MS, CHART_DEFAULT_SPAN_S
+
+BACKGROUND = QColor("#111")
+GRID_COLOR = QColor("#2A2A2A")
+TEXT_COLOR = QColor("#888")
+TITLE_COLOR = QColor("#DDD")
+PALETTE = ["#40E0D0", "#FFB86C", "#FF79C6", "#50FA7B", "#BD93F9", "#F1FA8C", "#8BE9FD", "#FF5555"]
+MIN_SPAN_S = 10
+
+
+class MetricChart(QWidget):
+    """
+    Live line chart over a MetricsStore, drawn with QPainter.
+
+    Each frame asks the store for one min/max pair per pixel column of the
+    visible window, so drawing costs the same with a minute or a day of
+    history. New samples only mark the chart dirty; it repaints at most
+    once per CHART_FRAME_MS. Wheel zooms around the cursor, dragging pans
+    back through the session, double-click returns to the live tail.
+    """
+    range_changed = Signal(float, float, bool) # start, end (epoch s), following live; to link charts
+
+    LEFT, RIGHT, TOP, BOTTOM = 52, 10, 22, 18
+
+    def __init__(self, store, title, unit="", scale=1.0, y_range=None, parent=None):
+        """
+        :param unit: Shown after the axis values.
+        :param scale: Applied to stored values for display (e.g. 1 / 1024 for kB -> MB).
+        :param y_range: Fixed (min, max), None to fit the visible data.
+        """
+        super().__init__(parent)
+        self.store = store
+        self.title = title
+        self.unit = unit
+        self.scale = scale
+        self.y_range = y_range
+        self.series = [] # [(serial, metric, label, QColor)]
+        self.span = CHART_DEFAULT_SPAN_S
+        self.end = None # None = follow the live tail
+        self.paint_ms = 0.0 # Cost of the last repaint, for the benchmark
+        self._dirty = True
+        self._drag = None
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        font.setPixelSize(10)
+        self.setFont(font)
+        self.setMinimumHeight(150)
+        self.setCursor(Qt.OpenHandCursor)
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setInterval(CHART_FRAME_MS)
+        self._frame_timer.timeout.connect(self._on_frame)
+        self._frame_timer.start()
+
+    def set_series(self, series):
+        """:param series: [(serial, metric, label)] or with a 4th color item; colors default to the palette."""
+        self.series = [(entry[0], entry[1], entry[2], QColor(entry[3] if len(entry) > 3 else PALETTE[i % len(PALETTE)]))
+                       for i, entry in enumerate(series)]
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        """New data or a new view; picked up by the next frame."""
+        self._dirty = True
+
+    def _on_frame(self):
+        if self._dirty and self.isVisible():
+            self._dirty = False
+            self.update()
+
+    # --- View range ---
+    def _session(self):
+        """(first, last) epoch seconds of the data of the shown series, None if there is none."""
+        firsts, lasts = [], []
+        for serial, metric, _, _ in self.series:
+            series = self.store.series(serial, metric)
+            if series is not None and series.last_time is not None:
+                firsts.append(series.first_time)
+                lasts.append(series.last_time)
+        return (min(firsts) / 1000, max(lasts) / 1000) if firsts else None
+
+    def visible_range(self):
+        end = time.time() if self.end is None else self.end
+        return end - self.span, end
+
+    def set_range(self, start, end, live):
+        span = max(MIN_SPAN_S, end - start)
+        if (span, None if live else end) != (self.span, self.end):
+            self.span, self.end = span, None if live else end
+            self.mark_dirty()
+
+    def _change_range(self, start, end):
+        session = self._session()
+        now = time.time()
+        if session:
+            # Not past the first sample on the left, never into the future on the right
+            span = min(max(MIN_SPAN_S, end - start), max(MIN_SPAN_S, now - session[0]))
+            end = min(now, max(end, session[0] + span))
+            start = end - span
+        live = end >= now - 0.5
+        self.set_range(start, end, live)
+        self.range_changed.emit(start, end, live)
+
+    def _plot_rect(self):
+        return QRectF(self.LEFT, self.TOP, max(1, self.width() - self.LEFT - self.RIGHT),
+                      max(1, self.height() - self.TOP - self.BOTTOM))
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+        plot = self._plot_rect()
+        start, end = self.visible_range()
+        anchor = min(1.0, max(0.0, (event.position().x() - plot.left()) / plot.width()))
+        at = start + anchor * (end - start) # Time under the cursor stays put
+        span = (end - start) * 0.8 ** steps
+        self._change_range(at - anchor * span, at + (1 - anchor) * span)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag = (event.position().x(), *self.visible_range())
+            self.setCursor(Qt.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        if self._drag:
+            x, start, end = self._drag
+            shift = (x - event.position().x()) / self._plot_rect().width() * (end - start)
+            self._change_range(start + shift, end + shift)
+
+    def mouseReleaseEvent(self, event):
+        self._drag = None
+        self.setCursor(Qt.OpenHandCursor)
+
+    def mouseDoubleClickEvent(self, event):
+        now = time.time()
+        self._change_range(now - CHART_DEFAULT_SPAN_S, now)
+
+    # --- Drawing ---
+    def paintEvent(self, event):
+        begin = time.perf_counter()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), BACKGROUND)
+        plot = self._plot_rect()
+        start, end = self.visible_range()
+        columns = int(plot.width())
+
+        lines = [] # (color, label, times, mins, maxs)
+        lo, hi = np.inf, -np.inf
+        for serial, metric, label, color in self.series:
+            data = self.store.downsample(serial, metric, start, end, columns)
+            if data is None or not len(data[0]):
+                lines.append((color, label, None, None, None))
+                continue
+            times, mins, maxs = data
+            mins, maxs = mins * self.scale, maxs * self.scale
+            lo, hi = min(lo, float(mins.min())), max(hi, float(maxs.max()))
+            lines.append((color, label, times, mins, maxs))
+        if self.y_range:
+            lo, hi = self.y_range
+        elif lo > hi: # No data
+            lo, hi = 0.0, 1.0
+        else:
+            pad = (hi - lo) * 0.1 or max(1.0, abs(hi) * 0.1)
+            lo, hi = (lo - pad if lo < 0 else max(0.0, lo - pad)), hi + pad # Counts and % never dip below 0
+
+        self._draw_axes(painter, plot, start, end, lo, hi)
+        painter.setRenderHint(QPainter.Antialiasing, False) # Pixel-column data; AA only blurs it
+        painter.setClipRect(plot)
+        x_scale = plot.width() / (end - start) / 1000
+        y_scale = plot.height() / (hi - lo)
+        for color, _, times, mins, maxs in lines:
+            if times is None:
+                continue
+            pen = QPen(color, 1)
+            pen.setCosmetic(True) # Hairline rasterizer; a wider pen strokes the zig-zag as a path, ~100x slower
+            painter.setPen(pen)
+            xs = plot.left() + (times - start * 1000) * x_scale
+            # min then max of each column: the polyline covers the column's full range
+            points = np.empty((len(times) * 2, 2))
+            points[0::2, 0] = points[1::2, 0] = xs
+            points[0::2, 1] = plot.bottom() - (mins - lo) * y_scale
+            points[1::2, 1] = plot.bottom() - (maxs - lo) * y_scale
+            # Break the line over gaps (monitoring stopped), wider than a few columns
+            gap = max(5000, 3 * (end - start) * 1000 / max(1, columns))
+            cuts = (np.flatnonzero(np.diff(times) > gap) + 1) * 2
+            for part in np.split(points, cuts):
+                painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in part.tolist()]))
+        painter.setClipping(False)
+        self._draw_legend(painter, lines)
+        painter.end()
+        self.paint_ms = (time.perf_counter() - begin) * 1000
+
+    def _format(self, value):
+        return f"{value:.0f}" if abs(value) >= 100 else f"{value:.1f}"
+
+    def _draw_axes(self, painter, plot, start, end, lo, hi):
+        metrics = painter.fontMetrics()
+        painter.setPen(GRID_COLOR)
+        painter.drawRect(plot)
+        for i in range(1, 4):
+            y = plot.top() + plot.height() * i / 4
+            painter.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+        painter.setPen(TEXT_COLOR)
+        for i in range(5):
+            value = hi - (hi - lo) * i / 4
+            y = plot.top() + plot.height() * i / 4
+            text = self._format(value)
+            painter.drawText(QPointF(plot.left() - 4 - metrics.horizontalAdvance(text), y + metrics.ascent() / 2), text)
+        time_format = "%H:%M:%S" if end - start < 86400 else "%m-%d %H:%M"
+        for fraction in (0.0, 0.5, 1.0):
+            text = time.strftime(time_format, time.localtime(start + (end - start) * fraction))
+            width = metrics.horizontalAdvance(text)
+            x = plot.left() + plot.width() * fraction - width * fraction
+            painter.drawText(QPointF(x, plot.bottom() + metrics.ascent() + 3), text)
+        painter.setPen(TITLE_COLOR)
+        title = f"{self.title} ({self.unit})" if self.unit else self.title
+        if self.end is not None:
+            title += "  [paused - double-click for live]"
+        painter.drawText(QPointF(4, metrics.ascent() + 4), title)
+
+    def _draw_legend(self, painter, lines):
+        metrics = painter.fontMetrics()
+        x = self.width() - self.RIGHT
+        for color, label, _, _, maxs in reversed(lines):
+            text = label if maxs is None else f"{label} {self._format(float(maxs[-1]))}"
+            x -= metrics.horizontalAdvance(text) + 14
+            painter.fillRect(QRectF(x, 8, 8, 8), color)
+            painter.setPen(TITLE_COLOR if maxs is not None else TEXT_COLOR)
+            painter.drawText(QPointF(x + 11, metrics.ascent() + 4), text)
@@ -18,6 +18,7 @@ class AdbCommands:
     # Runtime
     BOOT_COMPLETED = "getprop sys.boot_completed"
     UPTIME = "uptime -p"
+    MEM_TOTAL = "grep MemTotal /proc/meminfo"
     
     # Security
     SELINUX = "getenforce"
@@ -94,8 +95,11 @@ class AdbCommands:
     IGNITION_ON = "cmd car_service inject-vhal-event 0x11400400 4" 
     IGNITION_OFF = "cmd car_service inject-vhal-event 0x11400400 1"
 
+    # Property dumps, split so the read-only half can be cached for the whole boot
+    RO_PROPS = "getprop | grep '^\\[ro\\.'"
+    RUNTIME_PROPS = "getprop | grep -v '^\\[ro\\.'"
+
     @staticmethod
     def get_all_props_command():
-        # Optimization: Fetch all props at once and parse? 
-        # Or Just batch common ones.
+        # Fetch all props at once; parsed by DeviceInfoGatherer.parse_props
         return "getprop"
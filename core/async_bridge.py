@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+from core.worker import WorkerSignals
+
+
+class AsyncBridge:
+    """
+    Runs a single asyncio event loop in a background thread and hands results
+    back to Qt. Callbacks are connected to WorkerSignals (same signals as Worker),
+    so they run on the thread that called start(), normally the GUI thread.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._pending = set() # Keep signal objects alive until delivery
+        self._thread = threading.Thread(target=self._run_loop, name="AsyncBridge", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule a coroutine; returns a concurrent.futures.Future (blocking-friendly)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def start(self, coro, on_result=None, on_error=None, on_finished=None):
+        """
+        Schedule a coroutine and deliver its outcome through Qt signals.
+        :return: concurrent.futures.Future, e.g. for cancel().
+        """
+        signals = self._connect(on_result, on_error, on_finished)
+
+        async def runner():
+            try:
+                signals.result.emit(await coro)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                import traceback
+                signals.error.emit((e, traceback.format_exc()))
+            finally:
+                signals.finished.emit()
+                self._pending.discard(signals)
+        return self.submit(runner())
+
+    def start_stream(self, agen, on_item, on_error=None, on_finished=None):
+        """
+        Consume an async generator (e.g. AsyncAdbWrapper.logcat) on the loop,
+        emitting every item through the result signal.
+        """
+        async def consume():
+            async for item in agen:
+                signals.result.emit(item)
+
+        signals = self._connect(on_item, on_error, on_finished)
+
+        async def runner():
+            try:
+                await consume()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                import traceback
+                signals.error.emit((e, traceback.format_exc()))
+            finally:
+                signals.finished.emit()
+                self._pending.discard(signals)
+        return self.submit(runner())
+
+    def _connect(self, on_result, on_error, on_finished):
+        signals = WorkerSignals()
+        if on_result:
+            signals.result.connect(on_result)
+        if on_error:
+            signals.error.connect(on_error)
+        if on_finished:
+            signals.finished.connect(on_finished)
+        self._pending.add(signals)
+        return signals
+
+    def shutdown(self):
+        """Cancel outstanding tasks and stop the loop thread."""
+        def stop():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(stop)
+        self._thread.join(2)
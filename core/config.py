@@ -12,3 +12,55 @@ ACCENT_RED = "#FF5555"
 # Automation Config
 DEFAULT_REPORTS_DIR = "automation/reports"
 DEFAULT_TEST_DIR = "automation/tests"
+
+# ADB Transport
+ADB_TRANSPORT_MODE = "auto" # "socket" (adb server host protocol), "cli" (adb subprocess) or "auto" (socket, CLI fallback)
+ADB_SERVER_HOST = "127.0.0.1"
+ADB_SERVER_PORT = 5037
+ADB_PERSISTENT_SHELL = True # Reuse long-lived shell sessions instead of one `adb shell` per command
+ADB_SHELL_SESSIONS_PER_DEVICE = 3 # One per CommandScheduler lane
+ADB_QUERY_CACHE = True # Serve boot-constant queries (ro.* props, wm size, package lists) from QueryCache
+ADB_STREAM_CHUNK_SIZE = 256 * 1024 # Receive buffer for exec-out streams (screencap, screenrecord, dumps)
+SCREENSHOT_MODE = "raw" # "raw": framebuffer streamed and PNG-encoded on the host, "png": encoded by screencap -p on the device
+BURST_FORMAT = "png" # Burst frames are encoded on the host: "png" or "webp"
+BURST_MAX_SECONDS = 30
+
+# Logcat
+LOGCAT_BATCH_INTERVAL_MS = 50 # Max delay before buffered lines are delivered to the UI
+LOGCAT_BATCH_MAX_LINES = 1000 # ...or as soon as this many lines are buffered
+LOGCAT_READ_CHUNK = 64 * 1024
+LOGCAT_BINARY = False # Ingest `logcat -B` entries (no text parsing, multi-line messages stay whole)
+LOGCAT_DEVICE_FILTER = True # Push level/tag/pid/message filters down to logcat on the device
+LOGCAT_STREAM_QUEUE_CHUNKS = 64 # Decoded read chunks queued per stream (<= LOGCAT_READ_CHUNK each) before its reader blocks
+LOGCAT_MERGE_WINDOW_MS = 300 # With several streams: how long a quiet one may hold the others back
+LOGCAT_MERGE_MAX_HOLD_MS = 2000 # ...and the longest any record waits for the others
+# Extra highlighting in the log views: (regex, color) painted over matching message text, e.g.
+# [("timeout|not responding", "#FF79C6"), ("CarService", "#F1FA8C")]. Case-insensitive; invalid regexes match literally
+LOG_HIGHLIGHT_RULES = []
+LOG_STORE_CAPACITY = 500_000 # Lines kept for the Live Logcat view and saving (~350 B each); oldest dropped first
+LOG_ARCHIVE_ENABLED = True # Keep every received line in the searchable on-disk archive
+LOG_ARCHIVE_DIR = "logs/archive"
+LOG_ARCHIVE_TEXT_INDEX = True # Trigram index so text searches skip segments without the words
+LOG_ARCHIVE_MAX_BYTES = 2 * 1024 ** 3 # Compressed; oldest hours are dropped beyond this
+FAULT_PRE_CONTEXT_LINES = 200 # Log lines saved from before a detected crash/ANR/...
+FAULT_POST_CONTEXT_LINES = 100 # ...and after it
+FAULT_POST_SECONDS = 3.0 # Stop waiting for post-context lines after this
+FAULT_DIR = "logs/faults"
+FAULT_INDEX_PATH = "logs/faults/index.db" # Crash signatures with counts, builds and devices
+FAULT_SIGNATURE_FRAMES = 5 # Top stack frames that tell two crashes apart
+FAULT_SAMPLES_PER_SIGNATURE = 3 # Fault logs kept per signature; later repeats only bump its count
+SELINUX_CAPTURE_INTERVAL_S = 60 # Denials come in storms: at most one log + screenshot per device this often
+
+# Performance Monitoring
+PERF_SAMPLE_INTERVAL_MS = 100 # System metrics (/proc) sample period; one adb round trip each
+PERF_DETAIL_INTERVAL_S = 10 # Service list and `dumpsys meminfo -c` (heavy on the device) period
+METRICS_RAW_SECONDS = 3600 # Samples kept at full resolution per metric (~430 KB per metric at 10 Hz)
+METRICS_HISTORY_HOURS = 24 # ...and min/max/mean rollups for this long before that
+METRICS_ROLLUP_MS = 5000 # Rollup bucket width
+PROC_SAMPLE_PACKAGES = [] # Packages sampled per process while monitoring (also set from the Monitoring tab)
+PROC_PSS_INTERVAL_MS = 1000 # smaps_rollup (PSS) period; the kernel walks the whole address space for it
+PROC_RESOLVE_INTERVAL_S = 5 # Re-run ps for new processes of the targets (exits are noticed every sample)
+MEMINFO_HISTORY_SAMPLES = 360 # Per process, one per PERF_DETAIL_INTERVAL_S (1 h at 10 s)
+MEMINFO_GROWTH_MIN_KB = 5120 # PSS rise (on one pid, steadily) before a process is listed as growing
+CHART_FRAME_MS = 100 # Monitoring charts repaint at most this often, however fast samples arrive
+CHART_DEFAULT_SPAN_S = 300 # Window the charts show when following the live tail
@@ -7,8 +7,9 @@ class EventBus(QObject):
     """
     # Define generic signals here or use dynamic dispatch
     # For robust typing, we define common signals
-    device_connected = Signal(str) # device_id
-    device_disconnected = Signal(str)
+    device_connected = Signal(str) # device_id, ready for shell/logcat (state "device")
+    device_disconnected = Signal(str) # device_id, no longer ready (removed, or left the "device" state)
+    device_state_changed = Signal(str, str) # device_id, any other state (offline, unauthorized, recovery...)
     log_message = Signal(str, str) # level, message
     command_requested = Signal(str, dict) # command_name, params
 
@@ -26,6 +27,15 @@ class AppContext(QObject):
         self.thread_pool = QThreadPool.globalInstance()
         self.active_windows = []
         self.services = {}
+        self._async_bridge = None
+
+    @property
+    def async_bridge(self):
+        """Shared asyncio loop thread (created on first use) for AsyncAdbWrapper work."""
+        if self._async_bridge is None:
+            from core.async_bridge import AsyncBridge
+            self._async_bridge = AsyncBridge()
+        return self._async_bridge
 
     def register_service(self, name, service):
         self.services[name] = service
@@ -27,7 +27,8 @@ def main():
         ctx.register_service("remote_control", RemoteControlService())
         
         from services.stability_service import StabilityService
-        ctx.register_service("stability", StabilityService(ctx.get_service("device_manager").adb))
+        device_manager = ctx.get_service("device_manager")
+        ctx.register_service("stability", StabilityService(device_manager.adb, device_manager.scheduler))
         
         # Window Manager handling the UI scaling
         wm = WindowManager(MainWindow)
@@ -35,6 +36,9 @@ def main():
         print("Launching Main Window...")
         main_win = wm.new_window()
         
+        app.aboutToQuit.connect(ctx.get_service("device_manager").shutdown)
+        app.aboutToQuit.connect(ctx.get_service("tool_service").shutdown)
+        
         # Crash Handling / Exception Hook
         sys.excepthook = handle_exception
         
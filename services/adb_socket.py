@@ -0,0 +1,378 @@
+import os
+import socket
+import struct
+import threading
+import time
+
+from core.config import ADB_SERVER_HOST, ADB_SERVER_PORT
+
+# shell v2 packet ids (see adb/shell_protocol.h)
+SHELL_ID_STDIN = 0
+SHELL_ID_STDOUT = 1
+SHELL_ID_STDERR = 2
+SHELL_ID_EXIT = 3
+SHELL_ID_CLOSE_STDIN = 4
+
+SYNC_DATA_MAX = 64 * 1024
+# Appended to legacy shell: commands, which carry no exit status, to recover it from the output
+LEGACY_EXIT_MARK = b"__TP_RC_"
+
+
+class AdbProtocolError(Exception):
+    """Raised when the adb server answers a request with FAIL or garbage."""
+
+
+def encode_request(request):
+    """Frame a host request as <4 hex digit length><payload>."""
+    payload = request.encode("utf-8")
+    return b"%04x" % len(payload) + payload
+
+
+def recv_exact(sock, size):
+    """Read exactly `size` bytes or raise ConnectionError on early EOF."""
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = sock.recv_into(view[got:], size - got)
+        if n == 0:
+            raise ConnectionError("adb server closed the connection")
+        got += n
+    return bytes(buf)
+
+
+def read_status(sock):
+    """Consume an OKAY/FAIL status, raising AdbProtocolError on FAIL."""
+    status = recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        raise AdbProtocolError(read_length_prefixed(sock).decode("utf-8", "replace"))
+    raise AdbProtocolError(f"Unexpected adb status: {status!r}")
+
+
+def read_length_prefixed(sock):
+    """Read a <4 hex digit length><payload> host response."""
+    length = int(recv_exact(sock, 4), 16)
+    return recv_exact(sock, length) if length else b""
+
+
+def read_until_close(sock):
+    """Drain a raw stream until the server closes it."""
+    chunks = []
+    while True:
+        chunk = sock.recv(SYNC_DATA_MAX)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def read_shell_v2(sock):
+    """
+    Demultiplex a shell v2 stream into (stdout, stderr, exit_code).
+    Each packet is <1 byte id><4 byte LE length><data>.
+    """
+    out, err = [], []
+    code = -1
+    while True:
+        try:
+            header = recv_exact(sock, 5)
+        except ConnectionError:
+            # Device went away mid-command: keep what we got, report failure
+            break
+        packet_id, length = struct.unpack("<BI", header)
+        data = recv_exact(sock, length) if length else b""
+        if packet_id == SHELL_ID_STDOUT:
+            out.append(data)
+        elif packet_id == SHELL_ID_STDERR:
+            err.append(data)
+        elif packet_id == SHELL_ID_EXIT:
+            code = data[0] if data else 0
+            break
+    return b"".join(out), b"".join(err), code
+
+
+class AdbSocketClient:
+    """
+    Talks to the local adb server over its smart-socket host protocol
+    (host:devices, host:transport:<serial>, shell:, exec:, sync:) instead of
+    forking an `adb` client per command.
+
+    The server consumes a connection per request, so the "pool" keeps a few
+    pre-connected idle sockets ready: a command only pays for the request
+    round trip, never for the TCP handshake or a process start. Used sockets
+    are replaced by a background thread, off the caller's path.
+    """
+    def __init__(self, host=None, port=None, pool_size=4, timeout=10):
+        """
+        :param host: adb server host. Defaults to config ADB_SERVER_HOST.
+        :param port: adb server port. Honors ANDROID_ADB_SERVER_PORT like adb itself.
+        :param pool_size: Number of warm idle connections kept around.
+        """
+        self.host = host or ADB_SERVER_HOST
+        self.port = port or int(os.environ.get("ANDROID_ADB_SERVER_PORT", ADB_SERVER_PORT))
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._refill_wanted = threading.Event()
+        self._refiller = None
+        self._features = {}
+
+    # --- Connection Pool ---
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _checkout(self, timeout, fresh=False):
+        """
+        Take a warm connection from the pool, or open a fresh one.
+        :return: (socket, whether it came from the pool)
+        """
+        sock = None
+        if not fresh:
+            with self._lock:
+                if self._idle:
+                    sock = self._idle.pop()
+        pooled = sock is not None
+        if sock is None:
+            try:
+                sock = self._connect()
+            except OSError:
+                self._forget_server() # Server down; whatever runs next may be a different one
+                raise
+        sock.settimeout(timeout)
+        return sock, pooled
+
+    def _schedule_refill(self):
+        """Top the pool back up in the background so the next request finds a warm socket."""
+        with self._lock:
+            if len(self._idle) >= self.pool_size:
+                return
+            if self._refiller is None:
+                self._refiller = threading.Thread(target=self._refill_loop, name="AdbSocketRefill", daemon=True)
+                self._refiller.start()
+        self._refill_wanted.set()
+
+    def _refill_loop(self):
+        while True:
+            self._refill_wanted.wait()
+            self._refill_wanted.clear()
+            while True:
+                with self._lock:
+                    if len(self._idle) >= self.pool_size:
+                        break
+                try:
+                    sock = self._connect()
+                except OSError:
+                    break # Server down; the next checkout asks again
+                with self._lock:
+                    self._idle.append(sock)
+
+    def _forget_server(self):
+        """The server restarted (or is gone): its pooled connections are stale and device features may differ."""
+        self._features.clear()
+        self.close()
+
+    def forget(self, serial):
+        """Drop what is cached about a device (call when it disconnects)."""
+        self._features.pop(serial, None)
+
+    def close(self):
+        """Drop all idle pooled connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for sock in idle:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def open(self, request, serial=None, timeout=None):
+        """
+        Open a service stream. When `serial` is given the connection is first
+        switched to that device with host:transport:<serial>.
+        The caller owns (and must close) the returned socket.
+        """
+        timeout = timeout or self.timeout
+        # A pooled socket is stale if the server restarted: drop the pool, retry once on a new connection
+        for attempt in range(2):
+            sock, pooled = self._checkout(timeout, fresh=attempt > 0)
+            try:
+                if serial:
+                    sock.sendall(encode_request(f"host:transport:{serial}"))
+                    read_status(sock)
+                sock.sendall(encode_request(request))
+                read_status(sock)
+                # Replace it once the request is through, so the new connect never delays this one
+                self._schedule_refill()
+                return sock
+            except (ConnectionError, BrokenPipeError, ConnectionResetError):
+                sock.close()
+                if pooled:
+                    self._forget_server()
+                if attempt:
+                    raise
+            except Exception:
+                sock.close()
+                raise
+
+    # --- Host Services ---
+    def host_query(self, request, timeout=None):
+        """Run a host:* query and return its length-prefixed payload as text."""
+        sock = self.open(request, timeout=timeout)
+        try:
+            return read_length_prefixed(sock).decode("utf-8", "replace")
+        finally:
+            sock.close()
+
+    def devices(self):
+        """Same text as `adb devices` minus the header line."""
+        return self.host_query("host:devices")
+
+    def features(self, serial):
+        """Cached device feature list (shell_v2, cmd, abb_exec, ...)."""
+        if serial not in self._features:
+            try:
+                payload = self.host_query(f"host-serial:{serial}:features")
+                self._features[serial] = set(payload.strip().split(","))
+            except (AdbProtocolError, OSError):
+                self._features[serial] = set()
+        return self._features[serial]
+
+    # --- Device Services ---
+    def shell(self, serial, command, timeout=None):
+        """
+        Run a shell command. Uses shell v2 (separate stderr + exit code) when the
+        device supports it, otherwise legacy shell: with a best effort exit code.
+        :return: (stdout_bytes, stderr_bytes, return_code); on legacy shell: stderr is merged into stdout,
+            and the code is -1 when the command left no status (e.g. it ran `exit`)
+        """
+        if "shell_v2" in self.features(serial):
+            sock = self.open(f"shell,v2,raw:{command}", serial, timeout)
+            try:
+                return read_shell_v2(sock)
+            finally:
+                sock.close()
+        # Own line, so a trailing comment in the command cannot swallow the status echo
+        sock = self.open(f"shell:{command}\necho {LEGACY_EXIT_MARK.decode()}$?", serial, timeout)
+        try:
+            out = read_until_close(sock)
+        finally:
+            sock.close()
+        head, mark, status = out.rpartition(LEGACY_EXIT_MARK)
+        status = status.strip() # The legacy pty turns \n into \r\n
+        if mark and status.isdigit():
+            return head, b"", int(status)
+        return out, b"", -1
+
+    def exec_out(self, serial, command, timeout=None):
+        """Run `exec:` (no pty, no newline mangling) and return raw stdout."""
+        sock = self.open(f"exec:{command}", serial, timeout)
+        try:
+            return read_until_close(sock)
+        finally:
+            sock.close()
+
+    def exec_out_into(self, serial, command, size_hint=SYNC_DATA_MAX, timeout=None):
+        """
+        Like exec_out() but receives straight into one growing bytearray
+        (no per-chunk bytes objects, no final join).
+        :return: bytearray with the complete stdout.
+        """
+        sock = self.open(f"exec:{command}", serial, timeout)
+        buf = bytearray(max(size_hint, 1))
+        got = 0
+        try:
+            while True:
+                if got == len(buf):
+                    buf.extend(bytes(len(buf))) # Double the capacity
+                n = sock.recv_into(memoryview(buf)[got:])
+                if n == 0:
+                    break
+                got += n
+        finally:
+            sock.close()
+        del buf[got:]
+        return buf
+
+    def exec_stream(self, serial, command, chunk_size=SYNC_DATA_MAX, timeout=None):
+        """
+        Stream `exec:` stdout as memoryview chunks of one reused buffer.
+        The stream is opened right away (errors surface here, not on first read).
+        A chunk is only valid until the next one is requested; copy it if it must be kept.
+        Closing the generator closes the stream (and the device-side process).
+        """
+        sock = self.open(f"exec:{command}", serial, timeout)
+        return self._iter_chunks(sock, chunk_size)
+
+    @staticmethod
+    def _iter_chunks(sock, chunk_size):
+        buf = bytearray(chunk_size)
+        view = memoryview(buf)
+        try:
+            while True:
+                n = sock.recv_into(view)
+                if n == 0:
+                    return
+                yield view[:n]
+        finally:
+            sock.close()
+
+    def simple_service(self, serial, service, timeout=None):
+        """Fire a one-shot device service such as reboot: or root:."""
+        sock = self.open(service, serial, timeout)
+        try:
+            return read_until_close(sock).decode("utf-8", "replace")
+        finally:
+            sock.close()
+
+    # --- Sync Service (file transfer) ---
+    def pull(self, serial, remote, local, timeout=None):
+        """Download `remote` into `local` over the sync: service. Returns bytes written."""
+        sock = self.open("sync:", serial, timeout)
+        total = 0
+        started = time.time()
+        try:
+            path = remote.encode("utf-8")
+            sock.sendall(b"RECV" + struct.pack("<I", len(path)) + path)
+            with open(local, "wb") as f:
+                while True:
+                    tag, length = struct.unpack("<4sI", recv_exact(sock, 8))
+                    if tag == b"DATA":
+                        f.write(recv_exact(sock, length))
+                        total += length
+                    elif tag == b"DONE":
+                        break
+                    elif tag == b"FAIL":
+                        raise AdbProtocolError(recv_exact(sock, length).decode("utf-8", "replace"))
+                    else:
+                        raise AdbProtocolError(f"Unexpected sync tag: {tag!r}")
+            sock.sendall(b"QUIT" + struct.pack("<I", 0))
+        finally:
+            sock.close()
+        return total, time.time() - started
+
+    def push(self, serial, local, remote, mode=0o644, timeout=None):
+        """Upload `local` to `remote` over the sync: service. Returns bytes sent."""
+        sock = self.open("sync:", serial, timeout)
+        total = 0
+        try:
+            spec = f"{remote},{mode}".encode("utf-8")
+            sock.sendall(b"SEND" + struct.pack("<I", len(spec)) + spec)
+            with open(local, "rb") as f:
+                while True:
+                    chunk = f.read(SYNC_DATA_MAX)
+                    if not chunk:
+                        break
+                    sock.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                    total += len(chunk)
+            sock.sendall(b"DONE" + struct.pack("<I", int(time.time())))
+            tag, length = struct.unpack("<4sI", recv_exact(sock, 8))
+            if tag == b"FAIL":
+                raise AdbProtocolError(recv_exact(sock, length).decode("utf-8", "replace"))
+            sock.sendall(b"QUIT" + struct.pack("<I", 0))
+        finally:
+            sock.close()
+        return total
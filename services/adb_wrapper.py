@@ -1,24 +1,85 @@
 import subprocess
 import shutil
+import socket
 import sys
+import os
+import shlex
+import io
+import uuid
+from core.config import (ADB_TRANSPORT_MODE, ADB_PERSISTENT_SHELL, ADB_SHELL_SESSIONS_PER_DEVICE,
+                         ADB_QUERY_CACHE, ADB_STREAM_CHUNK_SIZE)
+from services.adb_socket import AdbSocketClient, AdbProtocolError
+from services.query_cache import QueryCache
+from services.shell_session import ShellSessionPool, build_batch_script, split_batch_output
+
+class _ExecOutReader(io.RawIOBase):
+    """Unbuffered binary reader over an exec-out stream (adb server socket or adb process)."""
+    def __init__(self, sock=None, proc=None):
+        super().__init__()
+        self._sock = sock
+        self._proc = proc
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._sock:
+            return self._sock.recv_into(buffer)
+        return self._proc.stdout.readinto(buffer)
+
+    def close(self):
+        """Safe to call from another thread: unblocks a pending readinto (which then sees EOF)."""
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+        elif self._proc and self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+        super().close()
 
 class AdbWrapper:
     """
     A robust wrapper around the Android Debug Bridge (ADB) CLI.
     Handles device communication, activity querying, and shell command execution
     with cross-platform safe encoding (UTF-8).
+
+    Two transports are available:
+    - "socket": speaks the adb server host protocol directly (no process per command).
+    - "cli": forks the adb executable for every command (legacy behaviour).
+    "auto" uses the socket and falls back to the CLI while the server is not reachable
+    (the CLI call also starts the server, so the next command goes over the socket).
+
+    With persistent shells enabled, shell() reuses long-lived per-device sessions
+    (see ShellSession) so repeated getprop/dumpsys/input calls pay setup only once.
+    Read-only queries that are constant for a boot (ro.* props, wm size, package
+    lists, ...) are answered from a QueryCache when enabled.
     """
-    def __init__(self, adb_path="adb"):
+    def __init__(self, adb_path="adb", mode=None, persistent_shell=None, query_cache=None):
         """
         Initialize the wrapper.
         :param adb_path: Path to the adb executable. Defaults to 'adb' from PATH.
+        :param mode: "auto", "socket" or "cli". Defaults to config ADB_TRANSPORT_MODE.
+        :param persistent_shell: Route shell() through ShellSessionPool. Defaults to config ADB_PERSISTENT_SHELL.
+        :param query_cache: Cache read-only queries. Defaults to config ADB_QUERY_CACHE.
         """
         self.adb_path = shutil.which(adb_path) or adb_path
+        self.mode = mode or ADB_TRANSPORT_MODE
+        self.socket_client = AdbSocketClient() if self.mode != "cli" else None
+        if persistent_shell is None:
+            persistent_shell = ADB_PERSISTENT_SHELL
+        self.sessions = ShellSessionPool(self, ADB_SHELL_SESSIONS_PER_DEVICE) if persistent_shell else None
+        if query_cache is None:
+            query_cache = ADB_QUERY_CACHE
+        self.cache = QueryCache(self) if query_cache else None
     
-    def _run(self, args, timeout=10):
+    def _run(self, args, timeout=10, binary=False):
         """
         Execution engine for all ADB commands.
         Uses subprocess.run with specific error handling for binary/weird outputs.
+        :param binary: Return stdout as raw bytes (stderr is still decoded).
         """
         try:
             cmd = [self.adb_path] + args
@@ -26,26 +87,53 @@ class AdbWrapper:
             # Windows specific: suppress console flash and improve stability in GUI
             kwargs = {
                 "capture_output": True,
-                "text": True,
                 "timeout": timeout,
-                "encoding": 'utf-8',
-                "errors": 'replace'
             }
+            if not binary:
+                kwargs.update(text=True, encoding='utf-8', errors='replace')
             if sys.platform == "win32":
-                import subprocess
                 kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
 
             result = subprocess.run(cmd, **kwargs)
+            if binary:
+                return result.stdout, result.stderr.decode("utf-8", "replace").strip(), result.returncode
             return result.stdout.strip(), result.stderr.strip(), result.returncode
         except Exception as e:
-            return "", str(e), -1
+            return (b"" if binary else ""), str(e), -1
+
+    def _dispatch(self, socket_call, cli_args, timeout=10, binary=False):
+        """
+        Route a command over the socket transport when enabled.
+        Only a refused connection falls back to the CLI (in "auto" mode), so a
+        command that already reached the device is never executed twice.
+        """
+        empty = b"" if binary else ""
+        if self.socket_client:
+            try:
+                return socket_call()
+            except AdbProtocolError as e:
+                return empty, str(e), 1
+            except ConnectionRefusedError as e:
+                if self.mode == "socket":
+                    return empty, str(e), -1
+            except Exception as e:
+                return empty, str(e), -1
+        return self._run(cli_args, timeout, binary)
+
+    @staticmethod
+    def _decode(out, err, code):
+        """Match the CLI path output: stripped UTF-8 text with replacement chars."""
+        return out.decode("utf-8", "replace").strip(), err.decode("utf-8", "replace").strip(), code
 
     def get_devices(self):
         """
         Fetch all currently connected Android devices.
         :return: List of serial strings (e.g., ['emulator-5554']).
         """
-        out, err, code = self._run(["devices"])
+        # host:devices has no "List of devices attached" header, re-add it for parsing
+        out, err, code = self._dispatch(
+            lambda: ("List of devices attached\n" + self.socket_client.devices(), "", 0),
+            ["devices"])
         if code != 0:
             return []
         
@@ -60,21 +148,169 @@ class AdbWrapper:
         """
         Download a file from the device to the local system.
         """
-        return self._run(["-s", serial, "pull", remote, local])
+        def via_socket():
+            size, elapsed = self.socket_client.pull(serial, remote, local, timeout=60)
+            return f"{remote}: 1 file pulled, {size} bytes in {elapsed:.3f}s", "", 0
+        return self._dispatch(via_socket, ["-s", serial, "pull", remote, local], timeout=60)
 
     def install(self, serial, apk_path):
         """
         Install an APK onto the target device.
         :param apk_path: Absolute path to the .apk file on host.
         """
-        return self._run(["-s", serial, "install", "-r", apk_path], timeout=60)
+        def via_socket():
+            # Same as legacy `adb install`: push to a temp path, then pm install
+            remote = f"/data/local/tmp/{os.path.basename(apk_path)}"
+            self.socket_client.push(serial, apk_path, remote, timeout=60)
+            result = self._decode(*self.socket_client.shell(serial, f"pm install -r {shlex.quote(remote)}", timeout=60))
+            self.socket_client.shell(serial, f"rm -f {shlex.quote(remote)}")
+            return result
+        result = self._dispatch(via_socket, ["-s", serial, "install", "-r", apk_path], timeout=60)
+        if self.cache:
+            self.cache.on_package_change(serial)
+        return result
         
-    def shell(self, serial, command):
+    def shell(self, serial, command, timeout=10):
         """
         Run a command in the device's shell.
+        Cacheable read-only queries may be answered without touching the device.
         :return: (stdout, stderr, return_code)
         """
-        return self._run(["-s", serial, "shell", command])
+        if self.cache:
+            self.cache.observe(serial, command)
+            return self.cache.fetch(serial, command, lambda: self._shell(serial, command, timeout))
+        return self._shell(serial, command, timeout)
+
+    def _shell(self, serial, command, timeout=10):
+        """Uncached shell()."""
+        if self.sessions:
+            return self.sessions.run(serial, command, timeout)
+        return self.shell_oneshot(serial, command, timeout)
+
+    def shell_oneshot(self, serial, command, timeout=10):
+        """
+        Run a command in a fresh shell, bypassing persistent sessions.
+        :return: (stdout, stderr, return_code)
+        """
+        return self._dispatch(
+            lambda: self._decode(*self.socket_client.shell(serial, command, timeout)),
+            ["-s", serial, "shell", command], timeout)
+
+    def shell_batch(self, serial, commands, timeout=30):
+        """
+        Run many commands in a single shell invocation (one device round trip).
+        Outputs and exit codes are split back per key. Cached queries are left
+        out of the script; if every command is cached nothing is sent at all.
+        :param commands: Dict of {key: shell command}.
+        :return: Dict of {key: (stdout, stderr, return_code)}.
+        """
+        results = {}
+        if self.cache:
+            for key, command in commands.items():
+                self.cache.observe(serial, command)
+                hit = self.cache.get(serial, command)
+                if hit is not None:
+                    results[key] = hit
+        keys = [k for k in commands if k not in results]
+        if keys:
+            token = uuid.uuid4().hex[:12]
+            script = build_batch_script([commands[k] for k in keys], token)
+            out, err, _ = self._shell(serial, script, timeout)
+            for key, result in zip(keys, split_batch_output(out, err, token, len(keys))):
+                results[key] = result
+                if self.cache:
+                    self.cache.put(serial, commands[key], result)
+        return {key: results[key] for key in commands}
+
+    # --- Binary exec-out ---
+    def exec_out_bytes(self, serial, command, timeout=30):
+        """
+        Run a command via exec-out and return its stdout untouched (screencap,
+        screenrecord, tar, hprof, ...). Nothing is staged on the device.
+        :return: (stdout, stderr, return_code); stdout is a bytes-like object
+                 (bytearray on the socket transport, filled in place).
+        """
+        return self._dispatch(
+            lambda: (self.socket_client.exec_out_into(serial, command, timeout=timeout), "", 0),
+            ["-s", serial, "exec-out", command], timeout, binary=True)
+
+    def exec_out_stream(self, serial, command, chunk_size=None, timeout=30):
+        """
+        Stream exec-out stdout as memoryview chunks of a single reused buffer.
+        Each chunk is only valid until the next one is requested.
+        Usage: for chunk in adb.exec_out_stream(serial, "screencap"): sink.write(chunk)
+        :param chunk_size: Max bytes per chunk. Defaults to config ADB_STREAM_CHUNK_SIZE.
+        :raises AdbProtocolError: The server or the adb client rejected the command.
+        """
+        chunk_size = chunk_size or ADB_STREAM_CHUNK_SIZE
+        if self.socket_client:
+            try:
+                chunks = self.socket_client.exec_stream(serial, command, chunk_size, timeout)
+            except ConnectionRefusedError:
+                if self.mode == "socket":
+                    raise
+            else:
+                yield from chunks
+                return
+
+        proc = self._popen_exec_out(serial, command)
+        buf = bytearray(chunk_size)
+        view = memoryview(buf)
+        try:
+            while n := proc.stdout.readinto(view):
+                yield view[:n]
+            if proc.wait() != 0:
+                err = proc.stderr.read().decode("utf-8", "replace").strip()
+                raise AdbProtocolError(err or f"exec-out exited with {proc.returncode}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+    def exec_out_reader(self, serial, command, timeout=30):
+        """
+        Open exec-out as an unbuffered file-like object, for consumers that
+        readinto() their own buffers (e.g. fixed-size frames) with no extra copy.
+        The caller must close() it; closing from another thread stops a blocked read.
+        :param timeout: Max seconds a single read may block (socket transport); None blocks forever.
+        """
+        if self.socket_client:
+            try:
+                sock = self.socket_client.open(f"exec:{command}", serial)
+                sock.settimeout(timeout)
+                return _ExecOutReader(sock=sock)
+            except ConnectionRefusedError:
+                if self.mode == "socket":
+                    raise
+        return _ExecOutReader(proc=self._popen_exec_out(serial, command))
+
+    def _popen_exec_out(self, serial, command):
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        return subprocess.Popen([self.adb_path, "-s", serial, "exec-out", command],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, **kwargs)
+
+    def exec_out_to_fd(self, serial, command, fd, chunk_size=None, timeout=30):
+        """
+        Write exec-out stdout straight to a file descriptor (or file object) as it arrives.
+        :return: (bytes_written, stderr, return_code)
+        """
+        if not isinstance(fd, int):
+            fd.flush()
+            fd = fd.fileno()
+        total = 0
+        try:
+            for chunk in self.exec_out_stream(serial, command, chunk_size, timeout):
+                while chunk:
+                    written = os.write(fd, chunk)
+                    chunk = chunk[written:]
+                    total += written
+        except AdbProtocolError as e:
+            return total, str(e), 1
+        except Exception as e:
+            return total, str(e), -1
+        return total, "", 0
 
     def shell_output(self, serial, command):
         """
@@ -85,14 +321,22 @@ class AdbWrapper:
 
     def reboot(self, serial):
         """Reboot the target device."""
-        return self._run(["-s", serial, "reboot"])
+        if self.sessions:
+            self.sessions.close(serial)
+        if self.cache:
+            self.cache.on_reboot(serial)
+        return self._dispatch(
+            lambda: (self.socket_client.simple_service(serial, "reboot:"), "", 0),
+            ["-s", serial, "reboot"])
 
     def enable_root(self, serial):
         """
         Attempts to restart adbd with root permissions.
         Requires a user-debug or rooted build.
         """
-        return self._run(["-s", serial, "root"])
+        return self._dispatch(
+            lambda: (self.socket_client.simple_service(serial, "root:").strip(), "", 0),
+            ["-s", serial, "root"])
 
     def is_screen_on(self, serial):
         """
@@ -0,0 +1,269 @@
+import asyncio
+import os
+import shlex
+import shutil
+import struct
+import sys
+import time
+import uuid
+
+from core.config import ADB_TRANSPORT_MODE, ADB_SERVER_HOST, ADB_SERVER_PORT
+from services.adb_socket import (AdbProtocolError, SHELL_ID_STDOUT, SHELL_ID_STDERR,
+                                 SHELL_ID_EXIT, SYNC_DATA_MAX, LEGACY_EXIT_MARK, encode_request)
+from services.shell_session import build_batch_script, split_batch_output
+
+
+class AsyncAdbWrapper:
+    """
+    asyncio counterpart of AdbWrapper.
+    Every command is a coroutine, so dozens of devices can be driven from one
+    event loop instead of one blocked OS thread per adb call.
+
+    Concurrency is bounded twice: a per-serial semaphore keeps any one device
+    (and its adbd) from being flooded, and a global semaphore caps total
+    in-flight commands. The device slot is taken first so a backlog on one
+    device never holds global slots. Long-lived streams (logcat) are not counted.
+    """
+    def __init__(self, adb_path="adb", mode=None, per_device_limit=4, global_limit=64):
+        """
+        :param adb_path: Path to the adb executable (CLI mode / fallback).
+        :param mode: "auto", "socket" or "cli". Defaults to config ADB_TRANSPORT_MODE.
+        :param per_device_limit: Max concurrent commands per serial.
+        :param global_limit: Max concurrent commands overall.
+        """
+        self.adb_path = shutil.which(adb_path) or adb_path
+        self.mode = mode or ADB_TRANSPORT_MODE
+        self.host = ADB_SERVER_HOST
+        self.port = int(os.environ.get("ANDROID_ADB_SERVER_PORT", ADB_SERVER_PORT))
+        self.per_device_limit = per_device_limit
+        self._global = asyncio.Semaphore(global_limit)
+        self._per_device = {}
+        self._features = {}
+
+    def _device_limit(self, serial):
+        if serial not in self._per_device:
+            self._per_device[serial] = asyncio.Semaphore(self.per_device_limit)
+        return self._per_device[serial]
+
+    # --- Socket Transport ---
+    async def _open(self, request, serial=None):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if serial:
+                writer.write(encode_request(f"host:transport:{serial}"))
+                await self._read_status(reader)
+            writer.write(encode_request(request))
+            await self._read_status(reader)
+        except Exception:
+            writer.close()
+            raise
+        return reader, writer
+
+    @staticmethod
+    async def _read_status(reader):
+        status = await reader.readexactly(4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            length = int(await reader.readexactly(4), 16)
+            raise AdbProtocolError((await reader.readexactly(length)).decode("utf-8", "replace"))
+        raise AdbProtocolError(f"Unexpected adb status: {status!r}")
+
+    async def _host_query(self, request):
+        reader, writer = await self._open(request)
+        try:
+            length = int(await reader.readexactly(4), 16)
+            return (await reader.readexactly(length)).decode("utf-8", "replace")
+        finally:
+            writer.close()
+
+    async def _has_shell_v2(self, serial):
+        if serial not in self._features:
+            try:
+                payload = await self._host_query(f"host-serial:{serial}:features")
+                self._features[serial] = set(payload.strip().split(","))
+            except (AdbProtocolError, OSError):
+                self._features[serial] = set()
+        return "shell_v2" in self._features[serial]
+
+    async def _socket_shell(self, serial, command):
+        if not await self._has_shell_v2(serial):
+            # Same status echo as AdbSocketClient.shell, so callers like install() see real failures
+            reader, writer = await self._open(f"shell:{command}\necho {LEGACY_EXIT_MARK.decode()}$?", serial)
+            try:
+                out = await reader.read()
+            finally:
+                writer.close()
+            head, mark, status = out.rpartition(LEGACY_EXIT_MARK)
+            status = status.strip() # The legacy pty turns \n into \r\n
+            if mark and status.isdigit():
+                return head, b"", int(status)
+            return out, b"", -1
+        reader, writer = await self._open(f"shell,v2,raw:{command}", serial)
+        out, err, code = [], [], -1
+        try:
+            while True:
+                try:
+                    packet_id, length = struct.unpack("<BI", await reader.readexactly(5))
+                except asyncio.IncompleteReadError:
+                    break
+                data = await reader.readexactly(length) if length else b""
+                if packet_id == SHELL_ID_STDOUT:
+                    out.append(data)
+                elif packet_id == SHELL_ID_STDERR:
+                    err.append(data)
+                elif packet_id == SHELL_ID_EXIT:
+                    code = data[0] if data else 0
+                    break
+        finally:
+            writer.close()
+        return b"".join(out), b"".join(err), code
+
+    # --- CLI Transport ---
+    async def _run(self, args, timeout=10):
+        """Async twin of AdbWrapper._run."""
+        kwargs = {}
+        if sys.platform == "win32":
+            import subprocess
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self.adb_path, *args,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **kwargs)
+        except Exception as e:
+            return "", str(e), -1
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return "", "Timeout", -1
+        return out.decode("utf-8", "replace").strip(), err.decode("utf-8", "replace").strip(), proc.returncode
+
+    async def _dispatch(self, socket_call, cli_args, timeout=10):
+        """Same fallback rules as AdbWrapper._dispatch, bounded by `timeout`."""
+        if self.mode != "cli":
+            try:
+                return await asyncio.wait_for(socket_call(), timeout)
+            except AdbProtocolError as e:
+                return "", str(e), 1
+            except ConnectionRefusedError as e:
+                if self.mode == "socket":
+                    return "", str(e), -1
+            except asyncio.TimeoutError:
+                return "", "Timeout", -1
+            except Exception as e:
+                return "", str(e), -1
+        return await self._run(cli_args, timeout)
+
+    # --- Public API ---
+    async def get_devices(self):
+        """Async AdbWrapper.get_devices."""
+        async def via_socket():
+            return "List of devices attached\n" + await self._host_query("host:devices"), "", 0
+        out, _, code = await self._dispatch(via_socket, ["devices"])
+        if code != 0:
+            return []
+        return [line.split("\t")[0] for line in out.split("\n")[1:] if "\tdevice" in line]
+
+    async def shell(self, serial, command, timeout=10):
+        """
+        Run a command in the device's shell.
+        :return: (stdout, stderr, return_code)
+        """
+        async def via_socket():
+            out, err, code = await self._socket_shell(serial, command)
+            return out.decode("utf-8", "replace").strip(), err.decode("utf-8", "replace").strip(), code
+        async with self._device_limit(serial), self._global:
+            return await self._dispatch(via_socket, ["-s", serial, "shell", command], timeout)
+
+    async def shell_batch(self, serial, commands, timeout=30):
+        """Async AdbWrapper.shell_batch: many commands, one round trip."""
+        keys = list(commands)
+        if not keys:
+            return {}
+        token = uuid.uuid4().hex[:12]
+        out, err, _ = await self.shell(serial, build_batch_script([commands[k] for k in keys], token), timeout)
+        return dict(zip(keys, split_batch_output(out, err, token, len(keys))))
+
+    async def pull(self, serial, remote, local, timeout=60):
+        """Download a file from the device over the sync: service."""
+        async def via_socket():
+            started = time.time()
+            reader, writer = await self._open("sync:", serial)
+            total = 0
+            try:
+                path = remote.encode("utf-8")
+                writer.write(b"RECV" + struct.pack("<I", len(path)) + path)
+                with open(local, "wb") as f:
+                    while True:
+                        tag, length = struct.unpack("<4sI", await reader.readexactly(8))
+                        if tag == b"DATA":
+                            f.write(await reader.readexactly(length))
+                            total += length
+                        elif tag == b"DONE":
+                            break
+                        else:
+                            message = await reader.readexactly(length)
+                            raise AdbProtocolError(message.decode("utf-8", "replace"))
+                writer.write(b"QUIT" + struct.pack("<I", 0))
+            finally:
+                writer.close()
+            return f"{remote}: 1 file pulled, {total} bytes in {time.time() - started:.3f}s", "", 0
+        async with self._device_limit(serial), self._global:
+            return await self._dispatch(via_socket, ["-s", serial, "pull", remote, local], timeout)
+
+    async def install(self, serial, apk_path, timeout=120):
+        """Install an APK (push to /data/local/tmp + pm install, like legacy `adb install`)."""
+        async def via_socket():
+            remote = f"/data/local/tmp/{os.path.basename(apk_path)}"
+            reader, writer = await self._open("sync:", serial)
+            try:
+                spec = f"{remote},{0o644}".encode("utf-8")
+                writer.write(b"SEND" + struct.pack("<I", len(spec)) + spec)
+                with open(apk_path, "rb") as f:
+                    while chunk := f.read(SYNC_DATA_MAX):
+                        writer.write(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                        await writer.drain()
+                writer.write(b"DONE" + struct.pack("<I", int(time.time())))
+                tag, length = struct.unpack("<4sI", await reader.readexactly(8))
+                if tag == b"FAIL":
+                    raise AdbProtocolError((await reader.readexactly(length)).decode("utf-8", "replace"))
+            finally:
+                writer.close()
+            # pm's exit status is the result; the cleanup runs separately so its status cannot mask a failure
+            out, err, code = await self._socket_shell(serial, f"pm install -r {shlex.quote(remote)}")
+            await self._socket_shell(serial, f"rm -f {shlex.quote(remote)}")
+            return out.decode("utf-8", "replace").strip(), err.decode("utf-8", "replace").strip(), code
+        async with self._device_limit(serial), self._global:
+            return await self._dispatch(via_socket, ["-s", serial, "install", "-r", apk_path], timeout)
+
+    async def logcat(self, serial, args=("-v", "time")):
+        """
+        Stream logcat lines as an async generator (not counted against the limits).
+        Usage: async for line in adb.logcat(serial): ...
+        """
+        command = " ".join(["logcat", *args])
+        if self.mode != "cli":
+            try:
+                reader, writer = await self._open(f"exec:{command}", serial)
+            except ConnectionRefusedError:
+                if self.mode == "socket":
+                    raise
+            else:
+                try:
+                    while line := await reader.readline():
+                        yield line.decode("utf-8", "replace")
+                finally:
+                    writer.close()
+                return
+        proc = await asyncio.create_subprocess_exec(
+            self.adb_path, "-s", serial, "logcat", *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        try:
+            while line := await proc.stdout.readline():
+                yield line.decode("utf-8", "replace")
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import struct
+import threading
+import time
+
+from PySide6.QtCore import QThread, Signal
+
+from services.screen_capture import PIXEL_FORMATS, CaptureError, CaptureSignals, RawFrame
+
+
+def _percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1)
+
+
+class BurstCapture(QThread):
+    """
+    Back-to-back raw framebuffer capture over one persistent exec-out channel.
+
+    The device runs `screencap` in a loop and the raw frames arrive
+    concatenated on a single stream; since every frame of a burst has the same
+    size (learned from one probe capture) the stream is split by length and read
+    straight into per-frame buffers. Exact duplicates of the previous frame are
+    dropped by hash, the rest go to the ScreenCapture encoder pool (PNG or WebP).
+    The number of frames waiting for the encoder is bounded: when it is full the
+    reader stops draining the stream and the device loop blocks, so memory stays flat.
+    """
+    stats_updated = Signal(dict) # throttled progress, see stats()
+    frame_saved = Signal(str) # path
+    burst_finished = Signal(dict) # final stats (with "error" if the burst broke off)
+
+    STATS_INTERVAL = 0.5
+
+    def __init__(self, capture, serial, out_dir, fmt="png", max_frames=None, max_seconds=None,
+                 dedupe=True, quality=-1):
+        """
+        :param capture: ScreenCapture providing the adb wrapper and encoder pool.
+        :param fmt: File format for saved frames ("png" or "webp").
+        :param max_frames: Stop after this many saved frames (None = until stop()).
+        :param max_seconds: Stop after this long (None = until stop()).
+        :param dedupe: Drop frames identical to the previous one.
+        """
+        super().__init__()
+        self.capture = capture
+        self.serial = serial
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.max_frames = max_frames
+        self.max_seconds = max_seconds
+        self.dedupe = dedupe
+        self.quality = quality
+        self.signals = CaptureSignals()
+        self.signals.finished.connect(self.frame_saved)
+
+        self._stop = threading.Event()
+        self._reader = None
+        self._pending = threading.Semaphore(capture.encode_pool.maxThreadCount() * 2)
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.received = 0
+        self.saved = 0
+        self.duplicates = 0
+        self.encode_failed = 0
+        self.encoding = 0
+        self.frame_times = [] # seconds to pull each frame off the stream
+        self.encode_times = []
+        self.started = self.ended = None
+
+    def stop(self):
+        """End the burst; frames already received are still encoded."""
+        self._stop.set()
+        reader = self._reader
+        if reader:
+            reader.close()
+
+    def stats(self):
+        """
+        {"received", "saved", "duplicates", "encoding", "elapsed_s", "capture_fps",
+         "saved_fps", "frame_ms_p50", "frame_ms_p95", "encode_ms_p50", "encode_ms_p95"}
+        """
+        with self._lock:
+            elapsed = ((self.ended or time.perf_counter()) - self.started) if self.started else 0.0
+            return {
+                "received": self.received,
+                "saved": self.saved,
+                "duplicates": self.duplicates,
+                "encode_failed": self.encode_failed,
+                "encoding": self.encoding,
+                "elapsed_s": round(elapsed, 2),
+                "capture_fps": round(self.received / elapsed, 2) if elapsed else 0.0,
+                "saved_fps": round(self.saved / elapsed, 2) if elapsed else 0.0,
+                "frame_ms_p50": _percentile(self.frame_times, 0.50),
+                "frame_ms_p95": _percentile(self.frame_times, 0.95),
+                "encode_ms_p50": _percentile(self.encode_times, 0.50),
+                "encode_ms_p95": _percentile(self.encode_times, 0.95),
+            }
+
+    def run(self):
+        self._reset_stats()
+        error = None
+        try:
+            self._burst()
+        except (CaptureError, OSError) as e:
+            if not self._stop.is_set():
+                error = str(e)
+        finally:
+            if self._reader:
+                self._reader.close()
+                self._reader = None
+            # Let queued encodes finish so the stats (and files) are complete
+            for _ in range(self.capture.encode_pool.maxThreadCount() * 2):
+                self._pending.acquire()
+            for _ in range(self.capture.encode_pool.maxThreadCount() * 2):
+                self._pending.release()
+            with self._lock:
+                self.ended = time.perf_counter()
+        stats = self.stats()
+        if error:
+            stats["error"] = error
+        self.burst_finished.emit(stats)
+
+    def _burst(self):
+        # Probe once for geometry and header size; every frame in the loop has the same size
+        probe = self.capture.grab_raw(self.serial)
+        frame_size = probe.header_size + len(probe.pixels)
+        self._reader = self.capture.adb.exec_out_reader(self.serial, "while :; do screencap; done")
+        if self._stop.is_set():
+            return
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        prefix = f"burst_{time.strftime('%Y%m%d_%H%M%S')}"
+        last_digest = None
+        self.started = last_stats = time.perf_counter()
+        while not self._stop.is_set():
+            if self.max_seconds and time.perf_counter() - self.started >= self.max_seconds:
+                break
+            if self.max_frames and self.saved + self.encoding >= self.max_frames:
+                break
+
+            t0 = time.perf_counter()
+            buf = bytearray(frame_size)
+            view = memoryview(buf)
+            got = 0
+            while got < frame_size:
+                n = self._reader.readinto(view[got:])
+                if not n:
+                    if self._stop.is_set():
+                        return
+                    raise CaptureError("Burst stream closed by the device")
+                got += n
+            captured_at = time.time()
+
+            width, height, fmt = struct.unpack_from("<3I", buf)
+            if fmt not in PIXEL_FORMATS or width * height * PIXEL_FORMATS[fmt][0] != len(buf) - probe.header_size:
+                # Lost frame alignment (resolution or format changed mid-burst)
+                raise CaptureError(f"Frame geometry changed to {width}x{height} format {fmt}")
+            pixels = view[probe.header_size:]
+            with self._lock:
+                self.received += 1
+                self.frame_times.append(time.perf_counter() - t0)
+
+            if self.dedupe:
+                digest = hashlib.blake2b(pixels, digest_size=16).digest()
+                if digest == last_digest:
+                    with self._lock:
+                        self.duplicates += 1
+                    continue
+                last_digest = digest
+
+            # Rotation swaps width/height but keeps the size
+            frame = RawFrame(width, height, fmt, probe.header_size, pixels, captured_at)
+            path = os.path.join(self.out_dir, f"{prefix}_{self.received:04d}.{self.fmt}")
+            self._pending.acquire() # Backpressure: bounded encoder backlog
+            with self._lock:
+                self.encoding += 1
+            self.capture.encode_async(frame, path, self.signals, self.quality, self._on_encoded)
+
+            now = time.perf_counter()
+            if now - last_stats >= self.STATS_INTERVAL:
+                last_stats = now
+                self.stats_updated.emit(self.stats())
+
+    def _on_encoded(self, ok, seconds):
+        with self._lock:
+            self.encoding -= 1
+            if ok:
+                self.saved += 1
+                self.encode_times.append(seconds)
+            else:
+                self.encode_failed += 1
+        self._pending.release()
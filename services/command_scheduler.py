@@ -0,0 +1,237 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Command classes, lower value runs first."""
+    INTERACTIVE = 0 # User button presses (volume, power, keyevents)
+    AUTOMATION = 1 # Stability loops, test steps
+    MONITORING = 2 # Periodic perf/thermal samples
+    BULK = 3 # Pulls, installs, large transfers
+
+
+class DeadlineExpired(Exception):
+    """A queued command waited longer than its deadline and was dropped."""
+
+
+class _Job:
+    __slots__ = ("priority", "fn", "args", "kwargs", "future", "enqueued", "expires")
+
+    def __init__(self, priority, fn, args, kwargs, deadline):
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued = time.monotonic()
+        self.expires = self.enqueued + deadline if deadline else None
+
+
+class _DeviceQueue:
+    """Priority heap plus lane workers for one serial."""
+    def __init__(self, scheduler, serial, lanes):
+        self.scheduler = scheduler
+        self.serial = serial
+        self.heap = []
+        self.cond = threading.Condition()
+        self.running = True
+        self.busy = 0
+        self.workers = []
+        for index, max_priority in enumerate(lanes):
+            worker = threading.Thread(target=self._lane_loop, args=(max_priority,),
+                                      name=f"Scheduler-{serial}-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def push(self, job):
+        with self.cond:
+            if self.running:
+                heapq.heappush(self.heap, (job.priority, next(self.scheduler._seq), job))
+                self.cond.notify_all()
+                return
+        # Stopped by a shutdown() that raced submit(): no lane will drain the heap anymore
+        job.future.cancel()
+
+    def _pop(self, max_priority):
+        """Best job this lane may run, or None. Caller holds the condition."""
+        while self.heap and self.heap[0][0] <= max_priority:
+            _, _, job = heapq.heappop(self.heap)
+            if job.future.cancelled():
+                continue
+            if job.expires and time.monotonic() > job.expires:
+                # Stale sample: nobody wants the answer anymore
+                self.scheduler._record_expired(self.serial, job)
+                job.future.set_exception(DeadlineExpired(f"{job.priority.name} command expired in queue"))
+                continue
+            return job
+        return None
+
+    def _lane_loop(self, max_priority):
+        while True:
+            with self.cond:
+                job = self._pop(max_priority)
+                while job is None:
+                    if not self.running:
+                        return
+                    self.cond.wait(0.5)
+                    job = self._pop(max_priority)
+                self.busy += 1
+            started = time.monotonic()
+            self.scheduler._record_start(self.serial, job, started - job.enqueued)
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    job.future.set_result(job.fn(*job.args, **job.kwargs))
+            except Exception as e:
+                job.future.set_exception(e)
+            finally:
+                self.scheduler._record_done(self.serial, job, time.monotonic() - started)
+                with self.cond:
+                    self.busy -= 1
+
+    def depth(self):
+        with self.cond:
+            depths = {p: 0 for p in Priority}
+            for priority, _, _ in self.heap:
+                depths[priority] += 1
+            return depths
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            pending, self.heap = self.heap, []
+            self.cond.notify_all()
+        for _, _, job in pending:
+            job.future.cancel()
+
+
+class CommandScheduler:
+    """
+    Priority-aware front door to AdbWrapper, one queue per device.
+
+    Each device gets a few lanes (worker threads); a lane only takes jobs up to
+    its priority class. By default lane 0 is reserved for INTERACTIVE, lane 1
+    serves everything up to MONITORING and lane 2 serves everything, so a button
+    press never queues behind dumpsys polling or an APK install. Jobs with a
+    deadline (seconds) are dropped if still queued when it passes; monitoring
+    uses this to skip stale samples instead of piling them up.
+    """
+    DEFAULT_LANES = (Priority.INTERACTIVE, Priority.MONITORING, Priority.BULK)
+    WAIT_SAMPLES = 1000 # Wait times kept per (device, class) for percentiles
+
+    def __init__(self, adb, lanes=None):
+        """
+        :param adb: AdbWrapper used by shell().
+        :param lanes: Max priority served by each lane of a device queue.
+        """
+        self.adb = adb
+        self.lanes = tuple(lanes or self.DEFAULT_LANES)
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._stats = {}
+
+    def _queue(self, serial):
+        with self._lock:
+            queue = self._queues.get(serial)
+            if queue is None:
+                queue = self._queues[serial] = _DeviceQueue(self, serial, self.lanes)
+            return queue
+
+    def submit(self, serial, fn, *args, priority=Priority.AUTOMATION, deadline=None, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for `serial`.
+        :param deadline: Max seconds the job may wait in the queue before it is dropped.
+        :return: concurrent.futures.Future
+        """
+        job = _Job(Priority(priority), fn, args, kwargs, deadline)
+        with self._lock:
+            self._stat(serial, job.priority)["submitted"] += 1
+        self._queue(serial).push(job)
+        return job.future
+
+    def run(self, serial, fn, *args, priority=Priority.AUTOMATION, deadline=None, **kwargs):
+        """Blocking submit(); raises DeadlineExpired if the job went stale."""
+        return self.submit(serial, fn, *args, priority=priority, deadline=deadline, **kwargs).result()
+
+    def shell(self, serial, command, priority=Priority.AUTOMATION, deadline=None, timeout=10):
+        """
+        Scheduled AdbWrapper.shell.
+        :return: (stdout, stderr, return_code); an expired job returns ("", "Deadline expired", -1), one
+            cancelled because the device's queue was shut down (disconnect) ("", "Cancelled", -1).
+        """
+        try:
+            return self.run(serial, self.adb.shell, serial, command, timeout=timeout,
+                            priority=priority, deadline=deadline)
+        except DeadlineExpired:
+            return "", "Deadline expired", -1
+        except CancelledError:
+            return "", "Cancelled", -1
+
+    def shell_output(self, serial, command, priority=Priority.AUTOMATION, deadline=None, timeout=10):
+        """Scheduled AdbWrapper.shell_output."""
+        out, _, _ = self.shell(serial, command, priority, deadline, timeout)
+        return out
+
+    def shutdown(self, serial=None):
+        """
+        Stop the queues of one device (e.g. on disconnect) or all of them; pending jobs are cancelled,
+        running ones finish and their lane threads exit. A later submit() for the device starts a new queue.
+        """
+        with self._lock:
+            serials = [serial] if serial else list(self._queues)
+            queues = [self._queues.pop(s) for s in serials if s in self._queues]
+        for queue in queues:
+            queue.stop()
+
+    # --- Metrics ---
+    def _stat(self, serial, priority):
+        """Counters of one (device, class); caller holds _lock, as every lane thread updates them."""
+        key = (serial, priority)
+        stat = self._stats.get(key)
+        if stat is None:
+            stat = self._stats[key] = {"submitted": 0, "completed": 0, "expired": 0,
+                                       "waits": deque(maxlen=self.WAIT_SAMPLES), "run_time": 0.0}
+        return stat
+
+    def _record_start(self, serial, job, waited):
+        with self._lock:
+            self._stat(serial, job.priority)["waits"].append(waited)
+
+    def _record_done(self, serial, job, elapsed):
+        with self._lock:
+            stat = self._stat(serial, job.priority)
+            stat["completed"] += 1
+            stat["run_time"] += elapsed
+
+    def _record_expired(self, serial, job):
+        with self._lock:
+            self._stat(serial, job.priority)["expired"] += 1
+
+    def metrics(self):
+        """
+        Queue depth and wait-time percentiles per device and priority class:
+        {serial: {"INTERACTIVE": {"queued", "submitted", "completed", "expired",
+                                  "wait_p50_ms", "wait_p99_ms"}, ...}}
+        """
+        with self._lock:
+            queues = dict(self._queues)
+            stats = {key: dict(stat, waits=sorted(stat["waits"])) for key, stat in self._stats.items()}
+        result = {}
+        for (serial, priority), stat in stats.items():
+            waits = stat["waits"]
+            pct = lambda q: round(waits[min(len(waits) - 1, int(len(waits) * q))] * 1000, 1) if waits else 0.0
+            depth = queues[serial].depth()[priority] if serial in queues else 0
+            result.setdefault(serial, {})[priority.name] = {
+                "queued": depth,
+                "submitted": stat["submitted"],
+                "completed": stat["completed"],
+                "expired": stat["expired"],
+                "wait_p50_ms": pct(0.50),
+                "wait_p99_ms": pct(0.99),
+            }
+        return result
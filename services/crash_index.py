@@ -0,0 +1,212 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    id INTEGER PRIMARY KEY,
+    signature TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    package TEXT NOT NULL,
+    exception TEXT NOT NULL,
+    frames TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signatures_last_seen ON signatures(last_seen);
+CREATE TABLE IF NOT EXISTS occurrences (
+    id INTEGER PRIMARY KEY,
+    signature_id INTEGER NOT NULL,
+    time REAL NOT NULL,
+    serial TEXT NOT NULL,
+    build TEXT NOT NULL,
+    path TEXT
+);
+CREATE INDEX IF NOT EXISTS occurrences_signature ON occurrences(signature_id, time);
+CREATE TABLE IF NOT EXISTS signature_builds (
+    signature_id INTEGER NOT NULL, build TEXT NOT NULL, count INTEGER NOT NULL, last_seen REAL NOT NULL,
+    PRIMARY KEY (signature_id, build)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS signature_devices (
+    signature_id INTEGER NOT NULL, serial TEXT NOT NULL, count INTEGER NOT NULL, last_seen REAL NOT NULL,
+    PRIMARY KEY (signature_id, serial)
+) WITHOUT ROWID;
+"""
+
+# Java: "at com.example.Foo.bar(Foo.java:42)"; the exception starts a section, "Caused by:" a nested one
+JAVA_FRAME_RE = re.compile(r"\bat ([\w$.<>-]+)\(")
+JAVA_EXCEPTION_RE = re.compile(r"(?:^|: |Caused by: )((?:[a-zA-Z_$][\w$]*\.)+[\w$]*(?:Exception|Error|Throwable|Failure))\b")
+# Native: "#00 pc 000000000004a8c0  /system/lib64/libc.so (abort+164) (BuildId: ...)"
+NATIVE_FRAME_RE = re.compile(r"#\d+ pc ([0-9a-fA-F]+)\s+(\S+)(?: \(([^)+]+)(?:\+\d+)?\))?")
+NATIVE_SIGNAL_RE = re.compile(r"\bsignal \d+ \((\w+)\)|Fatal signal \d+ \((\w+)\)")
+# Per-occurrence noise: anonymous classes and lambdas, numbers, addresses
+SYNTHETIC_RE = re.compile(r"\$\$(?:External)?(?:Synthetic)?Lambda[\w$]*|\$\d+")
+NUMBER_RE = re.compile(r"0x[0-9a-fA-F]+|\b[0-9a-f]*\d[0-9a-f]*\b")
+
+
+def _message(line):
+    """The message part of a threadtime line ("... I Tag: message")."""
+    head, sep, message = line.partition(": ")
+    return message if sep else line
+
+
+def _generic(text):
+    """Summary text with everything occurrence-specific cut or masked."""
+    text = re.split(r" \(| \{|, ", text, 1)[0]
+    return NUMBER_RE.sub("#", text).strip()
+
+
+def _java(messages, frames):
+    """:return: (exception type, top frames of the innermost cause)"""
+    sections = [] # [exception, [frames]]
+    for message in messages:
+        frame = JAVA_FRAME_RE.search(message)
+        if frame:
+            if sections:
+                sections[-1][1].append(frame.group(1))
+            continue
+        exception = JAVA_EXCEPTION_RE.search(message)
+        if exception and (not sections or "Caused by: " in message):
+            sections.append([exception.group(1), []])
+    if not sections:
+        return "", []
+    outer, (inner, stack) = sections[0][0], sections[-1]
+    exception = outer if outer == inner else f"{outer} < {inner}"
+    return exception, [SYNTHETIC_RE.sub("$", frame) for frame in stack[:frames]]
+
+
+def _native(messages, frames):
+    """:return: (signal name, top frames as lib!function, or lib+pc when unsymbolized)"""
+    signal = ""
+    stack = []
+    for message in messages:
+        if not signal:
+            match = NATIVE_SIGNAL_RE.search(message)
+            if match:
+                signal = match.group(1) or match.group(2)
+        match = NATIVE_FRAME_RE.search(message)
+        if match and len(stack) < frames:
+            pc, path, function = match.groups()
+            library = os.path.basename(path)
+            stack.append(f"{library}!{function}" if function else f"{library}+0x{int(pc, 16):x}")
+    return signal, stack
+
+
+def normalize(fault, frames=5):
+    """
+    Reduce a Fault to what identifies the bug rather than the occurrence.
+    :param frames: Stack frames kept in the signature (top-N of the innermost cause).
+    :return: (signature, kind, package, exception, frames list, summary)
+    """
+    package = fault.process.split(":", 1)[0]
+    messages = [_message(line) for line in fault.lines]
+    exception, stack = "", []
+    if fault.kind == "CRASH": # Only the crashing process' lines, other apps may log stacks meanwhile
+        pid = str(fault.pid)
+        own = [message for line, message in zip(fault.lines, messages) if line.split(None, 3)[2:3] == [pid]]
+        exception, stack = _java(own, frames)
+    elif fault.kind == "NATIVE_CRASH":
+        exception, stack = _native(messages, frames)
+    if not exception and not stack: # Nothing to go by but the message
+        exception = _generic(fault.summary)
+    key = "\n".join([fault.kind, package, exception, *stack])
+    signature = hashlib.sha1(key.encode("utf-8", "replace")).hexdigest()[:16]
+    return signature, fault.kind, package, exception, stack, fault.summary
+
+
+class CrashIndex:
+    """
+    Deduplicates faults by signature in a SQLite file.
+
+    normalize() turns a Fault into a stable signature (kind, package,
+    exception type and the top frames; native crashes use library!function
+    or library+pc). Each occurrence bumps its signature's count and last
+    seen time, and its per-build and per-device counters, in one small
+    transaction. Everything is keyed or indexed, so recording and listing
+    stay constant-time as occurrences pile up over long stability runs.
+    Safe to call from worker threads.
+    """
+    def __init__(self, path, frames=5):
+        self.path = path
+        self.frames = frames
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def record(self, fault, build=""):
+        """
+        :param build: Build fingerprint of the device, "" if unknown.
+        :return: {"id", "signature", "occurrence", "count", "new"} for the fault's signature.
+        """
+        signature, kind, package, exception, stack, summary = normalize(fault, self.frames)
+        when, serial = fault.time, fault.serial or ""
+        with self._lock, self._db as db:
+            signature_id, count = db.execute(
+                "INSERT INTO signatures (signature, kind, package, exception, frames, summary, count, first_seen, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?) ON CONFLICT (signature) DO UPDATE SET count = count + 1,"
+                " first_seen = MIN(first_seen, excluded.first_seen), last_seen = MAX(last_seen, excluded.last_seen)"
+                " RETURNING id, count",
+                (signature, kind, package, exception, "\n".join(stack), summary, when, when)).fetchone()
+            for table, column, value in (("signature_builds", "build", build), ("signature_devices", "serial", serial)):
+                db.execute(f"INSERT INTO {table} (signature_id, {column}, count, last_seen) VALUES (?, ?, 1, ?)"
+                           f" ON CONFLICT DO UPDATE SET count = count + 1, last_seen = MAX(last_seen, excluded.last_seen)",
+                           (signature_id, value, when))
+            occurrence = db.execute("INSERT INTO occurrences (signature_id, time, serial, build) VALUES (?, ?, ?, ?)",
+                                    (signature_id, when, serial, build)).lastrowid
+        return {"id": signature_id, "signature": signature, "occurrence": occurrence, "count": count, "new": count == 1}
+
+    def attach(self, occurrence, path):
+        """Remember where an occurrence's fault log was saved."""
+        with self._lock, self._db as db:
+            db.execute("UPDATE occurrences SET path = ? WHERE id = ?", (path, occurrence))
+
+    def top(self, limit=50, since=None, kind=None):
+        """
+        Signatures by last seen, newest first.
+        :return: [{"id", "signature", "kind", "package", "exception", "summary", "count", "first_seen",
+                   "last_seen", "builds", "devices"}]
+        """
+        query = ("SELECT s.id, s.signature, s.kind, s.package, s.exception, s.summary, s.count, s.first_seen, s.last_seen,"
+                 " (SELECT COUNT(*) FROM signature_builds b WHERE b.signature_id = s.id),"
+                 " (SELECT COUNT(*) FROM signature_devices d WHERE d.signature_id = s.id)"
+                 " FROM signatures s")
+        where, args = [], []
+        if since is not None:
+            where.append("s.last_seen >= ?")
+            args.append(since)
+        if kind:
+            where.append("s.kind = ?")
+            args.append(kind)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY s.last_seen DESC LIMIT ?"
+        keys = ("id", "signature", "kind", "package", "exception", "summary", "count", "first_seen", "last_seen",
+                "builds", "devices")
+        with self._lock:
+            rows = self._db.execute(query, args + [limit]).fetchall()
+        return [dict(zip(keys, row)) for row in rows]
+
+    def details(self, signature_id):
+        """:return: {"frames", "builds": [(build, count, last seen)], "devices": [...], "samples": [paths]}"""
+        with self._lock:
+            db = self._db
+            frames = db.execute("SELECT frames FROM signatures WHERE id = ?", (signature_id,)).fetchone()
+            builds = db.execute("SELECT build, count, last_seen FROM signature_builds WHERE signature_id = ?"
+                                " ORDER BY last_seen DESC", (signature_id,)).fetchall()
+            devices = db.execute("SELECT serial, count, last_seen FROM signature_devices WHERE signature_id = ?"
+                                 " ORDER BY last_seen DESC", (signature_id,)).fetchall()
+            samples = db.execute("SELECT path FROM occurrences WHERE signature_id = ? AND path IS NOT NULL"
+                                 " ORDER BY time", (signature_id,)).fetchall()
+        return {"frames": frames[0].split("\n") if frames and frames[0] else [], "builds": builds, "devices": devices,
+                "samples": [row[0] for row in samples]}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -1,5 +1,6 @@
 from services.adb_wrapper import AdbWrapper
 from core.adb_constants import AdbCommands
+from services.command_scheduler import Priority
 import time
 
 class DeviceController:
@@ -7,17 +8,26 @@ class DeviceController:
     Orchestrator for hardware and software control commands via ADB.
     Provides abstract methods for common interactions like volume control, 
     connectivity toggles, and application lifecycle management.
+    All commands are user-initiated, so they run at INTERACTIVE priority.
     """
-    def __init__(self, adb_wrapper: AdbWrapper):
+    def __init__(self, adb_wrapper: AdbWrapper, scheduler=None):
         """
         :param adb_wrapper: Shared AdbWrapper instance.
+        :param scheduler: Optional CommandScheduler; lets button presses bypass background traffic.
         """
         self.adb = adb_wrapper
+        self.scheduler = scheduler
+
+    def _shell(self, serial, cmd):
+        """Interactive-priority shell execution."""
+        if self.scheduler:
+            return self.scheduler.shell(serial, cmd, Priority.INTERACTIVE)
+        return self.adb.shell(serial, cmd)
 
     def _exec(self, serial, cmd):
         """Internal helper for standard shell execution."""
         if not serial: return
-        self.adb.shell(serial, cmd)
+        self._shell(serial, cmd)
 
     # --- Media Execution ---
     def media_play_pause(self, serial): self._exec(serial, AdbCommands.MEDIA_PLAY_PAUSE)
@@ -35,7 +45,7 @@ class DeviceController:
 
     def is_wifi_on(self, serial):
         """Query state of WiFi radio."""
-        out, _, _ = self.adb.shell(serial, AdbCommands.WIFI_STATUS)
+        out, _, _ = self._shell(serial, AdbCommands.WIFI_STATUS)
         return "1" in out
 
     def connect_wifi(self, serial, ssid, password):
@@ -50,7 +60,7 @@ class DeviceController:
         
     def get_wifi_networks(self, serial):
         """Parses scan results into a list of network identifiers."""
-        out, _, _ = self.adb.shell(serial, AdbCommands.WIFI_LIST)
+        out, _, _ = self._shell(serial, AdbCommands.WIFI_LIST)
         networks = []
         lines = out.split('\n')
         for line in lines:
@@ -66,7 +76,7 @@ class DeviceController:
 
     def is_bt_on(self, serial):
         """Query state of Bluetooth radio."""
-        out, _, _ = self.adb.shell(serial, AdbCommands.BT_STATUS)
+        out, _, _ = self._shell(serial, AdbCommands.BT_STATUS)
         return "1" in out
 
     # --- Application Lifecycle Management ---
@@ -76,11 +86,11 @@ class DeviceController:
         
     def force_stop(self, serial, pkg):
         """Kill a target package immediately."""
-        self.adb.shell(serial, f"{AdbCommands.FORCE_STOP} {pkg}")
+        self._shell(serial, f"{AdbCommands.FORCE_STOP} {pkg}")
         
     def clear_data(self, serial, pkg):
         """Wipe application data for the target package."""
-        self.adb.shell(serial, f"{AdbCommands.CLEAR_DATA} {pkg}")
+        self._shell(serial, f"{AdbCommands.CLEAR_DATA} {pkg}")
 
     # --- Power & System ---
     def power_btn(self, serial): 
@@ -2,6 +2,8 @@ from services.adb_wrapper import AdbWrapper
 from core.adb_constants import AdbCommands
 import re
 
+PROP_LINE = re.compile(r"^\[([^\]]+)\]: \[(.*)$")
+
 class DeviceInfoGatherer:
     """
     Highly granular information engine for extracting device metadata.
@@ -16,8 +18,8 @@ class DeviceInfoGatherer:
 
     def gather_full_info(self, serial):
         """
-        Executes a series of ADB shell commands (getprop, wm, dumpsys) 
-        to build a comprehensive report of the target device.
+        Runs every query (one getprop dump, uname, wm, df, ...) as a single batched
+        shell invocation to build a comprehensive report of the target device.
         :param serial: Device serial number.
         :return: Nested dictionary of device properties.
         """
@@ -34,38 +36,57 @@ class DeviceInfoGatherer:
             "Region": {}
         }
 
+        # One round trip for everything; boot-constant queries (ro.* props, kernel,
+        # memory, display, VHAL) are served from AdbWrapper's QueryCache on repeat visits
+        results = self.adb.shell_batch(serial, {
+            "ro_props": AdbCommands.RO_PROPS,
+            "runtime_props": AdbCommands.RUNTIME_PROPS,
+            "kernel": AdbCommands.KERNEL,
+            "uptime": AdbCommands.UPTIME,
+            "mem": AdbCommands.MEM_TOTAL,
+            "df": AdbCommands.DF_DATA,
+            "selinux": AdbCommands.SELINUX,
+            "whoami": "whoami",
+            "time": AdbCommands.SYSTEM_TIME,
+            "size": AdbCommands.DISPLAY_SIZE,
+            "density": AdbCommands.DISPLAY_DENSITY,
+            # lshal is slow, only query it on automotive builds
+            "vhal": f"case \"$({AdbCommands.CAR_CHARACTERISTICS})\" in *automotive*) lshal | grep -m 1 IVehicle;; esac",
+        })
+        out = lambda key: results.get(key, ("", "", -1))[0]
+        props = self.parse_props(out("ro_props"))
+        props.update(self.parse_props(out("runtime_props")))
+        prop = lambda cmd: self._prop(props, cmd)
+
         # Identity Category
-        info["Identity"]["Serial"] = self._get(serial, AdbCommands.SERIAL)
-        info["Identity"]["Model"] = self._get(serial, AdbCommands.MODEL)
-        info["Identity"]["Manufacturer"] = self._get(serial, AdbCommands.MANUFACTURER)
-        info["Identity"]["Board/SoC"] = self._get(serial, AdbCommands.BOARD)
-        info["Identity"]["ABI"] = self._get(serial, AdbCommands.ABI)
-        info["Identity"]["Hardware Rev"] = self._get(serial, AdbCommands.HARDWARE_REV)
+        info["Identity"]["Serial"] = prop(AdbCommands.SERIAL)
+        info["Identity"]["Model"] = prop(AdbCommands.MODEL)
+        info["Identity"]["Manufacturer"] = prop(AdbCommands.MANUFACTURER)
+        info["Identity"]["Board/SoC"] = prop(AdbCommands.BOARD)
+        info["Identity"]["ABI"] = prop(AdbCommands.ABI)
+        info["Identity"]["Hardware Rev"] = prop(AdbCommands.HARDWARE_REV)
 
         # Software Category
-        info["Software"]["Android Ver"] = self._get(serial, AdbCommands.ANDROID_VER)
-        info["Software"]["SDK Level"] = self._get(serial, AdbCommands.SDK_LEVEL)
-        info["Software"]["Build ID"] = self._get(serial, AdbCommands.BUILD_ID)
-        info["Software"]["Kernel"] = self._get(serial, AdbCommands.KERNEL)
-        info["Software"]["Security Patch"] = self._get(serial, AdbCommands.SECURITY_PATCH)
+        info["Software"]["Android Ver"] = prop(AdbCommands.ANDROID_VER)
+        info["Software"]["SDK Level"] = prop(AdbCommands.SDK_LEVEL)
+        info["Software"]["Build ID"] = prop(AdbCommands.BUILD_ID)
+        info["Software"]["Kernel"] = out("kernel")
+        info["Software"]["Security Patch"] = prop(AdbCommands.SECURITY_PATCH)
         
         # Runtime Category (Uptime, Memory)
-        info["Runtime"]["Boot Completed"] = "Yes" if self._get(serial, AdbCommands.BOOT_COMPLETED) == "1" else "No"
-        uptime = self._get(serial, AdbCommands.UPTIME)
+        info["Runtime"]["Boot Completed"] = "Yes" if prop(AdbCommands.BOOT_COMPLETED) == "1" else "No"
+        uptime = out("uptime")
         info["Runtime"]["Uptime"] = uptime if uptime else "Unknown"
-        
-        mem_out = self._get(serial, "cat /proc/meminfo | grep MemTotal") 
-        info["Runtime"]["Total Memory"] = mem_out.replace("MemTotal:", "").strip()
+        info["Runtime"]["Total Memory"] = out("mem").replace("MemTotal:", "").strip()
 
         # Automotive Category (AAOS Specifics)
-        characteristics = self._get(serial, AdbCommands.CAR_CHARACTERISTICS)
+        characteristics = prop(AdbCommands.CAR_CHARACTERISTICS)
         is_automotive = "automotive" in characteristics
         info["Automotive"]["Is Automotive?"] = "Yes" if is_automotive else "No"
         
         if is_automotive:
             # Check for Vehicle HAL (VHAL) presence
-            vhal = self._get(serial, "lshal | grep -m 1 IVehicle")
-            if "android.hardware.automotive.vehicle" in vhal:
+            if "android.hardware.automotive.vehicle" in out("vhal"):
                 info["Automotive"]["VHAL State"] = "Running"
             else:
                 info["Automotive"]["VHAL State"] = "Unknown/Hidden"
@@ -73,7 +94,7 @@ class DeviceInfoGatherer:
             info["Automotive"]["Note"] = "Not an AAOS Build"
 
         # Storage Category (Data partition analysis)
-        df_out = self._get(serial, AdbCommands.DF_DATA)
+        df_out = out("df")
         try:
             lines = df_out.split('\n')
             if len(lines) > 1:
@@ -86,24 +107,41 @@ class DeviceInfoGatherer:
             info["Storage"]["Status"] = "Unable to read /data"
 
         # Security Category
-        info["Security"]["SELinux"] = self._get(serial, AdbCommands.SELINUX)
-        info["Security"]["Rooted"] = "Yes" if "root" in self._get(serial, "whoami") else "No"
-        info["Security"]["Debuggable"] = "Yes" if self._get(serial, AdbCommands.DEBUGGABLE) == "1" else "No"
+        info["Security"]["SELinux"] = out("selinux")
+        info["Security"]["Rooted"] = "Yes" if "root" in out("whoami") else "No"
+        info["Security"]["Debuggable"] = "Yes" if prop(AdbCommands.DEBUGGABLE) == "1" else "No"
 
         # Region & Global Category
-        info["Region"]["Timezone"] = self._get(serial, AdbCommands.TIMEZONE)
-        info["Region"]["Locale"] = self._get(serial, AdbCommands.LOCALE)
-        info["Region"]["Device Time"] = self._get(serial, AdbCommands.SYSTEM_TIME)
+        info["Region"]["Timezone"] = prop(AdbCommands.TIMEZONE)
+        info["Region"]["Locale"] = prop(AdbCommands.LOCALE)
+        info["Region"]["Device Time"] = out("time")
         
         # Display & IO Category
-        info["InputOutput"]["Resolution"] = self._get(serial, AdbCommands.DISPLAY_SIZE).replace("Physical size: ", "")
-        info["InputOutput"]["Density"] = self._get(serial, AdbCommands.DISPLAY_DENSITY).replace("Physical density: ", "")
+        info["InputOutput"]["Resolution"] = out("size").replace("Physical size: ", "")
+        info["InputOutput"]["Density"] = out("density").replace("Physical density: ", "")
 
         return info
 
-    def _get(self, serial, cmd):
-        # cmd is like "getprop xxx" or "wm size"
-        # wrapper.shell takes (serial, command_string)
-        # Extract command parts if needed? No, shell takes string.
-        out, _, _ = self.adb.shell(serial, cmd)
-        return out.strip()
+    @staticmethod
+    def parse_props(output):
+        """
+        Parse a full `getprop` dump ("[key]: [value]" per line) into a dict.
+        Multi-line values are joined back with newlines.
+        """
+        props = {}
+        key = None
+        for line in output.splitlines():
+            match = PROP_LINE.match(line)
+            if match:
+                key, value = match.group(1), match.group(2)
+                props[key] = value[:-1] if value.endswith("]") else value
+            elif key:
+                # Continuation of a multi-line value
+                value = props[key] + "\n" + line
+                props[key] = value[:-1] if line.endswith("]") else value
+        return props
+
+    @staticmethod
+    def _prop(props, cmd):
+        # cmd is like "getprop ro.product.model" -> look up "ro.product.model"
+        return props.get(cmd.split()[-1], "").strip()
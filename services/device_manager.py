@@ -1,5 +1,5 @@
 from core.context import get_context
-from PySide6.QtCore import QObject, Signal, QTimer
+from PySide6.QtCore import QObject, Signal
 from services.adb_wrapper import AdbWrapper
 
 class BaseService(QObject):
@@ -14,6 +14,8 @@ class BaseService(QObject):
 
 from services.device_info_gatherer import DeviceInfoGatherer
 from services.device_controller import DeviceController
+from services.device_tracker import DeviceTracker
+from services.command_scheduler import CommandScheduler
 from core.worker import Worker
 from PySide6.QtCore import QThreadPool
 
@@ -21,7 +23,7 @@ class DeviceManager(BaseService):
     """
     The central intelligence for Android device management.
     Lifecycle:
-    1. Polling: Uses QTimer to monitor connected hardware via ADB.
+    1. Tracking: A DeviceTracker thread follows the adb server's track-devices stream (no polling).
     2. Eventing: Emits signals for connection, disconnection, and property updates.
     3. Delegation: Uses Gatherer for deep-info and Controller for shell actions.
     4. Threading: Offloads persistent tasks to QThreadPool using Worker instances.
@@ -29,33 +31,94 @@ class DeviceManager(BaseService):
     devices_updated = Signal(list) 
     device_disconnected = Signal() 
     device_props_ready = Signal(dict)
+    device_state_changed = Signal(str, str) # serial, state (device, offline, unauthorized, recovery...)
     notification = Signal(str, str) # message, type (info, warn, error)
 
+    # Non-ready states worth telling the user about
+    STATE_HINTS = {
+        "unauthorized": "is unauthorized. Accept the USB debugging prompt on the device.",
+        "offline": "went offline.",
+        "recovery": "is in recovery mode.",
+        "sideload": "is in sideload mode.",
+        "bootloader": "is in bootloader mode.",
+    }
+
     def __init__(self):
         """
-        Initialize the manager and start the auto-polling cycle (3s intervals).
+        Initialize the manager and start push-based device tracking.
         """
         super().__init__()
         self.adb = AdbWrapper()
+        self.scheduler = CommandScheduler(self.adb)
         self.gatherer = DeviceInfoGatherer(self.adb)
-        self.controller = DeviceController(self.adb)
+        self.controller = DeviceController(self.adb, self.scheduler)
         self.connected_devices = []
+        self.device_states = {}
         self.thread_pool = QThreadPool()
         
-        # Auto-poll for devices
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.scan_devices)
-        self.timer.start(3000)
-        
-        self.scan_devices()
+        # Device events are pushed by the adb server; the GUI thread never blocks on adb
+        self.tracker = DeviceTracker(self.adb.adb_path)
+        self.tracker.devices_changed.connect(self._on_devices_changed)
+        self.tracker.device_added.connect(lambda serial, state: self._on_tracker_state(serial, None, state))
+        self.tracker.device_state_changed.connect(self._on_tracker_state)
+        self.tracker.device_removed.connect(self._on_device_removed)
+        self.tracker.start()
+
+    def shutdown(self):
+        """Stop background tracking and command queues (call on application exit)."""
+        self.tracker.stop()
+        self.scheduler.shutdown()
 
     def scan_devices(self):
         """
-        Poll ADB for a fresh device list. 
+        Request a one-off device list refresh in the background.
+        Normally unnecessary: the tracker pushes every change.
+        """
+        worker = Worker(self.adb.get_devices)
+        worker.signals.result.connect(self._apply_devices)
+        self.thread_pool.start(worker)
+
+    def _on_devices_changed(self, states):
+        """Slot for tracker snapshots ({serial: state})."""
+        for serial, state in states.items():
+            if self.device_states.get(serial) != state:
+                self.device_state_changed.emit(serial, state)
+                if state in self.STATE_HINTS:
+                    self.notification.emit(f"Device [{serial}] {self.STATE_HINTS[state]}", "warn")
+        self.device_states = states
+        self._apply_devices([serial for serial, state in states.items() if state == "device"])
+
+    def _on_tracker_state(self, serial, old_state, state):
+        """Slot for tracker additions and state flips; only a "device" transport can run shells and logcat."""
+        if state == "device":
+            self.bus.device_connected.emit(serial)
+            return
+        if old_state == "device":
+            self._on_device_lost(serial)
+        self.bus.device_state_changed.emit(serial, state)
+
+    def _on_device_lost(self, serial):
+        """A ready device went away or out of the "device" state: free its per-device resources."""
+        self.scheduler.shutdown(serial) # Its lane threads exit; a reconnect starts fresh ones
+        if self.adb.sessions:
+            self.adb.sessions.close(serial) # Pooled shells are respawned on the next command
+        self.bus.device_disconnected.emit(serial)
+
+    def _on_device_removed(self, serial):
+        # Runs before the snapshot slot, so device_states still holds the last state
+        if self.device_states.get(serial) == "device":
+            self._on_device_lost(serial)
+        # Re-validate the boot id and features on reconnect; a reboot or an update may have happened meanwhile
+        if self.adb.cache:
+            self.adb.cache.forget_boot(serial)
+        if self.adb.socket_client:
+            self.adb.socket_client.forget(serial)
+
+    def _apply_devices(self, current_devices):
+        """
+        Apply a fresh list of ready devices.
         Detects changes and alerts the UI via signals/notifications.
         """
-        current_devices = self.adb.get_devices()
-        
         if not current_devices:
             if self.connected_devices:
                 self.device_disconnected.emit()
@@ -67,10 +130,16 @@ class DeviceManager(BaseService):
             self.connected_devices = current_devices
             self.devices_updated.emit(self.connected_devices)
             
-            # Check screen state on new connection to alert user
+            # Check screen state on new connection to alert user (off the GUI thread)
             serial = self.connected_devices[0]
-            if not self.adb.is_screen_on(serial):
-                self.notification.emit(f"Device [{serial}] screen is OFF. Please turn on the display.", "warn")
+            worker = Worker(lambda: (serial, self.adb.is_screen_on(serial)))
+            worker.signals.result.connect(self._on_screen_state)
+            self.thread_pool.start(worker)
+
+    def _on_screen_state(self, result):
+        serial, is_on = result
+        if not is_on:
+            self.notification.emit(f"Device [{serial}] screen is OFF. Please turn on the display.", "warn")
 
     def get_first_device(self):
         """Helper to get the serial of the primary (first listed) device."""
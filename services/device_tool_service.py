@@ -1,175 +1,868 @@
 from core.context import get_context
 from services.adb_wrapper import AdbWrapper
+from services.command_scheduler import CommandScheduler, Priority
+from services.screen_capture import ScreenCapture, CaptureSignals, CaptureError
+from services.burst_capture import BurstCapture
+from services.log_filter import LogFilter
+from services.log_store import LogParser, LogRecord, LogStore, STAMP_RE, STAMP_LEN
+from services.log_archive import LogArchive, SERIAL_UNSAFE
+from services.logcat_binary import BinaryLogDecoder, EVENT_TAGS_COMMAND, parse_event_tags
+from services.kernel_log import DmesgDecoder, DMESG, DMESG_COMMAND
+from services.log_merge import LogMerger, probe_clock
+from services.fault_detector import FaultDetector, KEEP_SPECS
+from services.crash_index import CrashIndex
+from services.proc_sampler import ProcSampler, SAMPLE_COMMAND, ZONES_COMMAND, parse_zones
+from services.process_sampler import ProcessSampler
+from services.metrics_store import MetricsStore
+from services.meminfo import MeminfoHistory, parse_meminfo
+from core.adb_constants import AdbCommands
+from core.worker import Worker
+from core.config import (SCREENSHOT_MODE, BURST_FORMAT, BURST_MAX_SECONDS, LOGCAT_BATCH_INTERVAL_MS,
+                         LOGCAT_BATCH_MAX_LINES, LOGCAT_READ_CHUNK, LOG_STORE_CAPACITY, LOGCAT_DEVICE_FILTER,
+                         LOGCAT_BINARY, LOGCAT_STREAM_QUEUE_CHUNKS, LOGCAT_MERGE_WINDOW_MS, LOGCAT_MERGE_MAX_HOLD_MS,
+                         LOG_ARCHIVE_ENABLED, LOG_ARCHIVE_DIR, LOG_ARCHIVE_TEXT_INDEX,
+                         LOG_ARCHIVE_MAX_BYTES, FAULT_PRE_CONTEXT_LINES, FAULT_POST_CONTEXT_LINES,
+                         FAULT_POST_SECONDS, FAULT_DIR, FAULT_INDEX_PATH, FAULT_SIGNATURE_FRAMES,
+                         FAULT_SAMPLES_PER_SIGNATURE, PERF_SAMPLE_INTERVAL_MS, PERF_DETAIL_INTERVAL_S,
+                         METRICS_RAW_SECONDS, METRICS_HISTORY_HOURS, METRICS_ROLLUP_MS, PROC_SAMPLE_PACKAGES,
+                         PROC_PSS_INTERVAL_MS, PROC_RESOLVE_INTERVAL_S, MEMINFO_HISTORY_SAMPLES)
 from PySide6.QtCore import QObject, Signal, QThread, QRunnable, QThreadPool
 import subprocess
+import shlex
+import threading
+import queue
 import time
 import os
 
+class LogStream:
+    """
+    One log process on a device, `logcat` or `dmesg -w` (buffers=DMESG),
+    decoded on its own reader thread into a bounded queue of record lists
+    (text `-v threadtime` lines, `-B` binary entries, or kernel lines). A full
+    queue blocks the reader, so a consumer that falls behind pushes back on
+    the device instead of growing memory. Records are taken off with the
+    device's clock offset applied and the serial set as their source.
+    """
+    def __init__(self, serial, adb, buffers=None, binary=False, device_args=(), since=None, seen=(), event_tags=None):
+        """
+        :param buffers: logcat -b value, e.g. "main,system,crash" (None = logcat's default), or DMESG.
+        :param binary: Read `logcat -B` and decode entries instead of parsing text.
+        :param device_args: Device-side filter arguments (LogFilter.logcat_args()); not used by dmesg.
+        :param since: Resume point: a "MM-DD hh:mm:ss.mmm" stamp passed to -T (dmesg: kernel seconds).
+        :param seen: Lines already received at `since`; logcat -T repeats them, they are dropped.
+        :param event_tags: Event tag names for binary mode; read from the device when None.
+        """
+        self.serial = serial
+        self.adb = adb
+        self.buffers = buffers
+        self.kernel = buffers == DMESG
+        self.binary = binary and not self.kernel
+        self.args = ("-B",) if self.binary else ("-v", "threadtime")
+        self.event_tags = event_tags
+        self.device_args = () if self.kernel else tuple(device_args)
+        self.since = since
+        self.seen = set(seen)
+        self.running = True
+        self.eof = False
+        self.bytes_read = 0
+        self.lines = 0
+        self.offset = 0.0 # Added to record times to put them on the host clock
+        # Resume point for a replacement stream: newest stamp delivered and the lines delivered at it
+        self.last_stamp = since
+        self.last_lines = set(seen)
+        self.reader = None
+        self.decoder = None
+        self.queue = queue.Queue(LOGCAT_STREAM_QUEUE_CHUNKS)
+        self._wake = None
+
+    @property
+    def key(self):
+        return (self.serial, self.buffers)
+
+    @property
+    def label(self):
+        return f"{self.serial} {self.buffers or 'logcat'}"
+
+    def command(self):
+        if self.kernel:
+            return DMESG_COMMAND
+        args = ["logcat", *self.args]
+        if self.buffers:
+            args += ["-b", self.buffers]
+        if self.since:
+            args += ["-T", self.since]
+        args += self.device_args
+        return " ".join(shlex.quote(arg) for arg in args)
+
+    def open(self, clock, wake):
+        """
+        Start the device process and the reader thread (blocking; called on the LogcatThread).
+        :param clock: DeviceClock of the device, None if it could not be measured.
+        :param wake: Event set whenever records are queued.
+        """
+        self._wake = wake
+        if self.kernel:
+            self.decoder = DmesgDecoder(clock.boot_epoch if clock else None, clock.gmtoff if clock else 0, self.since)
+        elif self.binary:
+            if self.event_tags is None:
+                data, _, _ = self.adb.exec_out_bytes(self.serial, EVENT_TAGS_COMMAND)
+                self.event_tags = parse_event_tags(data.decode("utf-8", "replace"))
+            self.decoder = BinaryLogDecoder(self.event_tags)
+        else:
+            self.decoder = LogParser()
+        if clock:
+            self.offset = clock.offset(local_stamps=not self.kernel and not self.binary)
+        self.reader = self.adb.exec_out_reader(self.serial, self.command(), timeout=None)
+        if not self.running: # Stopped while opening
+            self.reader.close()
+            return
+        threading.Thread(target=self._read_loop, name=f"Log-{self.label}", daemon=True).start()
+
+    def _read_loop(self):
+        """Reader thread: raw chunks -> lists of LogRecords."""
+        decoder = self.decoder
+        buf = bytearray(LOGCAT_READ_CHUNK)
+        view = memoryview(buf)
+        try:
+            while self.running:
+                n = self.reader.readinto(view)
+                if not n:
+                    break
+                self.bytes_read += n
+                records = decoder.feed(view[:n])
+                if records:
+                    self._put(records)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._put(None) # EOF marker
+
+    def _put(self, item):
+        while True:
+            try:
+                self.queue.put(item, timeout=0.2) # Blocks while the consumer is behind
+                break
+            except queue.Full:
+                if not self.running:
+                    return # Stopping anyway
+        self._wake.set()
+
+    def take(self):
+        """:return: Records queued so far (offset applied, source set), oldest first. Sets `eof` at the end."""
+        records = []
+        while True:
+            try:
+                chunk = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                self.eof = True
+                break
+            if records:
+                records.extend(chunk)
+            else:
+                records = chunk
+        if not records:
+            return records
+        if self.seen:
+            records = self._drop_replayed(records)
+        offset, serial = self.offset, self.serial
+        for record in records:
+            record.time += offset
+            record.source = serial
+        self.lines += len(records)
+        if self.kernel:
+            self.last_stamp = self.decoder.last
+        else:
+            self._remember_tail(records)
+        return records
+
+    def _drop_replayed(self, records):
+        # -T is inclusive: skip lines at the resume stamp that the previous stream already delivered
+        kept = []
+        for i, record in enumerate(records):
+            line = record.line
+            if line.startswith("--------- "): # "beginning of main" banners
+                kept.append(record)
+            elif not line.startswith(self.since):
+                self.seen = None
+                return kept + records[i:]
+            elif line not in self.seen:
+                kept.append(record)
+        return kept
+
+    def _remember_tail(self, records):
+        stamp = None
+        for record in reversed(records):
+            if STAMP_RE.match(record.line):
+                stamp = record.line[:STAMP_LEN]
+                break
+        if not stamp:
+            return
+        tail = set()
+        for record in reversed(records):
+            if record.line.startswith(stamp):
+                tail.add(record.line)
+            elif STAMP_RE.match(record.line):
+                break
+        if stamp == self.last_stamp:
+            self.last_lines |= tail
+        else:
+            self.last_stamp, self.last_lines = stamp, tail
+
+    def stop(self):
+        self.running = False
+        if self.reader:
+            self.reader.close()
+
 class LogcatThread(QThread):
-    line_received = Signal(str)
-    
-    def __init__(self, serial, adb_path):
+    """
+    Streams one or more logs (devices x buffers, the kernel log) and delivers
+    them as one timeline, in batches instead of one signal per line.
+    Each LogStream reads and decodes on its own thread into its own bounded
+    queue; this thread measures each device's clock against the host's,
+    merges the streams by corrected timestamp (LogMerger) and emits a batch
+    every LOGCAT_BATCH_INTERVAL_MS or LOGCAT_BATCH_MAX_LINES records,
+    whichever comes first, so a 20k lines/s boot storm costs the GUI ~20
+    signals per second however many streams feed it. The view filter runs
+    here too.
+    """
+    batch_received = Signal(list, object, object) # records, indexes passing the filter (None = all), that filter
+    stats_updated = Signal(dict) # {"bytes_per_s", "lines_per_s", "uptime_s", "device_args", "streams"}
+
+    STATS_INTERVAL = 1.0
+
+    def __init__(self, streams, clocks=None):
+        """
+        :param streams: LogStreams, not yet opened.
+        :param clocks: {serial: DeviceClock} already measured; missing devices are probed in run().
+        """
         super().__init__()
-        self.serial = serial
-        self.adb_path = adb_path
+        self.streams = list(streams)
+        self.clocks = dict(clocks or {})
+        self.device_args = next((stream.device_args for stream in self.streams if not stream.kernel), ())
         self.running = True
-        self.process = None
-        
+        self.filter = LogFilter()
+        self._wake = threading.Event()
+
+    def set_filter(self, log_filter):
+        # Atomic reference swap, picked up with the next batch
+        self.filter = log_filter
+
+    @property
+    def event_tags(self):
+        return {stream.serial: stream.event_tags for stream in self.streams if stream.event_tags is not None}
+
+    def resume_points(self):
+        """{stream key: (since, seen)} for replacement streams."""
+        return {stream.key: (stream.last_stamp, stream.last_lines) for stream in self.streams}
+
+    def _emit_batch(self, records):
+        log_filter = self.filter
+        self.batch_received.emit(records, log_filter.apply(records), log_filter)
+
+    def _open_streams(self):
+        for serial in dict.fromkeys(stream.serial for stream in self.streams):
+            if serial not in self.clocks and self.running:
+                self.clocks[serial] = probe_clock(self.streams[0].adb, serial)
+        opened = []
+        for stream in self.streams:
+            if not self.running:
+                break
+            try:
+                stream.open(self.clocks.get(stream.serial), self._wake)
+                opened.append(stream)
+            except Exception as e:
+                print(f"Log stream {stream.label} failed to start: {e}")
+        return opened
+
     def run(self):
-        # adb -s <serial> logcat -v time
-        cmd = [self.adb_path, "-s", self.serial, "logcat", "-v", "time"]
-        
-        self.process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            bufsize=1, # Line buffered
-            creationflags=subprocess.CREATE_NO_WINDOW if subprocess.name == 'nt' else 0
-        )
-        
-        while self.running and self.process.poll() is None:
-            line = self.process.stdout.readline()
-            if line:
-                self.line_received.emit(line)
-            else:
-                time.sleep(0.1)
+        streams = self._open_streams()
+        if not streams:
+            return
+        merger = LogMerger([stream.key for stream in streams], LOGCAT_MERGE_WINDOW_MS / 1000,
+                           LOGCAT_MERGE_MAX_HOLD_MS / 1000)
+        interval = LOGCAT_BATCH_INTERVAL_MS / 1000
+        batch = []
+        deadline = None
+        started = last_stats = time.monotonic()
+        last_bytes = last_lines = 0
+        last_stream_lines = {stream.key: 0 for stream in streams}
+        while self.running:
+            # Wake up at least once per stats interval, even when the (device-filtered) streams are quiet;
+            # more often while the merger holds records back
+            timeout = max(0.0, deadline - time.monotonic()) if deadline else self.STATS_INTERVAL
+            if merger.pending:
+                timeout = min(timeout, interval)
+            self._wake.wait(timeout)
+            self._wake.clear()
+            for stream in streams:
+                if not stream.eof:
+                    merger.add(stream.key, stream.take())
+                    if stream.eof:
+                        merger.finish(stream.key)
+            eof = all(stream.eof for stream in streams)
+            records = merger.take(flush=eof)
+            if records:
+                if not batch:
+                    deadline = time.monotonic() + interval
+                batch.extend(records)
+            now = time.monotonic()
+            if now - last_stats >= self.STATS_INTERVAL:
+                elapsed = now - last_stats
+                bytes_read = sum(stream.bytes_read for stream in streams)
+                lines = sum(stream.lines for stream in streams)
+                self.stats_updated.emit({
+                    "bytes_per_s": (bytes_read - last_bytes) / elapsed,
+                    "lines_per_s": (lines - last_lines) / elapsed,
+                    "uptime_s": now - started,
+                    "device_args": " ".join(self.device_args),
+                    "streams": [{"label": stream.label, "lines_per_s": (stream.lines - last_stream_lines[stream.key]) / elapsed,
+                                 "queued": stream.queue.qsize(), "offset_ms": stream.offset * 1000, "eof": stream.eof}
+                                for stream in streams],
+                })
+                last_stats, last_bytes, last_lines = now, bytes_read, lines
+                last_stream_lines = {stream.key: stream.lines for stream in streams}
+            if batch and (eof or len(batch) >= LOGCAT_BATCH_MAX_LINES or time.monotonic() >= deadline):
+                self._emit_batch(batch)
+                batch = []
+                deadline = None
+            if eof:
+                break
+        # Stopped mid-batch; deliver what was read so a restarted stream resumes after it
+        for stream in streams:
+            merger.add(stream.key, stream.take())
+        batch.extend(merger.take(flush=True))
+        if batch:
+            self._emit_batch(batch)
 
     def stop(self):
         self.running = False
-        if self.process:
-            self.process.terminate()
-            self.process.kill()
+        for stream in self.streams:
+            stream.stop()
+        self._wake.set()
+
+class LogFilterSignals(QObject):
+    rows_ready = Signal(int, object, bool) # generation, array of seqs, last chunk
+
+class LogFilterJob(QRunnable):
+    """
+    Re-applies a filter over a snapshot of the log store, newest records first.
+    The first chunk is small so the visible end of the log is back within a
+    frame or two; older matches follow in bigger chunks. Cancel by setting
+    `cancelled` (checked between chunks).
+    """
+    FIRST_CHUNK = 20000
+    CHUNK = 200000
+
+    def __init__(self, log_filter, first_seq, records, generation):
+        super().__init__()
+        self.filter = log_filter
+        self.first_seq = first_seq
+        self.records = records
+        self.generation = generation
+        self.cancelled = False
+        self.signals = LogFilterSignals()
+
+    def run(self):
+        end = len(self.records)
+        size = self.FIRST_CHUNK
+        while not self.cancelled:
+            start = max(0, end - size)
+            seqs = self.filter.select(self.records[start:end], self.first_seq + start)
+            self.signals.rows_ready.emit(self.generation, seqs, start == 0)
+            if start == 0:
+                break
+            end, size = start, self.CHUNK
+        self.records = None
 
 class PerformanceThread(QThread):
-    stats_received = Signal(dict)
+    """
+    Samples system metrics with ProcSampler every PERF_SAMPLE_INTERVAL_MS
+    (one adb round trip, counters only; CPU % and rates are computed here).
+    The target packages' processes (ProcessSampler) are read in the same
+    round trip. The service list and `dumpsys meminfo -c`, which cost the
+    device far more, run every PERF_DETAIL_INTERVAL_S as separate scheduler
+    jobs, so a slow dumpsys never delays a sample.
+    """
+    stats_received = Signal(dict) # {"time", "serial", "metrics", "cpu_summary", "mem", "thermal", "meminfo_raw"}
     services_updated = Signal(list)
-    
-    def __init__(self, serial, adb):
+    meminfo_received = Signal(str, object) # serial, MeminfoSnapshot (every PERF_DETAIL_INTERVAL_S)
+
+    DETAIL_COMMANDS = {"services": "service list", "meminfo": "dumpsys meminfo -c"}
+
+    def __init__(self, serial, adb, scheduler=None, interval=None, packages=()):
+        """
+        :param interval: Seconds between samples. Defaults to config PERF_SAMPLE_INTERVAL_MS.
+        :param packages: Packages (or native process names) to sample per process.
+        """
         super().__init__()
         self.serial = serial
         self.adb = adb
+        self.scheduler = scheduler
+        self.interval = interval or PERF_SAMPLE_INTERVAL_MS / 1000
         self.running = True
-        
+        self.sampler = ProcSampler()
+        self.processes = ProcessSampler(packages, PROC_PSS_INTERVAL_MS / 1000, PROC_RESOLVE_INTERVAL_S)
+        self._packages = None # New targets from the GUI thread, applied between samples
+        self.meminfo_raw = ""
+
+    def set_packages(self, packages):
+        self._packages = tuple(packages)
+
+    def _query(self, cmd):
+        if self.scheduler:
+            # A sample that waited longer than one period is useless; drop it instead of queueing
+            return self.scheduler.shell_output(self.serial, cmd, Priority.MONITORING, deadline=self.interval)
+        return self.adb.shell_output(self.serial, cmd)
+
+    def _submit_details(self):
+        if self.scheduler:
+            return {name: self.scheduler.submit(self.serial, self.adb.shell, self.serial, cmd, timeout=30,
+                                                priority=Priority.MONITORING)
+                    for name, cmd in self.DETAIL_COMMANDS.items()}
+        return {name: self.adb.shell(self.serial, cmd, timeout=30) for name, cmd in self.DETAIL_COMMANDS.items()}
+
+    def _collect_details(self, pending):
+        """Handle the detail queries that finished; :return: those still running."""
+        waiting = {}
+        for name, result in pending.items():
+            if not isinstance(result, tuple):
+                if not result.done():
+                    waiting[name] = result
+                    continue
+                try:
+                    result = result.result()
+                except Exception as e:
+                    print(f"Perf {name} query failed: {e}")
+                    continue
+            out = result[0]
+            if name == "services":
+                self.services_updated.emit([line.strip() for line in out.splitlines() if line.strip()])
+            else:
+                self.meminfo_raw = out
+                snapshot = parse_meminfo(out) # Here, off the GUI thread
+                if snapshot is not None and snapshot.processes:
+                    self.meminfo_received.emit(self.serial, snapshot)
+        return waiting
+
     def run(self):
+        try:
+            self.sampler.zones = parse_zones(self._query(ZONES_COMMAND))
+        except Exception as e:
+            print(f"Thermal zones of {self.serial} unavailable: {e}")
+        pending = {}
+        next_detail = next_sample = time.monotonic()
         while self.running:
             try:
-                # CPU (using top -n 1 is lighter and standard on Android)
-                # Output format varies, simpler to use dumpsys cpuinfo if available, or just parsing /proc/stat
-                # limit command execution for responsiveness
-                
-                # CPU Use top -n 1
-                cpu_out = self.adb.shell_output(self.serial, "top -n 1 -m 5 -s cpu")
-                # Extract a simple CPU summary (first line after header)
-                cpu_summary = "N/A"
-                lines = cpu_out.splitlines()
-                for line in lines:
-                    if line.strip().startswith("CPU") or line.strip().startswith("%CPU"):
-                        cpu_summary = line.strip()
-                        break
-                # Simple Memory
-                mem_out = self.adb.shell_output(self.serial, "dumpsys meminfo -c")
-                
-                # Battery/Thermal
-                batt_out = self.adb.shell_output(self.serial, "dumpsys battery")
-                
-                # Android Services list
-                services_out = self.adb.shell_output(self.serial, "service list")
-                services_list = [s.strip() for s in services_out.splitlines() if s.strip()]
-                
-                stats = {
-                    "cpu_raw": cpu_out,
-                    "cpu_summary": cpu_summary,
-                    "mem": self._parse_mem(mem_out),
-                    "thermal": self._parse_thermal(batt_out),
-                    "services": services_list
-                }
-                # Emit stats and services
-                self.stats_received.emit(stats)
-                self.services_updated.emit(services_list)
-            except:
-                pass
-            
-            # Sleep 2 seconds
-            for _ in range(20):
-                if not self.running: break
-                time.sleep(0.1)
-
-    def _parse_mem(self, output):
-        # Very rough parsing of compact meminfo
-        # ...
-        return output[:100] # Return raw for now to display
-
-    def _parse_thermal(self, output):
-        for line in output.splitlines():
-            if "temperature" in line:
-                return line.strip()
-        return "Unknown"
+                packages, self._packages = self._packages, None
+                if packages is not None:
+                    self.processes.set_packages(packages)
+                extra = self.processes.command(time.monotonic())
+                output = self._query(f"{SAMPLE_COMMAND}; {extra}" if extra else SAMPLE_COMMAND)
+                metrics = self.sampler.update(output)
+                if metrics:
+                    metrics.update(self.processes.update(output))
+                    self.stats_received.emit(self._stats(metrics))
+            except Exception as e:
+                print(f"Perf sample failed: {e}")
+            now = time.monotonic()
+            if not pending and now >= next_detail:
+                pending = self._submit_details()
+                next_detail = now + PERF_DETAIL_INTERVAL_S
+            pending = self._collect_details(pending)
+            # Fixed rate; a sample that overran skips the ticks it missed instead of bunching up
+            next_sample += self.interval
+            if next_sample < now:
+                next_sample = now + self.interval - (now - next_sample) % self.interval
+            while self.running and time.monotonic() < next_sample:
+                time.sleep(min(0.05, max(0.0, next_sample - time.monotonic())))
+
+    def _stats(self, metrics):
+        cpu = metrics.get("cpu.total")
+        cpu_summary = "N/A" if cpu is None else f"CPU {cpu:.0f}% (user {metrics.get('cpu.user', 0):.0f}%, " \
+                                                 f"sys {metrics.get('cpu.system', 0):.0f}%, iowait {metrics.get('cpu.iowait', 0):.0f}%)"
+        mem = "N/A"
+        if "mem.total_kb" in metrics and "mem.available_kb" in metrics:
+            mem = f"{metrics['mem.available_kb'] / 1024:.0f} MB available of {metrics['mem.total_kb'] / 1024:.0f} MB"
+        temps = [(name[8:], value) for name, value in metrics.items() if name.startswith("thermal.")]
+        thermal = ", ".join(f"{name} {value:.1f}°C" for name, value in sorted(temps, key=lambda t: -t[1])[:4]) or "Unknown"
+        return {"time": time.time(), "serial": self.serial, "metrics": metrics, "cpu_summary": cpu_summary,
+                "mem": mem, "thermal": thermal, "meminfo_raw": self.meminfo_raw}
 
 class DeviceToolService(QObject):
-    log_received = Signal(str)
+    log_appended = Signal(int, int, object) # first seq, count, visible indexes (None = all)
+    log_filter_reset = Signal() # filter changed: drop all rows, older ones follow via log_rows_loaded
+    log_rows_loaded = Signal(object) # array of older matching seqs to prepend, newest chunk first
+    log_stream_stats = Signal(dict) # LogcatThread stats + "saved_bytes_per_s" (None = unknown)
     perf_stats_updated = Signal(dict)
     screenshot_saved = Signal(str)
+    screenshot_failed = Signal(str, str) # path, error
+    burst_progress = Signal(dict) # BurstCapture.stats()
+    burst_finished = Signal(dict)
     recording_saved = Signal(str)
     
     # Fault Detection
-    fault_detected = Signal(str, str) # Crash
-    anr_detected = Signal(str) # ANR separate
+    fault_captured = Signal(object) # Fault, once its post-context is in
     
     # Services Monitoring
     services_updated = Signal(list)
+    meminfo_updated = Signal(str, object, list) # serial, MeminfoSnapshot, MeminfoHistory events it caused
     
     def __init__(self):
         super().__init__()
         self.ctx = get_context()
-        self.adb = AdbWrapper() 
+        # Share the device manager's transport and queues so priorities apply across services
+        device_manager = self.ctx.get_service("device_manager")
+        self.adb = device_manager.adb if device_manager else AdbWrapper()
+        self.scheduler = device_manager.scheduler if device_manager else CommandScheduler(self.adb)
+        self.capture = ScreenCapture(self.adb)
+        self.burst = None
         self.log_thread = None
         self.perf_thread = None
         self.record_process = None
         
         self.fault_monitoring = False
+        self.fault_detector = FaultDetector(FAULT_PRE_CONTEXT_LINES, FAULT_POST_CONTEXT_LINES, FAULT_POST_SECONDS)
+        self.crash_index = CrashIndex(FAULT_INDEX_PATH, FAULT_SIGNATURE_FRAMES)
+        self.log_serial = None # First device streamed (pkg: filters resolve on it)
+        self.log_sources = [] # [(serial, buffers)] streamed, one LogStream each
+        self.log_buffers = None
+        self.log_binary = LOGCAT_BINARY
+        self.device_log_filter = LOGCAT_DEVICE_FILTER
+        self.log_tags = set() # every tag seen, to push tag: filters down case-insensitively
+        self._unfiltered_rate = None # bytes/s of the stream without device-side filters
+        self._event_tags = {} # serial -> event tags, read once per device
+        self._clocks = {} # serial -> DeviceClock, measured per session
+        self._log_text = (0, "")
+        self.log_filter = LogFilter()
+        self.log_store = LogStore(LOG_STORE_CAPACITY)
+        self.log_archive = LogArchive(LOG_ARCHIVE_DIR, LOG_ARCHIVE_TEXT_INDEX, max_bytes=LOG_ARCHIVE_MAX_BYTES) \
+            if LOG_ARCHIVE_ENABLED else None
+        self._filter_job = None
+        self._filter_generation = 0
+        self._pid_workers = set() # pkg: lookups in flight, kept referenced until they report back
+        self._retiring_log_thread = None # Stopping stream whose replacement starts once it has finished
+        # Performance history per (device, metric), bounded for day-long runs
+        self.metrics_store = MetricsStore(int(METRICS_RAW_SECONDS * 1000 / PERF_SAMPLE_INTERVAL_MS),
+                                          METRICS_HISTORY_HOURS * 3600 * 1000 // METRICS_ROLLUP_MS, METRICS_ROLLUP_MS)
+        self.process_packages = list(PROC_SAMPLE_PACKAGES)
+        self.meminfo_history = MeminfoHistory(MEMINFO_HISTORY_SAMPLES)
         
     # --- Logging ---
-    def start_logcat(self, serial):
-        if self.log_thread: return
-            
-        self.log_thread = LogcatThread(serial, self.adb.adb_path)
-        self.log_thread.line_received.connect(self._handle_log_line)
+    def start_logcat(self, serial, buffers=None, binary=None):
+        """
+        :param buffers: logcat -b value, e.g. "main,system,crash,events" (None = device default).
+        :param binary: Ingest `logcat -B` binary entries instead of text. Defaults to config LOGCAT_BINARY.
+        """
+        self.start_log_streams([(serial, buffers)], binary)
+
+    def start_log_streams(self, sources, binary=None):
+        """
+        Stream several logs at once (e.g. every device of a rig, plus their
+        kernel logs) into one timeline, merged by clock-corrected timestamp.
+        :param sources: [(serial, buffers)], one stream each; buffers is a logcat -b value
+            (None = device default) or DMESG for the kernel log.
+        :param binary: As for start_logcat(); applies to every logcat stream.
+        """
+        if self.log_thread or not sources: return
+        self.log_sources = list(dict.fromkeys(sources))
+        self.log_serial = self.log_sources[0][0]
+        self.log_buffers = next((buffers for _, buffers in self.log_sources if buffers != DMESG), None)
+        self.log_binary = LOGCAT_BINARY if binary is None else binary
+        self._clocks = {} # Re-measured per session, reused by restarts
+        self._start_log_thread()
+        self._resolve_filter_packages() # The device may differ: pkg: terms are looked up again
+
+    @property
+    def log_devices(self):
+        return list(dict.fromkeys(serial for serial, _ in self.log_sources))
+
+    def _start_log_thread(self, resume=None):
+        device_args = self._device_log_args()
+        streams = []
+        for serial, buffers in self.log_sources:
+            since, seen = self._resume_point(resume or {}, serial, buffers)
+            streams.append(LogStream(serial, self.adb, buffers, self.log_binary, device_args, since, seen,
+                                     self._event_tags.get(serial)))
+        self.log_thread = LogcatThread(streams, self._clocks)
+        self.log_thread.set_filter(self.log_filter)
+        self.log_thread.batch_received.connect(self._handle_log_batch)
+        self.log_thread.stats_updated.connect(self._on_log_stats)
         self.log_thread.start()
         
     def stop_logcat(self):
+        self._retiring_log_thread = None
         if self.log_thread:
             self.log_thread.stop()
             self.log_thread.wait()
+            self._event_tags.update(self.log_thread.event_tags) # Read once per device, reused by restarts
+            self._clocks.update(self.log_thread.clocks)
             self.log_thread = None
 
+    def _restart_logcat_if_needed(self, force=False):
+        """
+        Swap in a new stream when the device-side arguments changed, resuming where the old one stopped.
+        The old stream is not waited for here (it may be in the middle of an adb call); its replacement
+        starts when it has finished, with the arguments current by then.
+        """
+        thread = self.log_thread
+        if not thread or self._retiring_log_thread:
+            return
+        if not force and thread.device_args == tuple(self._device_log_args()):
+            return
+        self._retiring_log_thread = thread
+        thread.finished.connect(self._on_log_thread_retired)
+        thread.stop()
+        if thread.isFinished(): # Ended by itself (every stream hit EOF) before the connect
+            self._on_log_thread_retired()
+
+    def _on_log_thread_retired(self):
+        thread = self._retiring_log_thread
+        if thread is None or not thread.isFinished():
+            return # Already replaced (this was a late duplicate), or stopped for good meanwhile
+        self._retiring_log_thread = None
+        if thread is not self.log_thread:
+            return
+        self._event_tags.update(thread.event_tags)
+        self._clocks.update(thread.clocks)
+        self._start_log_thread(thread.resume_points())
+
+    @staticmethod
+    def _resume_point(resume, serial, buffers):
+        """:return: (since, seen) for a replacement stream, (None, ()) to start fresh."""
+        point = resume.get((serial, buffers))
+        if point is None and buffers != DMESG:
+            # Buffers changed: carry on from where the device's logcat stream(s) stopped
+            points = [point for (other, other_buffers), point in resume.items()
+                      if other == serial and other_buffers != DMESG and point[0]]
+            point = max(points, key=lambda point: point[0], default=None)
+        return point or (None, ())
+
+    def _device_log_args(self):
+        if not self.device_log_filter:
+            return []
+        keep = KEEP_SPECS if self.fault_monitoring else ()
+        return self.log_filter.logcat_args(self.log_tags, keep)
+
+    def set_log_buffers(self, buffers):
+        """:param buffers: logcat -b value, None for the device default. Restarts a running stream."""
+        if buffers == self.log_buffers:
+            return
+        self.log_buffers = buffers
+        self.log_sources = list(dict.fromkeys((serial, buffers if old != DMESG else old)
+                                              for serial, old in self.log_sources))
+        self._unfiltered_rate = None # Different buffers, different baseline
+        self._restart_logcat_if_needed(force=True)
+
+    def set_device_log_filter(self, enabled):
+        """Push what the view filter can express down to logcat on the device."""
+        self.device_log_filter = enabled
+        self._restart_logcat_if_needed()
+
+    def set_fault_monitoring(self, enabled):
+        self.fault_monitoring = enabled
+        self.fault_detector.reset()
+        self._restart_logcat_if_needed() # Device filter must let the fault signature lines through
+
+    def set_log_filter(self, min_level=0, text=""):
+        """
+        Compile the view filter once. New batches are filtered on the logcat
+        thread; the retained history is re-filtered in the background, and the
+        device-side part (if enabled) restarts the stream.
+        """
+        self._log_text = (min_level, text)
+        log_filter = LogFilter(min_level, text)
+        # Until their pids are in, pkg: terms match nothing; the stream restarts once, with the pids
+        self._apply_log_filter(log_filter, restart=not (log_filter.packages and self.log_thread))
+        self._resolve_filter_packages()
+
+    def _apply_log_filter(self, log_filter, restart=True):
+        self.log_filter = log_filter
+        if self.log_thread:
+            self.log_thread.set_filter(log_filter)
+        self._refilter()
+        if restart:
+            self._restart_logcat_if_needed()
+
+    def _resolve_filter_packages(self):
+        """pkg: terms match the packages' current processes: look them up on a worker, then swap the filter in."""
+        packages = self.log_filter.packages
+        if not packages or not self.log_serial:
+            return
+        serial, text = self.log_serial, self._log_text
+        worker = Worker(self._package_pids, serial, list(packages))
+        self._pid_workers.add(worker)
+        worker.signals.result.connect(lambda package_pids: self._on_package_pids(serial, text, package_pids))
+        worker.signals.finished.connect(lambda: self._pid_workers.discard(worker))
+        QThreadPool.globalInstance().start(worker)
+
+    def _package_pids(self, serial, packages):
+        """(Blocking) {package: pids} from pidof."""
+        package_pids = {}
+        for package in packages:
+            out = self.scheduler.shell_output(serial, f"pidof {shlex.quote(package)}", Priority.INTERACTIVE)
+            package_pids[package] = {int(pid) for pid in out.split() if pid.isdigit()}
+        return package_pids
+
+    def _on_package_pids(self, serial, text, package_pids):
+        if (serial, text) != (self.log_serial, self._log_text):
+            return # The filter or the device changed while pidof ran; a newer lookup is on its way
+        self._apply_log_filter(LogFilter(*text, package_pids))
+
+    def _on_log_stats(self, stats):
+        rate = stats["bytes_per_s"]
+        saved = None
+        if not stats["device_args"]:
+            if stats["uptime_s"] >= 3: # Skip the initial buffer dump
+                self._unfiltered_rate = rate if self._unfiltered_rate is None else 0.7 * self._unfiltered_rate + 0.3 * rate
+        elif self._unfiltered_rate is not None:
+            saved = max(0.0, self._unfiltered_rate - rate)
+        self.log_stream_stats.emit(dict(stats, saved_bytes_per_s=saved))
+        if self.fault_monitoring: # The stream went quiet before a fault's post-context filled up
+            for fault in self.fault_detector.expire():
+                self.fault_captured.emit(fault)
+
+    def _refilter(self):
+        if self._filter_job:
+            self._filter_job.cancelled = True
+        self._filter_generation += 1
+        first_seq, records = self.log_store.snapshot()
+        self.log_filter_reset.emit()
+        self._filter_job = LogFilterJob(self.log_filter, first_seq, records, self._filter_generation)
+        self._filter_job.signals.rows_ready.connect(self._on_filter_rows)
+        QThreadPool.globalInstance().start(self._filter_job)
+
+    def _on_filter_rows(self, generation, seqs, done):
+        if generation != self._filter_generation:
+            return # Superseded by a newer filter
+        if done:
+            self._filter_job = None
+        self.log_rows_loaded.emit(seqs)
+
     def clear_logcat(self, serial):
         self.adb.shell(serial, "logcat -c")
         
-    def save_logs(self, content, filepath):
+    def save_logs(self, filepath, header=""):
+        """Write the retained log records to a file, optionally after a header block."""
         with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content)
+            f.write(header)
+            LogStore.write_lines(self.log_store.range(), f)
+
+    def search_log_archive(self, min_level=0, text="", start=None, end=None, serial=None, limit=None):
+        """
+        Search everything archived so far (blocking; run it off the GUI thread for wide queries).
+        :param min_level/text: Same syntax as the live filter; pkg: terms are not resolved.
+        :param start/end: Epoch seconds, inclusive (None = open).
+        :return: LogRecords, oldest first.
+        """
+        if not self.log_archive:
+            return []
+        self.log_archive.flush()
+        return self.log_archive.search(LogFilter(min_level, text), start, end, serial, limit)
+
+    def record_fault(self, fault, directory=FAULT_DIR, save=True):
+        """
+        File a captured fault under its crash signature (blocking: adb and SQLite, run it off the GUI thread).
+        Only the first FAULT_SAMPLES_PER_SIGNATURE occurrences get a fault log; repeats just count.
+        :param save: False to only count the occurrence, without a fault log (rate-limited captures).
+        :return: CrashIndex.record() result plus "path" (None when no log was written).
+        """
+        build = ""
+        if fault.serial:
+            try:
+                build = self.adb.shell(fault.serial, AdbCommands.BUILD_FINGERPRINT)[0].strip() # Cached per boot
+            except Exception as e:
+                print(f"Build fingerprint of {fault.serial} unavailable: {e}")
+        entry = self.crash_index.record(fault, build)
+        entry["path"] = None
+        if save and entry["count"] <= FAULT_SAMPLES_PER_SIGNATURE:
+            os.makedirs(directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(fault.time))
+            serial = SERIAL_UNSAFE.sub("_", fault.serial or "device") # host:port serials; ":" is invalid on Windows
+            name = f"{fault.kind.lower()}_{entry['signature'][:8]}_{serial}_{stamp}_{entry['count']}.txt"
+            path = os.path.abspath(os.path.join(directory, name))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"Signature: {entry['signature']} (occurrence {entry['count']})\nBuild: {build or '?'}\n")
+                f.write(fault.to_text())
+            self.crash_index.attach(entry["occurrence"], path)
+            entry["path"] = path
+        return entry
+
+    def shutdown(self):
+        """Stop streams and write out the archive (call on application exit)."""
+        self.stop_logcat()
+        if self.log_archive:
+            self.log_archive.close()
+        self.crash_index.close()
+
+    def clear_log_store(self):
+        self.log_store.clear()
+
+    def add_marker(self, text):
+        """Insert a TestPilot note (e.g. "fault captured") into the log stream."""
+        record = LogRecord(time.time(), 0, 0, "F", "TestPilot", text, 0)
+        self._append_records([record], None)
+
+    def _append_records(self, records, visible):
+        start = self.log_store.end_seq
+        self.log_store.extend(records)
+        if self.log_archive:
+            self.log_archive.append(self.log_serial, records) # Filed under each record's source, if set
+        if visible is None or visible:
+            self.log_appended.emit(start, len(records), visible)
 
-    def _handle_log_line(self, line):
-        self.log_received.emit(line)
+    def _handle_log_batch(self, records, visible, log_filter):
+        self.log_tags.update(record.tag for record in records)
+        if log_filter is not self.log_filter:
+            # Filtered just before a filter change; redo it so it matches the re-filtered history
+            visible = self.log_filter.apply(records)
+        self._append_records(records, visible)
         
-        # Auto-Fault Capture Logic
+        # Auto-Fault Capture Logic (one pass for all signatures, faults come out with their context)
         if self.fault_monitoring:
-            if "FATAL EXCEPTION" in line:
-                self.fault_detected.emit("CRASH", line)
-            elif "ANR in" in line:
-                self.anr_detected.emit(line)
+            for serial, device_records in self._by_device(records):
+                for fault in self.fault_detector.feed(serial, device_records):
+                    self.fault_captured.emit(fault)
+
+    def _by_device(self, records):
+        """Split a merged batch per device (context and faults are per device)."""
+        if len(self.log_devices) < 2:
+            return [(self.log_serial, records)]
+        groups = {}
+        for record in records:
+            groups.setdefault(record.source, []).append(record)
+        return groups.items()
 
     # --- Performance ---
     def start_monitoring(self, serial):
         if self.perf_thread: return
-        self.perf_thread = PerformanceThread(serial, self.adb)
-        self.perf_thread.stats_received.connect(self.perf_stats_updated)
+        self.perf_thread = PerformanceThread(serial, self.adb, self.scheduler, packages=self.process_packages)
+        self.perf_thread.stats_received.connect(self._on_perf_sample)
         self.perf_thread.services_updated.connect(self.services_updated)
+        self.perf_thread.meminfo_received.connect(self._on_meminfo)
         self.perf_thread.start()
         
+    def set_process_packages(self, packages):
+        """Packages sampled per process while monitoring (proc.<package>.* metrics)."""
+        self.process_packages = list(packages)
+        if self.perf_thread:
+            self.perf_thread.set_packages(self.process_packages)
+
+    def _on_perf_sample(self, stats):
+        self.metrics_store.append(stats["serial"], stats["time"], stats["metrics"])
+        self.perf_stats_updated.emit(stats)
+
+    def _on_meminfo(self, serial, snapshot):
+        now = time.time()
+        events = self.meminfo_history.add(serial, snapshot, now)
+        summary = {"meminfo.total_pss_kb": snapshot.total_pss_kb}
+        for name in ("ram_used_kb", "ram_free_kb", "lost_kb"):
+            if getattr(snapshot, name) is not None:
+                summary[f"meminfo.{name}"] = getattr(snapshot, name)
+        self.metrics_store.append(serial, now, summary)
+        self.meminfo_updated.emit(serial, snapshot, events)
+
     def stop_monitoring(self):
         if self.perf_thread:
             self.perf_thread.running = False
@@ -177,31 +870,39 @@ class DeviceToolService(QObject):
             self.perf_thread = None
 
     # --- Capture ---
-    # --- Capture ---
-    def take_screenshot(self, serial, local_path):
-        worker = ScreenshotWorker(self.adb, serial, local_path)
+    def take_screenshot(self, serial, local_path, mode=None):
+        """
+        Capture in the background. Several captures (e.g. one per device) may be in flight.
+        :param mode: "raw" (host-encoded) or "png" (device-encoded). Defaults to config SCREENSHOT_MODE.
+        """
+        worker = ScreenshotWorker(self.capture, serial, local_path, mode or SCREENSHOT_MODE)
         worker.signals.finished.connect(self.screenshot_saved)
+        worker.signals.failed.connect(self.screenshot_failed)
         QThreadPool.globalInstance().start(worker)
 
-class WorkerSignals(QObject):
-    finished = Signal(str)
+    def start_burst(self, serial, out_dir, fmt=None, max_seconds=None):
+        """
+        Capture frames back to back until stop_burst() or the time limit.
+        :param fmt: "png" or "webp". Defaults to config BURST_FORMAT.
+        """
+        if self.burst: return
+        self.burst = BurstCapture(self.capture, serial, out_dir, fmt or BURST_FORMAT,
+                                  max_seconds=max_seconds or BURST_MAX_SECONDS)
+        self.burst.stats_updated.connect(self.burst_progress)
+        self.burst.frame_saved.connect(self.screenshot_saved)
+        self.burst.burst_finished.connect(self._on_burst_finished)
+        self.burst.start()
 
-class ScreenshotWorker(QRunnable):
-    def __init__(self, adb, serial, path):
-        super().__init__()
-        self.adb = adb
-        self.serial = serial
-        self.path = path
-        self.signals = WorkerSignals()
-        
-    def run(self):
-        remote = "/sdcard/temp_screenshot.png"
-        self.adb.shell(self.serial, f"screencap -p {remote}")
-        self.adb.pull(self.serial, remote, self.path)
-        self.adb.shell(self.serial, f"rm {remote}")
-        self.signals.finished.emit(self.path)
+    def stop_burst(self):
+        if self.burst:
+            self.burst.stop()
+
+    def _on_burst_finished(self, stats):
+        self.burst.wait()
+        self.burst = None
+        self.burst_finished.emit(stats)
 
-    # Recording
+    # --- Recording ---
     def start_recording(self, serial, options=""):
         # options e.g. "--time-limit 180 --size 1280x720 --bit-rate 4000000"
         # We run this detached? Or keep track?
@@ -228,14 +929,34 @@ class ScreenshotWorker(QRunnable):
             self.record_process = None
             
             # Use Worker for Pulling to avoid blocking UI
-            worker = RecordingPullWorker(self.adb, serial, local_path)
+            worker = RecordingPullWorker(self.adb, serial, local_path, self.scheduler)
             worker.signals.finished.connect(self.recording_saved)
             QThreadPool.globalInstance().start(worker)
 
+class WorkerSignals(QObject):
+    finished = Signal(str)
+
+class ScreenshotWorker(QRunnable):
+    def __init__(self, capture, serial, path, mode="raw"):
+        super().__init__()
+        self.capture = capture
+        self.serial = serial
+        self.path = path
+        self.mode = mode
+        self.signals = CaptureSignals()
+        
+    def run(self):
+        # Streams screencap over exec-out; nothing is staged on /sdcard
+        try:
+            self.capture.save(self.serial, self.path, self.mode, self.signals)
+        except (CaptureError, OSError) as e:
+            self.signals.failed.emit(self.path, str(e))
+
 class RecordingPullWorker(QRunnable):
-    def __init__(self, adb, serial, path):
+    def __init__(self, adb, serial, path, scheduler=None):
         super().__init__()
         self.adb = adb
+        self.scheduler = scheduler
         self.serial = serial
         self.path = path
         self.signals = WorkerSignals()
@@ -244,6 +965,10 @@ class RecordingPullWorker(QRunnable):
         # Wait a sec for file close on device
         time.sleep(1)
         # Pull
-        self.adb.pull(self.serial, "/sdcard/temp_record.mp4", self.path)
+        if self.scheduler:
+            self.scheduler.run(self.serial, self.adb.pull, self.serial, "/sdcard/temp_record.mp4", self.path,
+                               priority=Priority.BULK)
+        else:
+            self.adb.pull(self.serial, "/sdcard/temp_record.mp4", self.path)
         self.adb.shell(self.serial, "rm /sdcard/temp_record.mp4")
         self.signals.finished.emit(self.path)
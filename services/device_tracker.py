@@ -0,0 +1,105 @@
+import socket
+import subprocess
+import sys
+import threading
+
+from PySide6.QtCore import QThread, Signal
+
+from services.adb_socket import AdbSocketClient, AdbProtocolError, read_length_prefixed
+
+
+class DeviceTracker(QThread):
+    """
+    Push-based device discovery over the adb server's host:track-devices stream.
+    The server sends a fresh "<serial>\\t<state>" list every time anything changes,
+    so connects, disconnects and state flips (device, offline, unauthorized,
+    recovery, ...) arrive within milliseconds and nothing is polled.
+    Runs entirely off the GUI thread; signals are delivered queued to receivers.
+    """
+    device_added = Signal(str, str) # serial, state
+    device_removed = Signal(str) # serial
+    device_state_changed = Signal(str, str, str) # serial, old_state, new_state
+    devices_changed = Signal(dict) # full {serial: state} snapshot
+
+    def __init__(self, adb_path="adb", client=None):
+        """
+        :param adb_path: adb executable, used only to start the server when it is down.
+        :param client: Optional AdbSocketClient (a dedicated one is created by default).
+        """
+        super().__init__()
+        self.adb_path = adb_path
+        self.client = client or AdbSocketClient(pool_size=0)
+        self.states = {}
+        self._stop = threading.Event()
+        self._sock = None
+
+    def run(self):
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                self._sock = self.client.open("host:track-devices")
+                self._sock.settimeout(None) # Block until the server pushes an update
+                backoff = 0.5
+                while not self._stop.is_set():
+                    self._apply(read_length_prefixed(self._sock).decode("utf-8", "replace"))
+            except (OSError, AdbProtocolError, ValueError):
+                if self._stop.is_set():
+                    break
+                # Server gone: everything it reported is gone with it
+                self._apply("")
+                self._start_server()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 5.0)
+            finally:
+                self._close_socket()
+
+    def stop(self):
+        """Stop tracking; unblocks the pending read by closing the stream."""
+        self._stop.set()
+        self._close_socket()
+        self.wait(2000)
+
+    def _close_socket(self):
+        sock, self._sock = self._sock, None
+        if sock:
+            try:
+                # shutdown() (unlike close) wakes a recv blocked in the tracker thread
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _start_server(self):
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        try:
+            subprocess.run([self.adb_path, "start-server"], capture_output=True, timeout=10, **kwargs)
+        except Exception:
+            pass
+
+    def _apply(self, payload):
+        """Diff a track-devices snapshot against the last one and emit the changes."""
+        new_states = {}
+        for line in payload.splitlines():
+            parts = line.strip().split("\t")
+            if len(parts) >= 2:
+                new_states[parts[0]] = parts[1]
+
+        old_states = self.states
+        if new_states == old_states:
+            return
+        self.states = new_states
+
+        for serial in old_states:
+            if serial not in new_states:
+                self.device_removed.emit(serial)
+        for serial, state in new_states.items():
+            if serial not in old_states:
+                self.device_added.emit(serial, state)
+            elif old_states[serial] != state:
+                self.device_state_changed.emit(serial, old_states[serial], state)
+        self.devices_changed.emit(dict(new_states))
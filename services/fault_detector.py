@@ -0,0 +1,191 @@
+import re
+import time
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+
+# kind -> signature, searched anywhere in the logcat line
+SIGNATURES = {
+    "CRASH": r"FATAL EXCEPTION: ",                                      # AndroidRuntime
+    "NATIVE_CRASH": r"(?:\*\*\* ){15}\*\*\*|Fatal signal \d+ \(SIG",    # tombstone banner (DEBUG), libc
+    "ANR": r"ANR in |\bam_anr\s*: ",                                    # ActivityManager, events buffer
+    "WATCHDOG": r"WATCHDOG KILLING SYSTEM PROCESS",
+    "LMK_KILL": r"lowmemorykiller\s*: Kill(?:ing)? '",                  # lmkd (and the old kernel driver)
+    "SYSTEM_RESTART": r"System zygote died|system[_ ]server \(pid \d+\) has died|Entered the Android system server!",
+    "SELINUX": r"avc:\s+denied",
+}
+# A literal every signature contains; batches without any of them skip the regex
+KEYWORDS = ("FATAL EXCEPTION", "*** ***", "Fatal signal", "ANR in", "am_anr", "WATCHDOG", "lowmemorykiller",
+            "zygote died", "system_server", "system server", "avc:")
+FAULT_RE = re.compile("|".join(f"(?P<{kind}>{pattern})" for kind, pattern in SIGNATURES.items()))
+
+# "Tag:Level" specs that keep the signature lines through device-side log filters. SELinux
+# denials are logged under the denied process' name, so only the auditd copies are kept.
+KEEP_SPECS = ("AndroidRuntime:E", "ActivityManager:E", "DEBUG:F", "libc:F", "am_anr:I", "Watchdog:W",
+              "lowmemorykiller:I", "Zygote:E", "SystemServer:I", "auditd:W")
+
+# Per kind: (pattern over the captured lines, (match, fault) -> (process, summary)); "" keeps the default
+DETAILS = {
+    "CRASH": (re.compile(r"Process: ([\w.:]+), PID: \d+(?:.*\n.*?: )?([\w$.]+(?:Exception|Error)[^\n]*)?"),
+              lambda m, f: (m.group(1), m.group(2) or "")),
+    "NATIVE_CRASH": (re.compile(r"Fatal signal \d+ \((\w+)\).*?\((\S+)\), pid|>>> (\S+) <<<"),
+                     lambda m, f: (m.group(2) or m.group(3), m.group(1) or "")),
+    # ActivityManager prints PID:, and on newer releases Frozen:, between "ANR in" and "Reason:"; the
+    # lookahead stops at the next "ANR in" so one ANR never takes the Reason of another
+    "ANR": (re.compile(r"ANR in ([\w.:]+)(?:[^\n]*\n(?:(?![^\n]*ANR in )[^\n]*\n){0,8}?[^\n]*?Reason: ([^\n]*))?"
+                       r"|am_anr\s*: \[\d+,\d+,([\w.:]+),\d+,([^\]]*)\]"),
+            lambda m, f: (m.group(1) or m.group(3), m.group(2) or m.group(4) or "")),
+    "WATCHDOG": (re.compile(r"WATCHDOG KILLING SYSTEM PROCESS: ([^\n]*)"), lambda m, f: ("system_server", m.group(1))),
+    "LMK_KILL": (re.compile(r"Kill(?:ing)? '([^']+)' \((\d+)\)"), lambda m, f: (m.group(1), "")),
+    "SYSTEM_RESTART": (re.compile(r""), lambda m, f: ("system_server", "")),
+    # Denials are logged under the denied process' name, auditd copies name it in comm=
+    "SELINUX": (re.compile(r"avc:\s+denied\s+\{ ([^}]*) \}(?:[^\n]*?comm=\"([^\"]*)\")?[^\n]*?"
+                           r"scontext=(\S+) tcontext=(\S+) tclass=(\S+)"),
+                lambda m, f: (m.group(2) or f.tag, f"{{ {m.group(1)} }} {m.group(3)} -> {m.group(4)} ({m.group(5)})")),
+}
+
+
+def find_faults(lines):
+    """
+    One pass over a batch of lines: the keywords are located with str.find over
+    the joined batch, and only the lines holding one are run through FAULT_RE.
+    :return: [(line index, kind)], at most one hit per line, in order.
+    """
+    joined = "\n".join(lines)
+    ends = None
+    candidates = set()
+    for keyword in KEYWORDS:
+        pos = joined.find(keyword)
+        if pos < 0:
+            continue
+        if ends is None:
+            ends = list(accumulate(len(line) + 1 for line in lines))
+        while pos >= 0:
+            index = bisect_right(ends, pos)
+            candidates.add(index)
+            pos = joined.find(keyword, ends[index])
+    hits = []
+    for index in sorted(candidates):
+        match = FAULT_RE.search(lines[index])
+        if match:
+            hits.append((index, match.lastgroup))
+    return hits
+
+
+class Fault:
+    """A detected fault: the signature line, what preceded it and what followed."""
+    __slots__ = ("kind", "serial", "time", "pid", "tag", "process", "summary", "before", "lines")
+
+    def __init__(self, kind, serial, record, before):
+        self.kind = kind
+        self.serial = serial
+        self.time = record.time
+        self.pid = record.pid
+        self.tag = record.tag
+        self.process = "" # Package or process name, when the lines name it
+        self.summary = record.message.strip()
+        self.before = before # Pre-context lines
+        self.lines = [record.line] # Signature line + post-context
+
+    def finish(self):
+        pattern, extract = DETAILS[self.kind]
+        match = pattern.search("\n".join(self.lines[:64]))
+        if match:
+            process, summary = extract(match, self)
+            self.process = process or ""
+            if summary:
+                self.summary = summary.strip()
+
+    def to_text(self):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.time))
+        header = (f"Fault: {self.kind}\nDevice: {self.serial}\nTime: {stamp}\nProcess: {self.process or '?'} "
+                  f"(pid {self.pid})\nSummary: {self.summary}\n")
+        return "\n".join([header, f"--- {len(self.before)} lines before ---", *self.before,
+                          f"--- fault + {len(self.lines) - 1} lines after ---", *self.lines, ""])
+
+
+class FaultDetector:
+    """
+    Multi-signature fault detection over logcat batches.
+
+    All signatures are matched in one pass per batch (a keyword scan, then
+    one combined regex on the lines holding a keyword), so a quiet stream
+    costs a few substring scans.
+    Each device keeps a ring of the last `pre_lines` lines; a hit opens a
+    Fault that collects the next `post_lines` lines (or whatever arrived
+    within `post_seconds`) and is then returned complete. Further hits of the
+    same kind while a fault is still open belong to it (a tombstone repeats
+    its banner, an ANR shows up as both am_anr and "ANR in").
+    """
+    def __init__(self, pre_lines=200, post_lines=100, post_seconds=3.0):
+        self.pre_lines = pre_lines
+        self.post_lines = post_lines
+        self.post_seconds = post_seconds
+        self._context = {} # serial -> deque of recent lines
+        self._open = {} # serial -> [[fault, lines still wanted, deadline]]
+
+    def feed(self, serial, records):
+        """
+        :param records: The device's next LogRecords, unfiltered.
+        :return: Faults completed by this batch.
+        """
+        context = self._context.get(serial)
+        if context is None:
+            context = self._context[serial] = deque(maxlen=self.pre_lines)
+        lines = [record.line for record in records]
+        hits = find_faults(lines)
+        if not hits and not self._open.get(serial):
+            context.extend(lines)
+            return []
+
+        done = []
+        pos = 0
+        for index, kind in hits:
+            self._advance(serial, lines[pos:index], done)
+            before = list(context)
+            open_faults = self._open.setdefault(serial, [])
+            repeated = any(entry[0].kind == kind for entry in open_faults)
+            self._advance(serial, lines[index:index + 1], done)
+            if not repeated:
+                fault = Fault(kind, serial, records[index], before)
+                open_faults.append([fault, self.post_lines, time.monotonic() + self.post_seconds])
+                if not self.post_lines:
+                    self._close(serial, done)
+            pos = index + 1
+        self._advance(serial, lines[pos:], done)
+        return done
+
+    def expire(self, now=None):
+        """Faults whose post-context window ran out with fewer lines (the stream went quiet)."""
+        now = time.monotonic() if now is None else now
+        done = []
+        for serial, open_faults in self._open.items():
+            for entry in open_faults:
+                if entry[2] <= now:
+                    entry[1] = 0
+            self._close(serial, done)
+        return done
+
+    def reset(self):
+        self._context.clear()
+        self._open.clear()
+
+    def _advance(self, serial, lines, done):
+        if not lines:
+            return
+        self._context[serial].extend(lines)
+        open_faults = self._open.get(serial)
+        if not open_faults:
+            return
+        for entry in open_faults:
+            take = lines[:entry[1]]
+            entry[0].lines.extend(take)
+            entry[1] -= len(take)
+        self._close(serial, done)
+
+    def _close(self, serial, done):
+        open_faults = self._open.get(serial, [])
+        for entry in [entry for entry in open_faults if entry[1] <= 0]:
+            open_faults.remove(entry)
+            entry[0].finish()
+            done.append(entry[0])
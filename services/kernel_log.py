@@ -0,0 +1,78 @@
+import re
+import time
+
+from services.log_store import LogRecord
+
+DMESG = "dmesg" # Log source name (in place of logcat buffers) for the kernel ring buffer
+DMESG_COMMAND = "dmesg -w -r" # Follow, keep the <priority> prefix
+
+# "<6>[ 1234.567890] message"; the priority is absent without -r
+DMESG_RE = re.compile(rb"(?:<(\d+)>)?\[\s*(\d+)\.(\d+)\]\s?")
+# printk levels 0 (emerg) .. 7 (debug)
+KERNEL_LEVELS = ("F", "F", "F", "E", "W", "I", "I", "D")
+
+
+class DmesgDecoder:
+    """
+    Decodes `dmesg -w -r` output into LogRecords on the device's wall clock.
+
+    Kernel times are seconds since boot; `boot_epoch` (device epoch at boot,
+    see DeviceClock) turns them into epochs. Without it the newest line of
+    the first chunk is taken as "now". Like BinaryLogDecoder, each record gets
+    a `-v threadtime` style line (tag "kernel", pid 0).
+    Note the kernel clock stops in suspend while uptime does not, so lines
+    from before a suspend come out early by the time spent suspended.
+    """
+    def __init__(self, boot_epoch=None, gmtoff=0, after=None):
+        """
+        :param gmtoff: Device UTC offset in seconds, for the stamps in the lines.
+        :param after: Kernel time (seconds since boot) already received; older lines are dropped.
+        """
+        self.boot_epoch = boot_epoch
+        self.gmtoff = gmtoff
+        self.after = after
+        self.last = after # Kernel time of the newest line, the resume point
+        self._tail = b""
+        self._sec = None
+        self._sec_stamp = ""
+
+    def feed(self, data):
+        """Decode a chunk of the stream; a partial last line is kept for the next chunk."""
+        data = self._tail + data if self._tail else bytes(data)
+        cut = data.rfind(b"\n") + 1
+        self._tail = data[cut:]
+        records = []
+        if not cut:
+            return records
+        lines = data[:cut].splitlines()
+        if self.boot_epoch is None:
+            for line in reversed(lines):
+                match = DMESG_RE.match(line)
+                if match:
+                    self.boot_epoch = time.time() - float(match.group(2) + b"." + match.group(3))
+                    break
+            else:
+                return records
+        match_line = DMESG_RE.match
+        after = self.after
+        for line in lines:
+            match = match_line(line)
+            if not match:
+                continue # Unprefixed lines are /dev/kmsg dictionary entries (" SUBSYSTEM=...")
+            priority, seconds, fraction = match.groups()
+            uptime = int(seconds) + int(fraction) / 10 ** len(fraction)
+            if after is not None and uptime <= after:
+                continue
+            self.last = uptime
+            level = KERNEL_LEVELS[int(priority) & 7] if priority else "I"
+            epoch = self.boot_epoch + uptime
+            sec = int(epoch)
+            if sec != self._sec:
+                self._sec = sec
+                self._sec_stamp = time.strftime("%m-%d %H:%M:%S", time.gmtime(sec + self.gmtoff))
+            head = f"{self._sec_stamp}.{int((epoch - sec) * 1000):03d}     0     0 {level} kernel  : "
+            message = line[match.end():].decode("utf-8", "replace")
+            records.append(LogRecord(epoch, 0, 0, level, "kernel", head + message, len(head)))
+        if records:
+            self.after = None # Past the resume point
+        return records
@@ -0,0 +1,415 @@
+import os
+import queue
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+
+from services.log_filter import REGEX_CHARS
+from services.log_store import LogRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, serial TEXT, level TEXT, file TEXT, offset INTEGER, size INTEGER,
+    first_time REAL, last_time REAL, first_seq INTEGER, last_seq INTEGER, count INTEGER);
+CREATE INDEX IF NOT EXISTS segments_time ON segments (serial, level, last_time);
+CREATE INDEX IF NOT EXISTS segments_file ON segments (file);
+CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS segment_tags (tag INTEGER, segment INTEGER, PRIMARY KEY (tag, segment)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS segment_pids (pid INTEGER, segment INTEGER, PRIMARY KEY (pid, segment)) WITHOUT ROWID;
+"""
+# Contentless, so it only costs the trigram postings; phrases are queried as ANDed trigrams
+TEXT_INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS segment_text USING fts5 (text, tokenize='trigram', content='', detail='none');
+"""
+
+# count, tag count, then per record columns (see _encode_segment)
+SEGMENT_HEADER = struct.Struct("<II")
+SERIAL_UNSAFE = re.compile(r"[^\w.-]")
+
+
+def _like(glob):
+    """fnmatch glob -> SQL LIKE pattern (escape \\); LIKE is case-insensitive, like tag: terms."""
+    escaped = glob.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.replace("*", "%").replace("?", "_")
+
+
+def _plain_terms(log_filter):
+    """The filter's positive text terms that are plain substrings (no regex)."""
+    return [term for term in log_filter.texts + log_filter.msgs if not REGEX_CHARS.intersection(term)]
+
+
+def _trigram_query(terms):
+    """FTS5 query requiring every trigram of every term, or None if no term is long enough."""
+    trigrams = {term[i:i + 3].lower() for term in terms if len(term) >= 3 for i in range(len(term) - 2)}
+    if not trigrams:
+        return None
+    return " AND ".join('"' + trigram.replace('"', '""') + '"' for trigram in sorted(trigrams))
+
+
+def _encode_segment(records, seqs):
+    """
+    Columnar segment body: arrays of archive seqs, times, pids, tids, tag
+    indexes and message offsets, the tag names, then the lines as one
+    NUL-separated UTF-8 blob. Queries test the columns and only decode the
+    lines that match.
+    """
+    tag_index = {}
+    columns = [
+        array("q", seqs),
+        array("d", [record.time for record in records]),
+        array("i", [record.pid for record in records]),
+        array("i", [record.tid for record in records]),
+        array("H", [tag_index.setdefault(record.tag, len(tag_index)) for record in records]),
+        array("I", [record.msg_start for record in records]),
+    ]
+    tags = "\x00".join(tag_index).encode("utf-8", "replace")
+    lines = "\x00".join(record.line for record in records).encode("utf-8", "replace")
+    return SEGMENT_HEADER.pack(len(records), len(tags)) + b"".join(column.tobytes() for column in columns) + tags + lines
+
+
+class ArchiveSegment:
+    """A decompressed segment; columns are arrays, lines are decoded on demand."""
+    __slots__ = ("level", "seqs", "times", "pids", "tids", "tag_ids", "msg_starts", "tags", "blob", "_lines")
+
+    def __init__(self, data, level):
+        self.level = level
+        count, tags_size = SEGMENT_HEADER.unpack_from(data)
+        off = SEGMENT_HEADER.size
+        columns = []
+        for typecode in "qdiiHI":
+            column = array(typecode)
+            size = count * column.itemsize
+            column.frombytes(data[off:off + size])
+            columns.append(column)
+            off += size
+        self.seqs, self.times, self.pids, self.tids, self.tag_ids, self.msg_starts = columns
+        self.tags = [sys.intern(tag) for tag in data[off:off + tags_size].decode("utf-8", "replace").split("\x00")]
+        self.blob = data[off + tags_size:] # NUL-separated lines, decoded per matching row
+        self._lines = None
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = self.blob.split(b"\x00")
+        return self._lines
+
+    def record(self, i):
+        return LogRecord(self.times[i], self.pids[i], self.tids[i], self.level, self.tags[self.tag_ids[i]],
+                         self.lines[i].decode("utf-8", "replace"), self.msg_starts[i])
+
+    def select(self, start=None, end=None, pids=None, tag_match=None, needles=(), texts=()):
+        """
+        Row indexes passing the column tests (None = no constraint).
+        :param needles: Lowercase ASCII substrings (bytes) every line must contain, found in the raw blob.
+        :param texts: Casefolded non-ASCII substrings every line must contain; bytes.lower() only folds
+            ASCII, so these are tested on the decoded lines of the rows left.
+        """
+        rows = range(len(self.times))
+        if start is not None or end is not None:
+            lo = float("-inf") if start is None else start
+            hi = float("inf") if end is None else end
+            times = self.times
+            rows = [i for i in rows if lo <= times[i] <= hi]
+        if pids is not None:
+            column = self.pids
+            rows = [i for i in rows if column[i] in pids]
+        if tag_match is not None:
+            wanted = {i for i, tag in enumerate(self.tags) if tag_match[tag]}
+            column = self.tag_ids
+            rows = [i for i in rows if column[i] in wanted]
+        if needles:
+            rows = self._rows_containing(needles, rows)
+        if texts:
+            lines = self.lines
+            rows = [i for i in rows if all(text in lines[i].decode("utf-8", "replace").casefold() for text in texts)]
+        return rows
+
+    def _rows_containing(self, needles, rows):
+        # One scan of the lowered blob per needle; a hit's row is the number of separators before it
+        blob = self.blob.lower()
+        for needle in needles:
+            hits = []
+            row, counted = 0, 0
+            pos = blob.find(needle)
+            while pos >= 0:
+                row += blob.count(b"\x00", counted, pos)
+                hits.append(row)
+                counted = blob.find(b"\x00", pos)
+                if counted < 0:
+                    break
+                pos = blob.find(needle, counted)
+            if isinstance(rows, range):
+                rows = hits
+            else:
+                hits = set(hits)
+                rows = [i for i in rows if i in hits]
+        return rows
+
+
+class LogArchive:
+    """
+    Persistent, indexed log capture.
+
+    Records are appended in the background into compressed segments (zlib),
+    one stream per device and level, so an `E` query never inflates the far
+    larger V/D/I traffic. Segment data goes to hourly files under
+    <directory>/<serial>/; a SQLite sidecar (index.db) keeps each segment's
+    time range and the tags and pids it contains, plus an optional FTS5
+    trigram index of its text. A search narrows the candidates in SQL, then
+    inflates only those segments and tests their columns before decoding any
+    line; the LogFilter makes the final exact decision.
+    """
+    SEGMENT_RECORDS = 4096
+    SEGMENT_SECONDS = 10.0 # Pending records are written at least this often
+
+    def __init__(self, directory, text_index=True, compression=6, max_bytes=None):
+        """
+        :param directory: Archive root, created if missing.
+        :param text_index: Maintain the trigram index that lets text terms skip segments.
+        :param compression: zlib level.
+        :param max_bytes: Drop the oldest hourly files once the archive is larger (None = keep all).
+        """
+        self.directory = directory
+        self.text_index = text_index
+        self.compression = compression
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "index.db")
+        db = self._connect()
+        db.executescript(SCHEMA + (TEXT_INDEX_SCHEMA if text_index else ""))
+        self.next_seq = db.execute("SELECT COALESCE(MAX(last_seq), -1) + 1 FROM segments").fetchone()[0]
+        db.close()
+
+        self._queue = queue.Queue()
+        self._pending = {} # (serial, level) -> [seqs, records, opened at]
+        self._thread = threading.Thread(target=self._write_loop, name="LogArchive", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL") # searches read while the writer appends
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # --- Writing (callers' thread: just hand over) ---
+    def append(self, serial, records):
+        """
+        Queue records for archiving; their archive sequence numbers are assigned in order.
+        :param serial: Device the records are filed under, unless they carry their own source.
+        """
+        if records:
+            self._queue.put((serial, records, self.next_seq))
+            self.next_seq += len(records)
+
+    def flush(self):
+        """Write everything appended so far and wait until it is searchable."""
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(0.5):
+            if not self._thread.is_alive():
+                return
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    # --- Writer thread ---
+    def _write_loop(self):
+        db = self._connect()
+        files = {} # path -> open handle, the current hour of each device
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=1.0)
+                except queue.Empty:
+                    item = False
+                if item is None or isinstance(item, threading.Event):
+                    self._write_pending(db, files, force=True)
+                    if item is None:
+                        return
+                    item.set()
+                    continue
+                if item:
+                    serial, records, seq = item
+                    for record in records:
+                        key = (record.source or serial, record.level)
+                        pending = self._pending.get(key)
+                        if pending is None:
+                            pending = self._pending[key] = [[], [], time.monotonic()]
+                        pending[0].append(seq)
+                        pending[1].append(record)
+                        seq += 1
+                self._write_pending(db, files)
+        finally:
+            for handle in files.values():
+                handle.close()
+            db.close()
+
+    def _write_pending(self, db, files, force=False):
+        now = time.monotonic()
+        written = False
+        for key, (seqs, records, opened) in list(self._pending.items()):
+            if not force and len(records) < self.SEGMENT_RECORDS and now - opened < self.SEGMENT_SECONDS:
+                continue
+            del self._pending[key]
+            for i in range(0, len(records), self.SEGMENT_RECORDS):
+                self._write_segment(db, files, key, seqs[i:i + self.SEGMENT_RECORDS],
+                                    records[i:i + self.SEGMENT_RECORDS])
+            written = True
+        if written:
+            db.commit()
+            if self.max_bytes:
+                self._enforce_limit(db, files)
+
+    def _write_segment(self, db, files, key, seqs, records):
+        serial, level = key
+        folder = os.path.join(self.directory, SERIAL_UNSAFE.sub("_", serial or "unknown"))
+        path = os.path.join(folder, time.strftime("%Y%m%d-%H.seg", time.localtime(records[0].time)))
+        handle = files.get(path)
+        if handle is None:
+            for old in [old for old in files if os.path.dirname(old) == folder]:
+                files.pop(old).close()
+            os.makedirs(folder, exist_ok=True)
+            handle = files[path] = open(path, "ab")
+        data = zlib.compress(_encode_segment(records, seqs), self.compression)
+        offset = handle.seek(0, os.SEEK_END)
+        handle.write(data)
+        handle.flush()
+
+        cursor = db.execute(
+            "INSERT INTO segments (serial, level, file, offset, size, first_time, last_time, first_seq, last_seq, count)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (serial, level, os.path.relpath(path, self.directory), offset, len(data),
+             min(record.time for record in records), max(record.time for record in records),
+             seqs[0], seqs[-1], len(records)))
+        segment = cursor.lastrowid
+        tags = {record.tag for record in records}
+        db.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(tag,) for tag in tags])
+        db.executemany("INSERT INTO segment_tags SELECT id, ? FROM tags WHERE name = ?",
+                       [(segment, tag) for tag in tags])
+        db.executemany("INSERT INTO segment_pids VALUES (?, ?)",
+                       [(pid, segment) for pid in {record.pid for record in records}])
+        if self.text_index:
+            db.execute("INSERT INTO segment_text (rowid, text) VALUES (?, ?)",
+                       (segment, "\n".join(record.line for record in records)))
+
+    def _enforce_limit(self, db, files):
+        sizes = {}
+        for file, size in db.execute("SELECT file, SUM(size) FROM segments GROUP BY file"):
+            sizes[file] = size
+        total = sum(sizes.values())
+        # Hourly file names sort chronologically within a device; drop the oldest hours of any device first
+        for file in sorted(sizes, key=os.path.basename):
+            if total <= self.max_bytes:
+                break
+            path = os.path.join(self.directory, file)
+            if path in files:
+                continue # Still being written
+            segments = [(row[0],) for row in db.execute("SELECT id FROM segments WHERE file = ?", (file,))]
+            db.executemany("DELETE FROM segment_tags WHERE segment = ?", segments)
+            db.executemany("DELETE FROM segment_pids WHERE segment = ?", segments)
+            # Contentless FTS rows can't be deleted without their text; ids are never reused
+            # (AUTOINCREMENT), so the leftovers just match nothing
+            db.execute("DELETE FROM segments WHERE file = ?", (file,))
+            db.commit()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= sizes[file]
+
+    # --- Searching (any thread) ---
+    def search(self, log_filter=None, start=None, end=None, serial=None, limit=None):
+        """
+        Archived records matching a filter, oldest first.
+        :param log_filter: LogFilter (level, tag:, pid:, text terms, ...); None = everything.
+        :param start: Epoch seconds, inclusive (None = from the beginning).
+        :param end: Epoch seconds, inclusive (None = up to now).
+        :param serial: Only this device's records.
+        :param limit: Stop after this many records.
+        """
+        sql = ["SELECT id, level, file, offset, size, first_seq FROM segments WHERE 1"]
+        params = []
+        if serial is not None:
+            sql.append("AND serial = ?")
+            params.append(serial)
+        levels = sorted(log_filter.levels) if log_filter else None
+        if levels is not None:
+            sql.append(f"AND level IN ({','.join('?' * len(levels))})")
+            params += levels
+        if start is not None:
+            sql.append("AND last_time >= ?")
+            params.append(start)
+        if end is not None:
+            sql.append("AND first_time <= ?")
+            params.append(end)
+        tag_match = pids = None
+        needles = texts = ()
+        if log_filter is not None:
+            if log_filter.tag_names:
+                likes = " OR ".join("t.name LIKE ? ESCAPE '\\'" for _ in log_filter.tag_names)
+                sql.append(f"AND id IN (SELECT st.segment FROM tags t JOIN segment_tags st ON st.tag = t.id WHERE {likes})")
+                params += [_like(name) for name in log_filter.tag_names]
+                tag_match = log_filter.tag_match
+            if log_filter.by_process:
+                pids = frozenset(log_filter.pids)
+                sql.append(f"AND id IN (SELECT segment FROM segment_pids WHERE pid IN ({','.join('?' * len(pids))}))")
+                params += sorted(pids)
+            terms = _plain_terms(log_filter)
+            # Only a prefilter (a superset of the matches): LogFilter.accepts makes the final call
+            needles = [term.lower().encode("ascii") for term in terms if term.isascii()]
+            texts = [term.casefold() for term in terms if not term.isascii()]
+            text_query = _trigram_query(terms) if self.text_index else None
+            if text_query:
+                sql.append("AND id IN (SELECT rowid FROM segment_text WHERE segment_text MATCH ?)")
+                params.append(text_query)
+        sql.append("ORDER BY first_seq")
+
+        db = self._connect()
+        try:
+            candidates = db.execute(" ".join(sql), params).fetchall()
+        finally:
+            db.close()
+
+        # Level streams interleave, so matches are ordered by archive seq at the end. With a
+        # limit, reading stops once no remaining segment can hold an earlier match.
+        results = []
+        handles = {}
+        try:
+            for segment_id, level, file, offset, size, first_seq in candidates:
+                if limit is not None and len(results) >= limit:
+                    results.sort(key=lambda item: item[0])
+                    del results[limit:]
+                    if first_seq > results[-1][0]:
+                        break
+                handle = handles.get(file)
+                if handle is None:
+                    try:
+                        handle = handles[file] = open(os.path.join(self.directory, file), "rb")
+                    except OSError:
+                        continue # Removed by the size limit since the query
+                handle.seek(offset)
+                segment = ArchiveSegment(zlib.decompress(handle.read(size)), level)
+                for i in segment.select(start, end, pids, tag_match, needles, texts):
+                    record = segment.record(i)
+                    if log_filter is None or log_filter.accepts(record):
+                        results.append((segment.seqs[i], record))
+        finally:
+            for handle in handles.values():
+                handle.close()
+        results.sort(key=lambda item: item[0])
+        records = [record for _, record in results]
+        return records[:limit] if limit is not None else records
+
+    def size(self):
+        """Compressed bytes on disk (segment data, not the index)."""
+        db = self._connect()
+        try:
+            return db.execute("SELECT COALESCE(SUM(size), 0) FROM segments").fetchone()[0]
+        finally:
+            db.close()
@@ -0,0 +1,250 @@
+import fnmatch
+import re
+import shlex
+from array import array
+
+from services.log_store import LEVEL_INDEX as LEVEL_ORDER
+
+LEVELS = "VDIWEF"
+
+# tag:ActivityManager  pid:1234,5678  tid:42  pkg:com.foo  msg:text  level>=W  (any of them prefixed with - to exclude)
+TERM_RE = re.compile(r"(tag|pid|tid|pkg|msg|level)(>=|<=|>|<|:|=)(.+)", re.IGNORECASE)
+# logcat filterspec tags can't contain these
+SPEC_UNSAFE = re.compile(r"[\s:*?\[\]'\"]")
+
+
+def _split(text):
+    # Quotes group a phrase ("Displayed com.foo"); unbalanced quotes fall back to plain words
+    try:
+        return shlex.split(text)
+    except ValueError:
+        return text.split()
+
+
+REGEX_CHARS = set(".^$*+?{}[]\\|()")
+ESCAPE_RE = re.compile(r"\\([A-Za-z0-9])")
+
+
+def _text_condition(text, name, ns, field="r.line"):
+    """Source for a case-insensitive search of `text` in `field`; plain words skip the regex engine."""
+    if not REGEX_CHARS.intersection(text):
+        ns[name] = text.lower()
+        return f"{name} in {field}.lower()"
+    try:
+        pattern = re.compile(text, re.IGNORECASE)
+    except re.error:
+        ns[name] = text.lower()
+        return f"{name} in {field}.lower()"
+    if all(escape in "dswb" for escape in ESCAPE_RE.findall(text)):
+        # IGNORECASE defeats the regex engine's literal scans; a lowered pattern on
+        # the lowered line is ~3x faster. Not valid with escapes like \D or \x41.
+        try:
+            ns[name] = re.compile(text.lower())
+            return f"{name}.search({field}.lower()) is not None"
+        except re.error: # e.g. [Z-a] -> [z-a]
+            pass
+    ns[name] = pattern
+    return f"{name}.search({field}) is not None"
+
+
+def _caseless_regex(text):
+    """Literal text as a case-insensitive ECMAScript regex (logcat -e has no flags): Car -> [Cc][Aa][Rr]."""
+    return "".join(f"[{c.upper()}{c.lower()}]" if c.isalpha() else re.escape(c) for c in text)
+
+
+class _TagMatch(dict):
+    """tag -> bool memo; tags are few and interned, so this is one dict lookup per record."""
+    def __init__(self, patterns):
+        super().__init__()
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+    def __missing__(self, tag):
+        self[tag] = result = self.pattern.match(tag) is not None
+        return result
+
+
+def _level_range(op, value):
+    """Levels selected by `level<op><value>`, or None if the term is not a level."""
+    value = value[:1].upper()
+    if value not in LEVEL_ORDER:
+        return None
+    n = LEVEL_ORDER[value]
+    compare = {
+        ">=": lambda i: i >= n, ">": lambda i: i > n, "<=": lambda i: i <= n, "<": lambda i: i < n,
+        ":": lambda i: i == n, "=": lambda i: i == n,
+    }[op]
+    return {level for level, i in LEVEL_ORDER.items() if compare(i)}
+
+
+class LogFilter:
+    """
+    Immutable record filter, compiled once and shared with the logcat reader thread.
+    Swap in a new instance to change the filter; never mutate one in place.
+
+    Filter text is a list of terms, all of which must hold:
+        ActivityManager      regex (case-insensitive) searched in the whole line
+        "Displayed com.foo"  quoted phrase
+        tag:Car*             tag, glob, case-insensitive
+        pid:1234,5678        process id(s); tid: for threads
+        pkg:com.foo          processes of a package (pids resolved by the caller)
+        msg:timeout          like plain text, but only searched in the message
+        level>=W             also level>, <=, <, level:E
+        -chatty -tag:chatty  exclude lines matching the term
+    Repeated positive terms of the same key are alternatives (tag:A tag:B,
+    and pid:/pkg: together).
+    """
+    def __init__(self, min_level=0, text="", package_pids=None):
+        """
+        :param min_level: Index into LEVELS (0 = Verbose shows everything).
+        :param text: Filter expression (see class doc).
+        :param package_pids: {package: pids} for the pkg: terms (see `packages`); unresolved ones match nothing.
+        """
+        self.min_level = min_level
+        self.text = text
+        self.levels = {level for level, i in LEVEL_ORDER.items() if i >= min_level}
+        self.packages = []
+        self.tag_names, self.excluded_tag_names = [], [] # tag: terms as typed, for logcat_args()
+        self.tag_match = None # tag -> bool for the positive tag: terms
+        tags, pids, tids, texts, msgs = [], set(), set(), [], []
+        not_tags, not_pids, not_tids, not_texts, not_msgs = [], set(), set(), [], []
+        by_process = False # a positive pid:/pkg: term, even if the package has no running process
+
+        for token in _split(text):
+            exclude = token.startswith("-") and len(token) > 1
+            if exclude:
+                token = token[1:]
+            match = TERM_RE.fullmatch(token)
+            key, op, value = (match.group(1).lower(), match.group(2), match.group(3)) if match else (None, None, None)
+
+            if key == "level" and _level_range(op, value) is not None:
+                levels = _level_range(op, value)
+                self.levels = self.levels - levels if exclude else self.levels & levels
+            elif key == "tag" and op in (":", "="):
+                (not_tags if exclude else tags).append(fnmatch.translate(value))
+                (self.excluded_tag_names if exclude else self.tag_names).append(value)
+            elif key == "pkg" and op in (":", "="):
+                self.packages.append(value)
+                (not_pids if exclude else pids).update((package_pids or {}).get(value, ()))
+                by_process = by_process or not exclude
+            elif key == "msg" and op in (":", "="):
+                (not_msgs if exclude else msgs).append(value)
+            elif key in ("pid", "tid") and op in (":", "=") and all(v.isdigit() for v in value.split(",")):
+                ids = {int(v) for v in value.split(",")}
+                if key == "pid":
+                    (not_pids if exclude else pids).update(ids)
+                    by_process = by_process or not exclude
+                else:
+                    (not_tids if exclude else tids).update(ids)
+            else:
+                (not_texts if exclude else texts).append(token)
+
+        # The terms are compiled into one generated expression (cheapest tests
+        # first, short-circuiting `and`) evaluated inside a list comprehension,
+        # so there is no Python call per term per record. User text only ever
+        # lives in the namespace, never in the source.
+        ns = {}
+        conditions = []
+        if self.levels != set(LEVEL_ORDER):
+            ns["L"] = frozenset(self.levels)
+            conditions.append("r.level in L")
+        if by_process:
+            ns["P"] = frozenset(pids)
+            conditions.append("r.pid in P")
+        if not_pids:
+            ns["NP"] = frozenset(not_pids)
+            conditions.append("r.pid not in NP")
+        if tids:
+            ns["T"] = frozenset(tids)
+            conditions.append("r.tid in T")
+        if not_tids:
+            ns["NT"] = frozenset(not_tids)
+            conditions.append("r.tid not in NT")
+        if tags:
+            ns["G"] = self.tag_match = _TagMatch(tags)
+            conditions.append("G[r.tag]")
+        if not_tags:
+            ns["NG"] = _TagMatch(not_tags)
+            conditions.append("not NG[r.tag]")
+        for i, term in enumerate(texts):
+            conditions.append(_text_condition(term, f"X{i}", ns))
+        for i, term in enumerate(not_texts):
+            conditions.append(f"not ({_text_condition(term, f'NX{i}', ns)})")
+        for i, term in enumerate(msgs):
+            conditions.append(_text_condition(term, f"M{i}", ns, "r.line[r.msg_start:]"))
+        for i, term in enumerate(not_msgs):
+            conditions.append(f"not ({_text_condition(term, f'NM{i}', ns, 'r.line[r.msg_start:]')})")
+        self.pids, self.texts, self.msgs, self.by_process = pids, texts, msgs, by_process
+
+        if conditions:
+            expr = " and ".join(conditions)
+            self._match = eval(f"lambda r: {expr}", ns)
+            self._select = eval(f"lambda records, start: [start + i for i, r in enumerate(records) if {expr}]", ns)
+        else:
+            self._match = self._select = None
+
+    @property
+    def is_empty(self):
+        return self._match is None
+
+    def accepts(self, record):
+        """:param record: LogRecord (see services.log_store)."""
+        return self._match is None or self._match(record)
+
+    def apply(self, records):
+        """
+        Filter a batch.
+        :return: Indexes of the accepted records, or None when nothing is filtered.
+        """
+        if self._select is None:
+            return None
+        return self._select(records, 0)
+
+    def select(self, records, start_seq):
+        """Sequence numbers of the accepted records, records[0] being start_seq."""
+        if self._select is None:
+            return array("q", range(start_seq, start_seq + len(records)))
+        return array("q", self._select(records, start_seq))
+
+    def logcat_args(self, known_tags=(), keep=()):
+        """
+        logcat arguments that pre-filter on the device (filterspecs, --pid, -e).
+        They select a superset of what accepts() passes, since the host check
+        still runs; whatever logcat can't express exactly is left to the host.
+        :param known_tags: Tags seen so far. tag: terms are case-insensitive but
+                           logcat tags are not, so seen case variants are passed too.
+        :param keep: "Tag:Level" specs that must always get through (fault detection);
+                     --pid and -e are not pushed down while there are any.
+        :return: Argument list, empty for no device-side filtering.
+        """
+        if not self.levels:
+            return []
+        level = LEVELS[min(LEVEL_ORDER[level] for level in self.levels)]
+
+        def variants(names):
+            wanted = {name.lower() for name in names}
+            return sorted(set(names) | {tag for tag in known_tags if tag.lower() in wanted})
+
+        tag_levels = {} # tag -> lowest level that must get through ("S" = silenced)
+        if self.tag_names and not any(SPEC_UNSAFE.search(name) for name in self.tag_names):
+            tag_levels = {name: level for name in variants(self.tag_names)}
+            default = "S"
+        else:
+            excluded = [name for name in self.excluded_tag_names if not SPEC_UNSAFE.search(name)]
+            tag_levels = {name: "S" for name in variants(excluded)}
+            default = level
+        if not tag_levels and default == "V":
+            specs = []
+        else:
+            for spec in keep:
+                tag, keep_level = spec.split(":")
+                current = tag_levels.get(tag, default)
+                if current == "S" or LEVEL_ORDER[keep_level] < LEVEL_ORDER[current]:
+                    tag_levels[tag] = keep_level
+            specs = [f"{tag}:{tag_level}" for tag, tag_level in tag_levels.items()] + [f"*:{default}"]
+
+        args = []
+        if not keep and self.by_process and len(self.pids) == 1:
+            args.append(f"--pid={next(iter(self.pids))}")
+        if not keep and len(self.msgs) == 1 and not REGEX_CHARS.intersection(self.msgs[0]):
+            args += ["-e", _caseless_regex(self.msgs[0])]
+        return args + specs
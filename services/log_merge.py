@@ -0,0 +1,155 @@
+import heapq
+import time
+from bisect import bisect_right
+from operator import attrgetter
+
+# Device wall clock (epoch, nanoseconds if toybox has %N, UTC offset) and seconds since boot
+CLOCK_COMMAND = "date +%s.%N,%z; cat /proc/uptime"
+
+_time = attrgetter("time")
+
+
+class DeviceClock:
+    """How a device's clock relates to the host's, from one `date` round trip."""
+    __slots__ = ("skew", "gmtoff", "boot_epoch", "rtt")
+
+    def __init__(self, skew, gmtoff, boot_epoch, rtt):
+        self.skew = skew # Host epoch minus device epoch, seconds
+        self.gmtoff = gmtoff # Device UTC offset, seconds (logcat text stamps are device-local)
+        self.boot_epoch = boot_epoch # Device epoch at boot (kernel log times are relative to it), None if unknown
+        self.rtt = rtt
+
+    def offset(self, local_stamps):
+        """
+        Seconds to add to a record's time to put it on the host clock.
+        :param local_stamps: Times parsed from device-local text stamps (LogParser reads them as host-local),
+            rather than true epochs (`logcat -B`, the kernel log).
+        """
+        if local_stamps:
+            return self.skew + time.localtime().tm_gmtoff - self.gmtoff
+        return self.skew
+
+
+def parse_clock(output, host_time, rtt=0.0):
+    """CLOCK_COMMAND output taken at host_time (the round trip's midpoint) -> DeviceClock, or None."""
+    lines = output.split()
+    if not lines or "," not in lines[0]:
+        return None
+    stamp, zone = lines[0].split(",", 1)
+    seconds, _, nanos = stamp.partition(".")
+    if not seconds.isdigit():
+        return None
+    epoch = int(seconds) + (int(nanos) / 1e9 if nanos.isdigit() else 0.5) # No %N: middle of the second
+    gmtoff = 0
+    if len(zone) == 5 and zone[0] in "+-" and zone[1:].isdigit():
+        gmtoff = (int(zone[1:3]) * 3600 + int(zone[3:]) * 60) * (-1 if zone[0] == "-" else 1)
+    boot_epoch = None
+    if len(lines) > 1:
+        try:
+            boot_epoch = epoch - float(lines[1])
+        except ValueError:
+            pass
+    return DeviceClock(host_time - epoch, gmtoff, boot_epoch, rtt)
+
+
+def probe_clock(adb, serial, samples=3):
+    """
+    Measure a device's clock against the host's, keeping the sample with the
+    shortest round trip (its midpoint is the best estimate of when `date` ran).
+    :return: DeviceClock, or None if the device did not answer.
+    """
+    best = None
+    for _ in range(samples):
+        try:
+            sent = time.time()
+            out, _, code = adb.shell(serial, CLOCK_COMMAND, timeout=5)
+            received = time.time()
+        except Exception:
+            return best
+        clock = parse_clock(out, (sent + received) / 2, received - sent) if code == 0 else None
+        if clock and (best is None or clock.rtt < best.rtt):
+            best = clock
+    return best
+
+
+class LogMerger:
+    """
+    k-way merge of several record streams into one timeline by time.
+
+    Each stream delivers its records in order, but the streams arrive with
+    different delays, so a record is only released once every live stream
+    has caught up to its time (the watermark). A stream that delivered
+    nothing for `window` seconds is quiet and assumed to have nothing older
+    than now - window, so it holds the others back for at most that. A stream that has not delivered anything yet
+    holds everything back for up to `startup` seconds, so the buffer dumps at
+    the start interleave too, and no record waits longer than `max_hold`
+    (e.g. a device clock that could not be corrected). Records arriving
+    later than that are released as they come, out of order, never dropped.
+    A single stream passes straight through.
+    """
+    def __init__(self, keys, window=0.3, max_hold=2.0, startup=2.0):
+        self.window = window
+        self.max_hold = max_hold
+        self._pending = {key: [] for key in keys}
+        self._latest = {key: None for key in keys} # Newest time received per stream
+        self._arrived = {key: 0.0 for key in keys} # Monotonic time of its last delivery
+        self._waiting = {} # key -> monotonic time its oldest pending records arrived
+        self._startup_until = time.monotonic() + startup
+
+    def add(self, key, records):
+        """Records from one stream, oldest first."""
+        if not records:
+            return
+        pending = self._pending[key]
+        self._arrived[key] = mono = time.monotonic()
+        if not pending:
+            self._waiting[key] = mono
+        pending.extend(records)
+        latest = records[-1].time
+        if self._latest[key] is None or latest > self._latest[key]:
+            self._latest[key] = latest
+
+    def finish(self, key):
+        """The stream ended; it no longer holds the others back."""
+        self._latest.pop(key, None)
+
+    @property
+    def pending(self):
+        return sum(len(records) for records in self._pending.values())
+
+    def take(self, now=None, flush=False):
+        """:return: Records that can be released, in time order (flush: all of them)."""
+        mono = time.monotonic()
+        if len(self._pending) == 1 or flush:
+            watermark = float("inf")
+        else:
+            now = time.time() if now is None else now
+            floor = now - self.window
+            watermark = float("inf")
+            for key, latest in self._latest.items():
+                if latest is None:
+                    if mono < self._startup_until:
+                        watermark = float("-inf")
+                        break
+                    latest = floor
+                elif mono - self._arrived[key] >= self.window: # Quiet
+                    latest = max(latest, floor)
+                watermark = min(watermark, latest)
+        runs = []
+        for key, pending in self._pending.items():
+            if not pending:
+                continue
+            if watermark == float("inf") or (mono - self._waiting[key]) >= self.max_hold:
+                cut = len(pending)
+            else:
+                cut = bisect_right(pending, watermark, key=_time)
+            if cut:
+                runs.append(pending[:cut])
+                del pending[:cut]
+                if pending:
+                    self._waiting[key] = mono # Still moving; only a stream stuck behind the watermark times out
+        if not runs:
+            return []
+        if len(runs) == 1:
+            return runs[0]
+        return list(heapq.merge(*runs, key=_time))
@@ -0,0 +1,162 @@
+import re
+import sys
+import time
+
+# 12-18 00:01:54.434  1234  5678 D Tag     : message   (-v threadtime)
+THREADTIME_RE = re.compile(r"(\d\d-\d\d \d\d:\d\d:\d\d)\.(\d{3})\s+(\d+)\s+(\d+) ([VDIWEFS]) (.*?)\s*: ")
+# 12-18 00:01:54.434 D/Tag( 1234): message   (-v time)
+TIME_RE = re.compile(r"(\d\d-\d\d \d\d:\d\d:\d\d)\.(\d{3}) ([VDIWEFS])/(.*?)\(\s*(\d+)\): ")
+
+# The "MM-DD hh:mm:ss.mmm" prefix both formats share (also what logcat -T takes)
+STAMP_RE = re.compile(r"\d\d-\d\d \d\d:\d\d:\d\d\.\d{3}")
+STAMP_LEN = 18
+
+LEVEL_INDEX = {"V": 0, "D": 1, "I": 2, "W": 3, "E": 4, "F": 5, "S": 5}
+
+
+class LogRecord:
+    """
+    One logcat line. The message is kept as an offset into the original line
+    so each record holds a single string; tags are interned.
+    """
+    __slots__ = ("time", "pid", "tid", "level", "tag", "line", "msg_start", "source")
+
+    def __init__(self, time, pid, tid, level, tag, line, msg_start, source=None):
+        self.time = time # Epoch seconds (float)
+        self.pid = pid
+        self.tid = tid # 0 when the format has no thread id (-v time)
+        self.level = level # V D I W E F
+        self.tag = tag
+        self.line = line
+        self.msg_start = msg_start
+        self.source = source # Serial of the device it was streamed from (None for markers, archive reads)
+
+    @property
+    def message(self):
+        return self.line[self.msg_start:]
+
+    @property
+    def level_index(self):
+        return LEVEL_INDEX.get(self.level, 0)
+
+
+class LogParser:
+    """
+    Turns `-v threadtime` or `-v time` lines into LogRecords.
+    Logcat timestamps have no year; the current one is assumed (previous year
+    if that would put the line in the future). Timestamp -> epoch conversion is
+    cached per second since consecutive lines share it.
+    """
+    def __init__(self):
+        self._stamp = None
+        self._stamp_epoch = 0.0
+        self._tail = b""
+
+    def _epoch(self, stamp, millis):
+        if stamp != self._stamp:
+            now = time.time()
+            year = time.localtime(now).tm_year
+            epoch = time.mktime(time.strptime(f"{year}-{stamp}", "%Y-%m-%d %H:%M:%S"))
+            if epoch > now + 86400:
+                epoch = time.mktime(time.strptime(f"{year - 1}-{stamp}", "%Y-%m-%d %H:%M:%S"))
+            self._stamp, self._stamp_epoch = stamp, epoch
+        return self._stamp_epoch + int(millis) / 1000
+
+    def parse(self, line):
+        line = line.rstrip("\r\n")
+        match = THREADTIME_RE.match(line)
+        if match:
+            stamp, millis, pid, tid, level, tag = match.groups()
+            return LogRecord(self._epoch(stamp, millis), int(pid), int(tid), level,
+                             sys.intern(tag), line, match.end())
+        match = TIME_RE.match(line)
+        if match:
+            stamp, millis, level, tag, pid = match.groups()
+            return LogRecord(self._epoch(stamp, millis), int(pid), 0, level,
+                             sys.intern(tag.rstrip()), line, match.end())
+        # "--------- beginning of main" and other non-log lines
+        return LogRecord(time.time(), 0, 0, "I", "", line, 0)
+
+    def parse_many(self, lines):
+        parse = self.parse
+        return [parse(line) for line in lines]
+
+    def feed(self, data):
+        """Parse a chunk of raw logcat output; a partial last line is kept for the next chunk."""
+        data = self._tail + data if self._tail else bytes(data)
+        cut = data.rfind(b"\n") + 1
+        self._tail = data[cut:]
+        if not cut:
+            return []
+        return self.parse_many(data[:cut].decode("utf-8", "replace").splitlines())
+
+
+class LogStore:
+    """
+    Fixed-capacity ring buffer of LogRecords.
+    Every record gets a sequence number that never changes (seq 0 is the
+    first record ever appended); once the buffer is full the oldest records
+    are overwritten and first_seq moves forward. Memory is bounded by
+    `capacity`, however long the capture runs.
+    Not thread-safe: append and read on one thread (the GUI thread).
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self.first_seq = 0 # Oldest retained record
+        self.end_seq = 0 # One past the newest record
+
+    def __len__(self):
+        return self.end_seq - self.first_seq
+
+    def extend(self, records):
+        """Append records. :return: Number of old records evicted."""
+        slots, capacity = self._slots, self.capacity
+        if len(records) > capacity:
+            self.end_seq += len(records) - capacity
+            records = records[-capacity:]
+        seq = self.end_seq
+        for record in records:
+            slots[seq % capacity] = record
+            seq += 1
+        self.end_seq = seq
+        evicted = max(0, self.end_seq - self.capacity - self.first_seq)
+        self.first_seq += evicted
+        return evicted
+
+    def get(self, seq):
+        """Record by sequence number, or None if evicted / not yet written."""
+        if self.first_seq <= seq < self.end_seq:
+            return self._slots[seq % self.capacity]
+        return None
+
+    def range(self, start_seq=None, end_seq=None):
+        """Records from start_seq (inclusive) to end_seq (exclusive), oldest first."""
+        start = max(self.first_seq, self.first_seq if start_seq is None else start_seq)
+        end = min(self.end_seq, self.end_seq if end_seq is None else end_seq)
+        if start >= end:
+            return []
+        slots, capacity = self._slots, self.capacity
+        head, tail = start % capacity, (end - 1) % capacity + 1
+        if head < tail:
+            return slots[head:tail]
+        return slots[head:] + slots[:tail] # Wrapped around the end of the ring
+
+    def snapshot(self):
+        """
+        (first_seq, records) copy of everything retained. Records are never
+        modified after parsing, so the list can be handed to another thread.
+        """
+        return self.first_seq, self.range()
+
+    def clear(self):
+        """Drop everything; sequence numbers keep counting."""
+        self._slots = [None] * self.capacity
+        self.first_seq = self.end_seq
+
+    @staticmethod
+    def write_lines(records, f):
+        """Write records to an open text file as their original logcat lines."""
+        for start in range(0, len(records), 4096):
+            f.write("\n".join(record.line for record in records[start:start + 4096]))
+            f.write("\n")
@@ -0,0 +1,245 @@
+import struct
+import sys
+import time
+from operator import add, itemgetter, sub
+
+from services.log_store import LogRecord
+
+# struct logger_entry: len, hdr_size (0 in v1), pid, tid, sec, nsec, then lid (v3) and uid (v4)
+ENTRY_HEADER = struct.Struct("<HHiIII")
+ENTRY_V3_HEADER = struct.Struct("<HHiIIII")
+ENTRY_V1_SIZE = 20
+
+NSEC_PER_SEC = 1000000000
+MILLIS = tuple(f".{millis:03d} " for millis in range(1000)) # Stamp suffix per millisecond
+
+PRIORITIES = {2: "V", 3: "D", 4: "I", 5: "W", 6: "E", 7: "F"}
+LOG_IDS = ("main", "radio", "events", "system", "crash", "stats", "security", "kernel")
+EVENT_LOG_IDS = {2, 5, 6} # events, stats, security carry binary event payloads
+
+EVENT_INT, EVENT_LONG, EVENT_STRING, EVENT_LIST, EVENT_FLOAT = range(5)
+INT32 = struct.Struct("<i")
+INT64 = struct.Struct("<q")
+FLOAT32 = struct.Struct("<f")
+
+EVENT_TAGS_COMMAND = "cat /system/etc/event-log-tags /vendor/etc/event-log-tags 2>/dev/null"
+
+
+def parse_event_tags(text):
+    """event-log-tags ("2718 e (rate|1)") -> {2718: "e"}."""
+    tags = {}
+    for line in text.splitlines():
+        parts = line.split(None, 2)
+        if len(parts) >= 2 and parts[0].isdigit():
+            tags[int(parts[0])] = sys.intern(parts[1])
+    return tags
+
+
+class _SecondStamps(dict):
+    """epoch second -> "MM-DD hh:mm:ss", formatted once per second."""
+    def __missing__(self, sec):
+        if len(self) > 64:
+            self.clear()
+        stamp = self[sec] = time.strftime("%m-%d %H:%M:%S", time.localtime(sec))
+        return stamp
+
+
+class _IdColumns(dict):
+    """(pid, tid) -> "  pid   tid " column."""
+    def __missing__(self, ids):
+        column = self[ids] = f"{ids[0]:5d} {ids[1]:5d} "
+        return column
+
+
+class _TagColumns(dict):
+    """priority char + tag -> (level, interned tag, "L tag     : " column)."""
+    def __missing__(self, key):
+        level = PRIORITIES.get(ord(key[0]), "V") if key else "V"
+        tag = sys.intern(key[1:])
+        columns = self[key] = (level, tag, f"{level} {tag:<8}: ")
+        return columns
+
+
+class BinaryLogDecoder:
+    """
+    Decodes `logcat -B` output (logger_entry v1-v4) into LogRecords.
+
+    Entries are length-prefixed, so nothing is regex-parsed and a message
+    containing newlines stays one record. Event buffers (events, stats,
+    security) are decoded from their typed payload, with tag numbers resolved
+    through event-log-tags. Each record also gets a `-v threadtime` style
+    line, so the view, filters and saved files treat both modes alike.
+
+    A chunk is decoded column-wise: one pass over the headers, then all text
+    payloads are sliced, joined and decoded at once and the line heads come
+    from per-second / per-thread / per-tag caches, so the per-entry Python
+    work stays below the text path's regex match. Chunks the bulk path cannot
+    take (v1/v2 headers, unterminated messages) are decoded entry by entry.
+    """
+    def __init__(self, event_tags=None):
+        """:param event_tags: {tag number: name}, see parse_event_tags()."""
+        self.event_tags = event_tags or {}
+        self._tail = b""
+        self._stamps = _SecondStamps()
+        self._ids = _IdColumns()
+        self._tags = _TagColumns()
+
+    def feed(self, data):
+        """
+        Decode a chunk of the stream; a partial last entry is kept for the next chunk.
+        :raises ValueError: The stream is not logger_entry records (lost framing).
+        """
+        buf = self._tail + data if self._tail else bytes(data)
+        headers, ends, off = self._frame(buf)
+        self._tail = buf[off:]
+        if not headers:
+            return []
+        records = self._decode_bulk(buf, headers, ends)
+        if records is None:
+            records = [self._decode_entry(buf, header, entry_end) for header, entry_end in zip(headers, ends)]
+        return records
+
+    def _frame(self, buf):
+        """
+        Split buf into entries.
+        :return: ([(len, hdr_size, pid, tid, sec, nsec, log_id)], [entry end offset], offset of the unread rest)
+        """
+        end = len(buf)
+        if end < ENTRY_V1_SIZE:
+            return [], [], 0
+        header_size = ENTRY_HEADER.unpack_from(buf)[1]
+        if header_size < ENTRY_V3_HEADER.size or header_size > 128:
+            return self._frame_checked(buf)
+        # Every entry of a stream has the same header size; it is checked once
+        # per chunk below instead of per entry
+        unpack = ENTRY_V3_HEADER.unpack_from
+        headers, ends = [], []
+        add_header, add_end = headers.append, ends.append
+        off = 0
+        limit = end - ENTRY_V3_HEADER.size
+        while off <= limit:
+            header = unpack(buf, off)
+            next_off = off + header_size + header[0]
+            if next_off > end:
+                break
+            off = next_off
+            add_header(header)
+            add_end(off)
+        if headers and set(map(itemgetter(1), headers)) != {header_size}:
+            return self._frame_checked(buf)
+        return headers, ends, off
+
+    @staticmethod
+    def _frame_checked(buf):
+        """_frame() for v1/v2 headers or mixed header sizes, validating every entry."""
+        end = len(buf)
+        headers, ends = [], []
+        off = 0
+        while off + ENTRY_V1_SIZE <= end:
+            if off + ENTRY_V3_HEADER.size <= end:
+                header = ENTRY_V3_HEADER.unpack_from(buf, off)
+            else: # Too short to hold a log id, so the entry is either v1/v2 or incomplete
+                header = ENTRY_HEADER.unpack_from(buf, off) + (0,)
+            length, header_size = header[0], header[1]
+            if header_size < ENTRY_V3_HEADER.size:
+                if header_size not in (0, ENTRY_V1_SIZE):
+                    raise ValueError(f"Corrupt logcat -B stream (header size {header_size})")
+                header_size = ENTRY_V1_SIZE
+                header = (length, header_size) + header[2:6] + (0,)
+            elif header_size > 128:
+                raise ValueError(f"Corrupt logcat -B stream (header size {header_size})")
+            next_off = off + header_size + length
+            if next_off > end:
+                break
+            off = next_off
+            headers.append(header)
+            ends.append(off)
+        return headers, ends, off
+
+    def _decode_bulk(self, buf, headers, ends):
+        """:return: The chunk's records, or None if it has to be decoded entry by entry."""
+        lengths, _, pids, tids, secs, nsecs, log_ids = zip(*headers)
+        if max(nsecs) >= NSEC_PER_SEC:
+            return None
+        payloads = list(map(buf.__getitem__, map(slice, map(sub, ends, lengths), ends)))
+        events = []
+        if not EVENT_LOG_IDS.isdisjoint(log_ids):
+            events = [i for i, log_id in enumerate(log_ids) if log_id in EVENT_LOG_IDS]
+            for i in events:
+                payloads[i] = b"\0\0" # Placeholder tag and message, replaced below
+        # priority byte, tag\0, message\0 per entry; one trailing "\n" of a message is dropped
+        parts = b"".join(payloads).decode("utf-8", "replace").replace("\n\0", "\0").split("\0")
+        if len(parts) != 2 * len(headers) + 1:
+            return None # A message without its terminator (or with a stray NUL)
+        levels, tags, columns = zip(*map(self._tags.__getitem__, parts[0::2]))
+        heads = list(map(add, map(add, map(add,
+                                           map(self._stamps.__getitem__, secs),
+                                           map(MILLIS.__getitem__, [nsec // 1000000 for nsec in nsecs])),
+                                  map(self._ids.__getitem__, zip(pids, tids))),
+                         columns))
+        records = list(map(LogRecord, [sec + nsec / 1e9 for sec, nsec in zip(secs, nsecs)], pids, tids,
+                           levels, tags, map(add, heads, parts[1::2]), map(len, heads)))
+        for i in events:
+            records[i] = self._decode_entry(buf, headers[i], ends[i])
+        return records
+
+    def _decode_entry(self, buf, header, entry_end):
+        length, _, pid, tid, sec, nsec, log_id = header
+        start = entry_end - length
+        if log_id in EVENT_LOG_IDS:
+            level = "I"
+            tag, message = self._decode_event(buf[start:entry_end])
+            column = f"I {tag:<8}: "
+        else:
+            # priority byte, tag\0, message\0
+            tag_end = buf.find(b"\0", start + 1, entry_end)
+            if tag_end < 0:
+                tag_end = start + 1 if length else start
+                message_start = tag_end
+            else:
+                message_start = tag_end + 1
+            level, tag, column = self._tags[buf[start:tag_end].decode("utf-8", "replace")]
+            message_end = entry_end - 1 if length and buf[entry_end - 1] == 0 else entry_end
+            if message_end > message_start and buf[message_end - 1] == 10: # trailing "\n"
+                message_end -= 1
+            message = buf[message_start:message_end].decode("utf-8", "replace")
+        millis = nsec // 1000000
+        head = f"{self._stamps[sec]}.{millis:03d} {self._ids[(pid, tid)]}{column}"
+        return LogRecord(sec + nsec / 1e9, pid, tid, level, tag, head + message, len(head))
+
+    def _decode_event(self, payload):
+        if len(payload) < 4:
+            return "", ""
+        number = INT32.unpack_from(payload)[0]
+        tag = self.event_tags.get(number) or str(number)
+        if len(payload) == 4:
+            return tag, ""
+        try:
+            value, _ = self._event_value(payload, 4)
+        except (struct.error, IndexError, ValueError):
+            value = f"<malformed event payload: {payload[4:].hex()}>"
+        return tag, value
+
+    def _event_value(self, payload, off):
+        """:return: (formatted value, offset after it)"""
+        kind = payload[off]
+        off += 1
+        if kind == EVENT_INT:
+            return str(INT32.unpack_from(payload, off)[0]), off + 4
+        if kind == EVENT_LONG:
+            return str(INT64.unpack_from(payload, off)[0]), off + 8
+        if kind == EVENT_FLOAT:
+            return f"{FLOAT32.unpack_from(payload, off)[0]:g}", off + 4
+        if kind == EVENT_STRING:
+            size = INT32.unpack_from(payload, off)[0]
+            off += 4
+            return payload[off:off + size].decode("utf-8", "replace"), off + size
+        if kind == EVENT_LIST:
+            count = payload[off]
+            off += 1
+            items = []
+            for _ in range(count):
+                item, off = self._event_value(payload, off)
+                items.append(item)
+            return "[" + ",".join(items) + "]", off
+        raise ValueError(f"Unknown event type {kind}")
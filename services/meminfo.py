@@ -0,0 +1,195 @@
+from collections import deque
+
+import numpy as np
+
+
+def _kb(field):
+    """:return: kB, or None for "N/A" (swap PSS not accounted)."""
+    return int(field) if field.isdigit() else None
+
+
+class MeminfoProcess:
+    """One `proc,<oom>,<name>,<pid>,<pss>,<swap pss>,<a|e>` row."""
+    __slots__ = ("name", "pid", "pss_kb", "swap_kb", "oom", "activities")
+
+    def __init__(self, name, pid, pss_kb, swap_kb, oom, activities):
+        self.name = name
+        self.pid = pid
+        self.pss_kb = pss_kb
+        self.swap_kb = swap_kb # None when the device does not report swap PSS
+        self.oom = oom # Bucket label ("fore", "cached", ...)
+        self.activities = activities # True: has activities ("a"), False: empty ("e")
+
+
+class MeminfoSnapshot:
+    """One `dumpsys meminfo -c` dump: processes and the system summary."""
+    __slots__ = ("version", "uptime_ms", "realtime_ms", "processes", "oom", "categories",
+                 "ram_total_kb", "ram_free_kb", "ram_used_kb", "lost_kb", "zram")
+
+    def __init__(self, version):
+        self.version = version
+        self.uptime_ms = self.realtime_ms = None
+        self.processes = [] # MeminfoProcess, in dump order (by oom bucket, then PSS)
+        self.oom = {} # bucket -> (pss kB, swap kB or None)
+        self.categories = {} # "Native", "Dalvik", ".so mmap", ... -> (pss kB, swap kB or None)
+        self.ram_total_kb = self.ram_free_kb = self.ram_used_kb = self.lost_kb = None
+        self.zram = None # (zram kB, swap total kB, swap free kB)
+
+    @property
+    def total_pss_kb(self):
+        return sum(pss for pss, _ in self.oom.values())
+
+
+def iter_meminfo(lines):
+    """
+    Stream `dumpsys meminfo -c` output into snapshots.
+    :param lines: Any iterable of lines, e.g. a file; several dumps in a row (or interleaved with other
+        lines, as in perf_monitor_dump.txt) each start at their "version," row.
+    :return: Generator of MeminfoSnapshot, each yielded once the next dump starts or the input ends.
+    """
+    snapshot = None
+    for line in lines:
+        kind, _, rest = line.rstrip("\r\n").partition(",")
+        if not rest:
+            continue
+        if kind == "version":
+            if snapshot is not None:
+                yield snapshot
+            snapshot = MeminfoSnapshot(int(rest) if rest.isdigit() else rest)
+            continue
+        if snapshot is None:
+            continue
+        fields = rest.split(",")
+        try:
+            if kind == "proc":
+                # proc,<oom>,<name>,<pid>,<pss>,<swap>,<a|e>; newer releases may add columns before the flag
+                flag = fields[-1]
+                snapshot.processes.append(MeminfoProcess(fields[1], int(fields[2]), int(fields[3]),
+                                                         _kb(fields[4]) if len(fields) > 5 else None,
+                                                         fields[0], flag == "a"))
+            elif kind == "oom":
+                snapshot.oom[fields[0]] = (int(fields[1]), _kb(fields[2]) if len(fields) > 2 else None)
+            elif kind == "cat":
+                snapshot.categories[fields[0]] = (int(fields[1]), _kb(fields[2]) if len(fields) > 2 else None)
+            elif kind == "time":
+                snapshot.uptime_ms, snapshot.realtime_ms = int(fields[0]), int(fields[1])
+            elif kind == "ram":
+                snapshot.ram_total_kb, snapshot.ram_free_kb, snapshot.ram_used_kb = (int(f) for f in fields[:3])
+            elif kind == "lostram":
+                snapshot.lost_kb = int(fields[0])
+            elif kind == "zram":
+                snapshot.zram = tuple(int(f) for f in fields[:3])
+        except (ValueError, IndexError):
+            continue # Truncated or unexpected row; the rest of the dump is still good
+    if snapshot is not None:
+        yield snapshot
+
+
+def parse_meminfo(text):
+    """:return: The last MeminfoSnapshot in `text`, None if it holds none (e.g. dumpsys failed)."""
+    snapshot = None
+    for snapshot in iter_meminfo(text.splitlines()):
+        pass
+    return snapshot
+
+
+class MeminfoHistory:
+    """
+    Per-process PSS/swap/oom history from successive meminfo snapshots,
+    keyed by (device, process name) so a restarted process keeps its
+    history. Each process keeps its last `capacity` samples; processes
+    not seen for `capacity` snapshots are dropped.
+    Events are kept for oom bucket moves, processes appearing or going
+    away (killed, or trimmed from the cached list) and pid changes.
+    Not thread-safe: add and read on one thread (the GUI thread).
+    """
+    def __init__(self, capacity=360, max_events=1000):
+        self.capacity = capacity
+        self.events = deque(maxlen=max_events) # (time, serial, name, pid, old oom, new oom); None = absent
+        self._samples = {} # (serial, name) -> deque of (time, pid, pss kB, swap kB, oom, activities)
+        self._seen = {} # (serial, name) -> snapshot count when last present
+        self._counts = {} # serial -> snapshots added
+
+    def add(self, serial, snapshot, time):
+        """
+        :param time: Epoch seconds the snapshot was taken.
+        :return: The events this snapshot caused.
+        """
+        count = self._counts.get(serial, 0) + 1
+        self._counts[serial] = count
+        events = []
+        present = set()
+        for proc in snapshot.processes:
+            key = (serial, proc.name)
+            if key in present:
+                continue # Two processes with one name (e.g. isolated services); the first, larger, one is kept
+            present.add(key)
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.capacity)
+            last = samples[-1] if samples else None
+            if last is None or self._seen[key] != count - 1:
+                if count > 1: # Not on the first snapshot: everything "appears" then
+                    events.append((time, serial, proc.name, proc.pid, None, proc.oom))
+            elif last[4] != proc.oom or last[1] != proc.pid:
+                events.append((time, serial, proc.name, proc.pid, last[4], proc.oom))
+            samples.append((time, proc.pid, proc.pss_kb, proc.swap_kb, proc.oom, proc.activities))
+            self._seen[key] = count
+        for key, seen in list(self._seen.items()):
+            if key[0] != serial or key in present:
+                continue
+            if seen == count - 1: # Present last time, gone now
+                last = self._samples[key][-1]
+                events.append((time, serial, key[1], last[1], last[4], None))
+            elif count - seen > self.capacity:
+                del self._samples[key], self._seen[key]
+        self.events.extend(events)
+        return events
+
+    def processes(self, serial):
+        return sorted(name for key_serial, name in self._samples if key_serial == serial)
+
+    def history(self, serial, name):
+        """:return: [(time, pid, pss kB, swap kB or None, oom, activities)], oldest first."""
+        return list(self._samples.get((serial, name), ()))
+
+    def growth(self, serial, min_samples=6, min_growth_kb=5120, min_correlation=0.8):
+        """
+        Processes whose PSS keeps rising: least-squares slope over the samples of their current pid, when
+        the rise over them is at least min_growth_kb and the fit is steady (correlation with time).
+        :return: [(name, kB per minute, growth kB, latest PSS kB)], steepest first.
+        """
+        suspects = []
+        for (key_serial, name), samples in self._samples.items():
+            if key_serial != serial or len(samples) < min_samples:
+                continue
+            pid = samples[-1][1]
+            if samples[0][1] == pid: # Usual case: one pid throughout, so the rise check needs no scan
+                if samples[-1][2] - samples[0][2] < min_growth_kb:
+                    continue
+                rows = samples
+            else:
+                rows = [sample for sample in samples if sample[1] == pid]
+                if len(rows) < min_samples or rows[-1][2] - rows[0][2] < min_growth_kb:
+                    continue
+            times = np.fromiter((row[0] for row in rows), np.float64, len(rows))
+            pss = np.fromiter((row[2] for row in rows), np.float64, len(rows))
+            times -= times.mean()
+            pss -= pss.mean()
+            spread = float(np.dot(times, times)) * float(np.dot(pss, pss))
+            if spread <= 0:
+                continue
+            covariance = float(np.dot(times, pss))
+            if covariance / spread ** 0.5 < min_correlation:
+                continue
+            slope = covariance / float(np.dot(times, times)) * 60 # Least squares, kB per minute
+            suspects.append((name, slope, float(rows[-1][2] - rows[0][2]), float(rows[-1][2])))
+        return sorted(suspects, key=lambda suspect: -suspect[1])
+
+    def clear(self, serial=None):
+        for key in [key for key in self._samples if serial is None or key[0] == serial]:
+            del self._samples[key], self._seen[key]
+        if serial is None:
+            self._counts.clear()
+        else:
+            self._counts.pop(serial, None)
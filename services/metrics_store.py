@@ -0,0 +1,290 @@
+import numpy as np
+
+ROLLUP_MIN, ROLLUP_MAX, ROLLUP_MEAN, ROLLUP_COUNT = range(4)
+
+
+class MetricRing:
+    """
+    Preallocated ring of (int64 ms timestamps, float32 value columns).
+    Rows are appended in time order; once full the oldest are overwritten.
+    Times within the ring are sorted, so a window is two binary searches
+    (one per physical segment) and a copy of only the rows inside it.
+    """
+    __slots__ = ("capacity", "times", "values", "end")
+
+    def __init__(self, capacity, columns=1):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, columns) if columns > 1 else capacity, dtype=np.float32)
+        self.end = 0 # Rows ever appended; the newest is at (end - 1) % capacity
+
+    def __len__(self):
+        return min(self.end, self.capacity)
+
+    def append(self, time_ms, value):
+        index = self.end % self.capacity
+        self.times[index] = time_ms
+        self.values[index] = value
+        self.end += 1
+
+    @property
+    def first_time(self):
+        """Oldest retained timestamp (ms), None if empty."""
+        if not self.end:
+            return None
+        return int(self.times[self.end % self.capacity if self.end > self.capacity else 0])
+
+    @property
+    def last_time(self):
+        return int(self.times[(self.end - 1) % self.capacity]) if self.end else None
+
+    @property
+    def last_value(self):
+        return self.values[(self.end - 1) % self.capacity] if self.end else None
+
+    def _segments(self):
+        """Physical (start, stop) slices holding the rows oldest first."""
+        if self.end <= self.capacity:
+            return ((0, self.end),)
+        head = self.end % self.capacity
+        return ((head, self.capacity), (0, head)) if head else ((0, self.capacity),)
+
+    def window(self, start_ms=None, end_ms=None, copy=True):
+        """
+        :param copy: False returns views into the ring when the rows are contiguous, valid until the next append.
+        :return: (times, values) of the rows with start_ms <= time <= end_ms, oldest first.
+        """
+        times, values = [], []
+        for lo, hi in self._segments():
+            segment = self.times[lo:hi]
+            a = lo + (0 if start_ms is None else int(np.searchsorted(segment, start_ms, "left")))
+            b = hi if end_ms is None else lo + int(np.searchsorted(segment, end_ms, "right"))
+            if a < b:
+                times.append(self.times[a:b])
+                values.append(self.values[a:b])
+        if not times:
+            return self.times[:0].copy(), self.values[:0].copy()
+        if len(times) == 1:
+            return (times[0].copy(), values[0].copy()) if copy else (times[0], values[0])
+        return np.concatenate(times), np.concatenate(values)
+
+
+class MetricSeries:
+    """
+    History of one metric in two bounded tiers: every sample for the last
+    `raw_capacity` samples, and min/max/mean/count per `rollup_ms` bucket
+    for `rollup_capacity` buckets (the whole session). A window query reads
+    the rollups only for the part older than the raw tier still covers.
+    Appends are O(1): the open bucket is accumulated in plain floats and
+    written to the rollup ring when a sample falls past its end.
+    """
+    __slots__ = ("raw", "rollup", "rollup_ms", "_bucket", "_lo", "_hi", "_sum", "_count")
+
+    def __init__(self, raw_capacity, rollup_capacity, rollup_ms):
+        self.raw = MetricRing(raw_capacity)
+        self.rollup = MetricRing(rollup_capacity, 4)
+        self.rollup_ms = rollup_ms
+        self._bucket = None # Start (ms) of the open bucket
+        self._lo = self._hi = self._sum = 0.0
+        self._count = 0
+
+    def append(self, time_ms, value):
+        if time_ms < (self.raw.last_time or time_ms):
+            return # Out of order (e.g. the host clock stepped back); the rings must stay sorted
+        self.raw.append(time_ms, value)
+        bucket = time_ms - time_ms % self.rollup_ms
+        if bucket != self._bucket:
+            self._close_bucket()
+            self._bucket, self._lo, self._hi, self._sum, self._count = bucket, value, value, 0.0, 0
+        elif value < self._lo:
+            self._lo = value
+        elif value > self._hi:
+            self._hi = value
+        self._sum += value
+        self._count += 1
+
+    def _close_bucket(self):
+        if self._count:
+            self.rollup.append(self._bucket, (self._lo, self._hi, self._sum / self._count, self._count))
+            self._count = 0
+
+    @property
+    def first_time(self):
+        firsts = [first for first in (self.rollup.first_time, self.raw.first_time) if first is not None]
+        return min(firsts) if firsts else None
+
+    @property
+    def last_time(self):
+        return self.raw.last_time
+
+    @property
+    def last_value(self):
+        value = self.raw.last_value
+        return None if value is None else float(value)
+
+    @property
+    def nbytes(self):
+        return sum(ring.times.nbytes + ring.values.nbytes for ring in (self.raw, self.rollup))
+
+    def window(self, start_ms=None, end_ms=None, copy=True):
+        """
+        :param copy: See MetricRing.window().
+        :return: (times, lo, hi, mean, count) arrays, oldest first. Raw samples have lo == hi == mean and
+            count 1; older parts of the window come from the rollups (times are bucket starts).
+        """
+        raw_first = self.raw.first_time
+        times, values = self.raw.window(start_ms, end_ms, copy)
+        ones = np.broadcast_to(np.float32(1), len(times)) # Read-only, no allocation
+        if raw_first is None or (start_ms is not None and start_ms >= raw_first):
+            return times, values, values, values, ones
+        # Older than the raw tier: rollups up to (not including) the bucket the raw tier starts in
+        older_end = raw_first - raw_first % self.rollup_ms - 1
+        if end_ms is not None:
+            older_end = min(older_end, end_ms)
+        rollup_times, rollups = self.rollup.window(start_ms, older_end)
+        if not len(rollup_times):
+            return times, values, values, values, ones
+        # The bucket the raw tier starts in is left to the raw samples (its rollup also counts evicted ones)
+        return (np.concatenate((rollup_times, times)),
+                np.concatenate((rollups[:, ROLLUP_MIN], values)), np.concatenate((rollups[:, ROLLUP_MAX], values)),
+                np.concatenate((rollups[:, ROLLUP_MEAN], values)), np.concatenate((rollups[:, ROLLUP_COUNT], ones)))
+
+
+def minmax_downsample(times, lo, hi, start_ms, end_ms, buckets):
+    """
+    Min/max per equal time bucket (e.g. one per pixel column): a line drawn
+    through the result shows every spike the full data has.
+    :return: (bucket times, mins, maxs) for the non-empty buckets.
+    """
+    if not len(times) or buckets <= 0:
+        return times[:0], lo[:0], hi[:0]
+    width = max(1, (end_ms - start_ms) / buckets)
+    edges = np.searchsorted(times, start_ms + width * np.arange(buckets))
+    starts = np.unique(edges[edges < len(times)])
+    return times[starts], np.minimum.reduceat(lo, starts), np.maximum.reduceat(hi, starts)
+
+
+def lttb_downsample(times, values, points):
+    """
+    Largest-Triangle-Three-Buckets: keeps `points` samples that preserve the
+    visual shape of the series (first and last always kept).
+    :return: (times, values)
+    """
+    n = len(times)
+    if points >= n or points < 3:
+        return times, values
+    x = times.astype(np.float64)
+    y = values.astype(np.float64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64) # points - 2 inner buckets
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        # Third corner: the mean of the next bucket (the last point for the last bucket)
+        next_hi = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_lo = hi if bucket + 2 < len(edges) else n - 1
+        cx, cy = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        ax, ay = x[previous], y[previous]
+        areas = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        previous = lo + int(areas.argmax()) if hi > lo else lo
+        selected[bucket + 1] = previous
+    return times[selected], values[selected]
+
+
+class MetricsStore:
+    """
+    Bounded in-memory time series for performance metrics, one MetricSeries
+    per (device, metric), filled from PerformanceThread samples.
+    Memory is fixed per series when it is created (rings are preallocated),
+    so a 24 h run at 10 Hz costs the same as a 5 minute one; statistics and
+    downsampling are vectorized over the window's arrays.
+    Not thread-safe: append and read on one thread (the GUI thread).
+    """
+    def __init__(self, raw_capacity, rollup_capacity, rollup_ms):
+        """
+        :param raw_capacity: Samples kept at full resolution per series.
+        :param rollup_capacity: min/max/mean buckets kept per series (the rest of the history).
+        :param rollup_ms: Bucket width.
+        """
+        self.raw_capacity = raw_capacity
+        self.rollup_capacity = rollup_capacity
+        self.rollup_ms = rollup_ms
+        self._series = {}
+
+    def append(self, serial, time, metrics):
+        """
+        :param time: Epoch seconds of the sample.
+        :param metrics: {metric: number}
+        """
+        time_ms = int(time * 1000)
+        series = self._series
+        for metric, value in metrics.items():
+            key = (serial, metric)
+            entry = series.get(key)
+            if entry is None:
+                entry = series[key] = MetricSeries(self.raw_capacity, self.rollup_capacity, self.rollup_ms)
+            entry.append(time_ms, value)
+
+    def series(self, serial, metric):
+        return self._series.get((serial, metric))
+
+    def metrics(self, serial=None):
+        """Known (serial, metric) keys, sorted."""
+        return sorted(key for key in self._series if serial is None or key[0] == serial)
+
+    @property
+    def nbytes(self):
+        return sum(series.nbytes for series in self._series.values())
+
+    def window(self, serial, metric, start=None, end=None, copy=True):
+        """:return: MetricSeries.window() arrays for epoch seconds start..end (None = open), or None."""
+        series = self._series.get((serial, metric))
+        if series is None:
+            return None
+        return series.window(None if start is None else int(start * 1000), None if end is None else int(end * 1000),
+                             copy)
+
+    def stats(self, serial, metric, start=None, end=None, percentiles=(50, 95, 99)):
+        """
+        :return: {"count", "min", "max", "mean", "p50", ...} over the window, None if it has no samples.
+            Over rollups, percentiles are of bucket means weighted by sample count.
+        """
+        window = self.window(serial, metric, start, end)
+        if window is None or not len(window[0]):
+            return None
+        _, lo, hi, mean, count = window
+        total = float(count.sum())
+        stats = {"count": int(total), "min": float(lo.min()), "max": float(hi.max()),
+                 "mean": float(np.dot(mean.astype(np.float64), count) / total)}
+        if percentiles:
+            if len(mean) == total: # All raw
+                values = np.percentile(mean, percentiles)
+            else:
+                values = np.percentile(mean, percentiles, weights=count, method="inverted_cdf")
+            stats.update((f"p{q:g}", float(value)) for q, value in zip(percentiles, values))
+        return stats
+
+    def downsample(self, serial, metric, start, end, points, method="minmax"):
+        """
+        The window reduced to about `points` for display.
+        :param method: "minmax" -> (times, mins, maxs) per bucket; "lttb" -> (times, values, values).
+        :return: Arrays with times in epoch ms, or None for an unknown series.
+        """
+        # minmax always builds new arrays, so it can reduce straight from the ring; lttb may return its input
+        window = self.window(serial, metric, start, end, copy=method == "lttb")
+        if window is None:
+            return None
+        times, lo, hi, mean, _ = window
+        if method == "lttb":
+            times, values = lttb_downsample(times, mean, points)
+            return times, values, values
+        if not len(times):
+            return times, lo, hi
+        start_ms = int(times[0]) if start is None else int(start * 1000)
+        end_ms = int(times[-1]) + 1 if end is None else int(end * 1000)
+        return minmax_downsample(times, lo, hi, start_ms, end_ms, points)
+
+    def clear(self, serial=None):
+        for key in [key for key in self._series if serial is None or key[0] == serial]:
+            del self._series[key]
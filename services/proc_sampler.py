@@ -0,0 +1,137 @@
+THERMAL_GLOB = "/sys/class/thermal/thermal_zone*"
+PRESSURE_RESOURCES = ("cpu", "memory", "io")
+SAMPLE_FILES = ("/proc/uptime", "/proc/stat", "/proc/meminfo", "/proc/loadavg",
+                *(f"/proc/pressure/{resource}" for resource in PRESSURE_RESOURCES))
+# One toybox grep prints every line of every file prefixed with its path: a single short-lived process per
+# sample, and output that says where each line came from whatever files are missing (-s: no PSI on older
+# kernels, unreadable zones). intr/softirq are thousands of per-IRQ counters nothing here uses.
+SAMPLE_COMMAND = "grep -sHv -e '^intr' -e '^softirq' " + " ".join(SAMPLE_FILES) + f" {THERMAL_GLOB}/temp"
+ZONES_COMMAND = f"grep -sH '' {THERMAL_GLOB}/type" # Zone names, read once
+
+MEMINFO_FIELDS = {"MemTotal": "mem.total_kb", "MemAvailable": "mem.available_kb", "MemFree": "mem.free_kb",
+                  "Cached": "mem.cached_kb", "SwapTotal": "mem.swap_total_kb"}
+CPU_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+
+def parse_sample(output):
+    """
+    SAMPLE_COMMAND output -> raw counters:
+    {"uptime", "cpu": {name: [jiffies]}, "ctxt", "procs_running", "procs_blocked", "mem": {field: kB},
+     "load": (1, 5, 15), "psi": {(resource, "some"|"full"): total us}, "temp": {zone: raw value}}
+    """
+    raw = {"cpu": {}, "mem": {}, "psi": {}, "temp": {}}
+    for line in output.splitlines():
+        path, sep, value = line.partition(":")
+        if not sep:
+            continue
+        try:
+            if path == "/proc/stat":
+                if value.startswith("cpu"):
+                    name, *fields = value.split()
+                    raw["cpu"][name] = [int(field) for field in fields[:len(CPU_FIELDS)]]
+                elif value.startswith(("ctxt", "procs_")):
+                    key, number = value.split()
+                    raw[key] = int(number)
+            elif path == "/proc/meminfo":
+                key, _, rest = value.partition(":")
+                raw["mem"][key] = int(rest.split()[0])
+            elif path == "/proc/uptime":
+                raw["uptime"] = float(value.split()[0])
+            elif path == "/proc/loadavg":
+                raw["load"] = tuple(float(part) for part in value.split()[:3])
+            elif path.startswith("/proc/pressure/"):
+                # "some avg10=1.23 avg60=0.50 avg300=0.10 total=123456"
+                kind, _, fields = value.partition(" ")
+                total = fields.rsplit("total=", 1)[1]
+                raw["psi"][(path[15:], kind)] = int(total)
+            elif path.endswith("/temp"):
+                raw["temp"][path.rsplit("/", 2)[-2]] = int(value)
+        except (ValueError, IndexError):
+            continue # Torn or unexpected line; the rest of the sample is still good
+    return raw
+
+
+def parse_zones(output):
+    """ZONES_COMMAND output -> {"thermal_zone0": "cpu-0-0-usr", ...}"""
+    zones = {}
+    for line in output.splitlines():
+        path, sep, value = line.partition(":")
+        if sep and value.strip():
+            zones[path.rsplit("/", 2)[-2]] = value.strip()
+    return zones
+
+
+class ProcSampler:
+    """
+    System-wide device metrics from /proc in one adb round trip per sample.
+
+    Replaces polling `top`, `dumpsys meminfo` and `dumpsys battery`, which
+    cost the device far more CPU than what they report on. The device only
+    prints raw counters (SAMPLE_COMMAND); everything that needs two samples
+    (CPU %, context switches/s, PSI stall %) is computed here from the
+    deltas, over the device's own uptime so adb latency does not skew rates.
+    """
+    def __init__(self, zones=None):
+        """:param zones: {zone: type} from parse_zones(); zones without one are named by number."""
+        self.zones = dict(zones or {})
+        self._last = None
+
+    def reset(self):
+        self._last = None
+
+    def update(self, output):
+        """
+        Feed one SAMPLE_COMMAND output.
+        :return: {metric: value}, flat and numeric. Delta metrics (cpu.*, ctxt.per_s, psi.*) appear from
+            the second sample on; None if the output held no samples at all (e.g. the command failed).
+        """
+        raw = parse_sample(output)
+        if "uptime" not in raw:
+            return None
+        metrics = {}
+        mem = raw["mem"]
+        for field, name in MEMINFO_FIELDS.items():
+            if field in mem:
+                metrics[name] = mem[field]
+        if "MemTotal" in mem and "MemAvailable" in mem:
+            metrics["mem.used_kb"] = mem["MemTotal"] - mem["MemAvailable"]
+        if "SwapTotal" in mem and "SwapFree" in mem:
+            metrics["mem.swap_used_kb"] = mem["SwapTotal"] - mem["SwapFree"]
+        if "load" in raw:
+            metrics["load.1"], metrics["load.5"], metrics["load.15"] = raw["load"]
+        for key in ("procs_running", "procs_blocked"):
+            if key in raw:
+                metrics[key.replace("_", ".")] = raw[key]
+        for zone, value in raw["temp"].items():
+            # Millidegrees almost everywhere; a few drivers report whole degrees
+            name = self.zones.get(zone, zone)
+            metrics[f"thermal.{name}"] = value / 1000 if abs(value) >= 1000 else float(value)
+
+        last, self._last = self._last, raw
+        elapsed = raw["uptime"] - last["uptime"] if last else 0
+        if elapsed <= 0: # First sample, or the device rebooted
+            return metrics
+        for name, jiffies in raw["cpu"].items():
+            before = last["cpu"].get(name)
+            if not before or len(before) != len(jiffies):
+                continue # Core came online in between
+            delta = [now - then for now, then in zip(jiffies, before)]
+            total = sum(delta)
+            if total <= 0:
+                continue
+            idle = delta[3] + (delta[4] if len(delta) > 4 else 0)
+            if name == "cpu":
+                metrics["cpu.total"] = 100 * (total - idle) / total
+                for index, field in ((0, "user"), (2, "system"), (4, "iowait"), (5, "irq")):
+                    if index < len(delta):
+                        metrics[f"cpu.{field}"] = 100 * delta[index] / total
+            else:
+                metrics[f"cpu.core{name[3:]}"] = 100 * (total - idle) / total
+        if "ctxt" in raw and "ctxt" in last:
+            metrics["ctxt.per_s"] = (raw["ctxt"] - last["ctxt"]) / elapsed
+        for (resource, kind), total in raw["psi"].items():
+            before = last["psi"].get((resource, kind))
+            if before is not None:
+                # Share of the interval some/all tasks were stalled on the resource
+                metrics[f"psi.{resource}.{kind}"] = min(100.0, (total - before) / (elapsed * 1e4))
+        return metrics
@@ -0,0 +1,172 @@
+CLK_TCK = 100 # USER_HZ; fixed at 100 on Linux/Android whatever the kernel's HZ
+RESOLVE_COMMAND = "ps -A -o pid,args"
+# stat is the only line starting with a digit in these files (bar the smaps_rollup header, ignored by path)
+PROCESS_FIELDS = ("VmRSS", "VmSwap", "Threads", "Pss")
+GREP_COMMAND = "grep -sH -e '^[0-9]' " + " ".join(f"-e '^{field}:'" for field in PROCESS_FIELDS)
+# Shell builtins only: the glob expands in the shell, $# is the fd count. Unreadable fd dirs print nothing.
+FD_COMMAND = 'for p in {pids}; do set -- /proc/$p/fd/*; [ -L "$1" ] && echo "/proc/$p/fd:$#"; done'
+
+
+def parse_processes(output):
+    """
+    ProcessSampler.command() output -> ({pid: {"stat": [fields after comm], "VmRSS": kB, ..., "fds": n}},
+    first /proc/uptime, [(pid, args)] ps rows).
+    """
+    procs, rows = {}, []
+    uptime = None
+    for line in output.splitlines():
+        if not line.startswith("/proc/"):
+            pid, _, args = line.strip().partition(" ")
+            if pid.isdigit():
+                rows.append((int(pid), args.strip()))
+            continue
+        path, _, value = line.partition(":")
+        parts = path.split("/")
+        try:
+            if len(parts) == 3 and parts[2] == "uptime":
+                if uptime is None:
+                    uptime = float(value.split()[0])
+            elif len(parts) == 4 and parts[2].isdigit():
+                proc = procs.setdefault(int(parts[2]), {})
+                kind = parts[3]
+                if kind == "stat":
+                    proc["stat"] = value.rsplit(")", 1)[1].split() # comm may hold spaces and ")"
+                elif kind == "fd":
+                    proc["fds"] = int(value)
+                else: # status / smaps_rollup: "VmRSS:\t  1234 kB"
+                    key, _, rest = value.partition(":")
+                    proc[key] = int(rest.split()[0])
+        except (ValueError, IndexError):
+            continue # Torn line (process exiting while read)
+    return procs, uptime, rows
+
+
+class ProcessSampler:
+    """
+    Per-package CPU, memory, threads and fds, from /proc/<pid> of every
+    process of the target packages in one batched shell command per tick.
+
+    Each package's processes (the package itself and its ":name"
+    processes, or a native binary by name) are resolved with `ps` and
+    re-resolved when one disappears or its start time changes (pid reuse),
+    with a short backoff until it is back, and every `resolve_interval`
+    to pick up new ones. Per tick one
+    grep prints the few needed lines of stat and status (and smaps_rollup
+    for PSS, at most every `pss_interval`: the kernel walks the whole
+    address space for it), and a builtin-only loop counts fds.
+    Metrics are summed per package: proc.<package>.cpu (% of one core),
+    .rss_kb, .pss_kb, .swap_kb, .threads, .fds, .procs and .restarts.
+    PSS and fds need a root (userdebug) shell for other apps; without one
+    they are left out.
+    """
+    def __init__(self, packages=(), pss_interval=1.0, resolve_interval=5.0):
+        """:param pss_interval, resolve_interval: Seconds."""
+        self.pss_interval = pss_interval
+        self.resolve_interval = resolve_interval
+        self.set_packages(packages)
+
+    def set_packages(self, packages):
+        """Replace the targets and forget all per-process state."""
+        self.packages = tuple(packages)
+        self.pids = {} # pid -> (package, process name)
+        self.restarts = dict.fromkeys(self.packages, 0)
+        self._names = {} # process name -> last pid seen, to tell a restart from a new process
+        self._last = {} # pid -> (starttime, cpu ticks, uptime)
+        self._resolve_at = self._pss_at = self._tick = 0.0
+        self._backoff = 0.5 # Resolve delay while a process that was seen is missing (restarting)
+        self._resolving = self._reading_pss = False
+
+    def _package(self, args):
+        name = args.split(" ", 1)[0]
+        base = name.rsplit("/", 1)[-1]
+        for package in self.packages:
+            if name == package or name.startswith(package + ":") or base == package:
+                return package, name
+        return None
+
+    def command(self, now):
+        """
+        :param now: time.monotonic(); decides whether this tick resolves pids and reads PSS.
+        :return: Shell command for this tick ("" without targets). update() also needs a /proc/uptime line
+            in the same output, which SAMPLE_COMMAND prints.
+        """
+        if not self.packages:
+            return ""
+        parts = []
+        pids = sorted(self.pids)
+        self._tick = now
+        self._reading_pss = bool(pids) and now >= self._pss_at
+        if pids:
+            files = " ".join(f"/proc/{pid}/stat /proc/{pid}/status" for pid in pids)
+            if self._reading_pss:
+                files += " " + " ".join(f"/proc/{pid}/smaps_rollup" for pid in pids)
+            parts.append(f"{GREP_COMMAND} {files}")
+            parts.append(FD_COMMAND.format(pids=" ".join(map(str, pids))))
+        self._resolving = now >= self._resolve_at
+        if self._resolving:
+            parts.append(RESOLVE_COMMAND)
+        return "; ".join(parts)
+
+    def update(self, output):
+        """
+        Feed the output of this tick's command(). A tick whose output was lost is simply not fed;
+        its resolve/PSS read is then repeated on the next one.
+        :return: {metric: value}; cpu appears from a process's second sample on.
+        """
+        if not self.packages:
+            return {}
+        procs, uptime, rows = parse_processes(output)
+        if self._reading_pss:
+            self._pss_at = self._tick + self.pss_interval
+        totals = {package: {"procs": 0} for package in self.packages}
+        for pid, (package, _) in list(self.pids.items()):
+            proc = procs.get(pid)
+            stat = proc and proc.get("stat")
+            if (not stat or len(stat) < 20 or stat[0] in ("Z", "X")
+                    or (pid in self._last and self._last[pid][0] != stat[19])):
+                # Exited (or a zombie), or the pid now belongs to another process: look again next tick
+                del self.pids[pid]
+                self._last.pop(pid, None)
+                self._resolve_at = 0.0
+                continue
+            total = totals[package]
+            total["procs"] += 1
+            ticks = int(stat[11]) + int(stat[12]) # utime + stime
+            last = self._last.get(pid)
+            if last and uptime and uptime > last[2]:
+                total["cpu"] = total.get("cpu", 0.0) + 100 * (ticks - last[1]) / CLK_TCK / (uptime - last[2])
+            if uptime:
+                self._last[pid] = (stat[19], ticks, uptime)
+            for field, name in (("VmRSS", "rss_kb"), ("VmSwap", "swap_kb"), ("Threads", "threads"), ("fds", "fds")):
+                if field in proc:
+                    total[name] = total.get(name, 0) + proc[field]
+            if self._reading_pss and "Pss" in proc:
+                total["pss_kb"] = total.get("pss_kb", 0) + proc["Pss"]
+        if self._resolving: # This tick's ps already shows what replaced the ones that exited
+            self._resolve(rows)
+        metrics = {}
+        for package, total in totals.items():
+            total["restarts"] = self.restarts[package]
+            metrics.update((f"proc.{package}.{name}", value) for name, value in total.items())
+        return metrics
+
+    def _resolve(self, rows):
+        pids = {}
+        for pid, args in rows:
+            match = self._package(args)
+            if match:
+                pids[pid] = match
+        for pid, (package, name) in pids.items():
+            previous = self._names.get(name)
+            if previous is not None and previous != pid and previous not in pids:
+                self.restarts[package] += 1
+            self._names[name] = pid
+        self.pids = pids
+        self._last = {pid: last for pid, last in self._last.items() if pid in pids}
+        if any(pid not in pids for pid in self._names.values()):
+            # Something exited and is not back yet: look again soon (0.5, 1, 2 s...) to catch the restart
+            self._resolve_at = self._tick + min(self._backoff, self.resolve_interval)
+            self._backoff *= 2
+        else:
+            self._resolve_at = self._tick + self.resolve_interval
+            self._backoff = 0.5
@@ -0,0 +1,164 @@
+import re
+import threading
+import time
+
+from core.adb_constants import AdbCommands
+
+BOOT_ID_COMMAND = ("cat /proc/sys/kernel/random/boot_id 2>/dev/null || getprop ro.boot.bootreason; "
+                   "cut -d' ' -f1 /proc/uptime")
+
+
+class QueryCache:
+    """
+    Cache for read-only device queries, keyed by (serial, boot id, command).
+
+    Commands are sorted into classes by pattern, each with its own TTL
+    (None = valid for the whole boot). The boot id (/proc/sys/kernel/random/boot_id,
+    falling back to ro.boot.bootreason) is re-checked at most every
+    BOOT_CHECK_INTERVAL seconds; a new id or a smaller uptime drops everything
+    cached for that device. Reboots and package installs issued through
+    AdbWrapper invalidate immediately.
+    """
+    # (class, pattern, ttl seconds)
+    RULES = [
+        ("ro_props", re.compile(rf"getprop ro\.\S+|{re.escape(AdbCommands.RO_PROPS)}"), None),
+        ("kernel", re.compile(rf"uname\b.*|{re.escape(AdbCommands.MEM_TOTAL)}"), None),
+        ("hal", re.compile(r".*\blshal\b.*IVehicle.*"), None),
+        ("display", re.compile(r"wm (size|density)"), 300),
+        ("packages", re.compile(r"(cmd package query-activities|pm list packages)\b.*"), 600),
+    ]
+    PACKAGE_CHANGE = re.compile(r"\b(pm|cmd package) (install|uninstall|enable|disable)\b")
+    REBOOT = re.compile(r"(svc power )?reboot\b.*")
+    BOOT_CHECK_INTERVAL = 15.0
+
+    def __init__(self, adb):
+        """
+        :param adb: AdbWrapper used to read the boot id.
+        """
+        self.adb = adb
+        self._entries = {} # (serial, boot_id, command) -> (class, stored_at, result)
+        self._boots = {} # serial -> (boot_id, uptime, checked_at)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def classify(self, command):
+        """:return: (class, ttl) for cacheable commands, else None."""
+        command = command.strip()
+        if "\n" in command:
+            return None # Scripts are never cached as a whole
+        for name, pattern, ttl in self.RULES:
+            if pattern.fullmatch(command):
+                return name, ttl
+        return None
+
+    # --- Lookup ---
+    def get(self, serial, command):
+        """Cached result for a command, or None (also None for uncacheable commands)."""
+        rule = self.classify(command)
+        if not rule:
+            return None
+        name, ttl = rule
+        boot_id = self.boot_id(serial)
+        with self._lock:
+            entry = self._entries.get((serial, boot_id, command.strip()))
+            if entry and (ttl is None or time.monotonic() - entry[1] < ttl):
+                self._count(name, "hits")
+                return entry[2]
+            self._count(name, "misses")
+        return None
+
+    def put(self, serial, command, result):
+        """Store a successful result of a cacheable command."""
+        rule = self.classify(command)
+        if not rule or result[2] != 0:
+            return
+        boot_id = self.boot_id(serial)
+        with self._lock:
+            self._entries[(serial, boot_id, command.strip())] = (rule[0], time.monotonic(), result)
+
+    def fetch(self, serial, command, run):
+        """Return the cached result or call run() and cache what it returns."""
+        result = self.get(serial, command)
+        if result is None:
+            result = run()
+            self.put(serial, command, result)
+        return result
+
+    def observe(self, serial, command):
+        """Hook for every executed shell command; catches reboots and package changes done via shell."""
+        command = command.strip()
+        if self.REBOOT.fullmatch(command):
+            self.on_reboot(serial)
+        elif self.PACKAGE_CHANGE.search(command):
+            self.on_package_change(serial)
+
+    # --- Boot Tracking ---
+    def boot_id(self, serial):
+        """Current boot id for `serial`, re-validated at most every BOOT_CHECK_INTERVAL."""
+        with self._lock:
+            known = self._boots.get(serial)
+        now = time.monotonic()
+        if known and now - known[2] < self.BOOT_CHECK_INTERVAL:
+            return known[0]
+
+        out, _, code = self.adb.shell(serial, BOOT_ID_COMMAND)
+        lines = out.split()
+        if code != 0 or len(lines) < 2:
+            return known[0] if known else None
+        boot_id = lines[0]
+        try:
+            uptime = float(lines[-1])
+        except ValueError:
+            uptime = 0.0
+        if known and (boot_id != known[0] or uptime < known[1]):
+            self.invalidate(serial)
+            if boot_id == known[0]:
+                # Same id but the clock went backwards: still a new boot
+                boot_id = f"{boot_id}@{now:.0f}"
+        with self._lock:
+            self._boots[serial] = (boot_id, uptime, now)
+        return boot_id
+
+    def forget_boot(self, serial):
+        """Force a boot id re-check on the next lookup (e.g. after a reconnect)."""
+        with self._lock:
+            self._boots.pop(serial, None)
+
+    # --- Invalidation ---
+    def invalidate(self, serial=None, cache_class=None):
+        """Drop entries for one device and/or one command class (None = all)."""
+        with self._lock:
+            for key in [k for k, v in self._entries.items()
+                        if (serial is None or k[0] == serial) and (cache_class is None or v[0] == cache_class)]:
+                del self._entries[key]
+                self._count(self._class_of(key), "invalidated")
+
+    def on_reboot(self, serial):
+        self.invalidate(serial)
+        self.forget_boot(serial)
+
+    def on_package_change(self, serial):
+        self.invalidate(serial, "packages")
+
+    # --- Stats ---
+    def _class_of(self, key):
+        rule = self.classify(key[2])
+        return rule[0] if rule else "?"
+
+    def _count(self, name, field):
+        stat = self._stats.setdefault(name, {"hits": 0, "misses": 0, "invalidated": 0})
+        stat[field] += 1
+
+    def stats(self):
+        """Hit/miss counts and hit rate per command class plus a total."""
+        with self._lock:
+            result = {name: dict(stat) for name, stat in self._stats.items()}
+            entries = len(self._entries)
+        hits = sum(s["hits"] for s in result.values())
+        misses = sum(s["misses"] for s in result.values())
+        for stat in result.values():
+            lookups = stat["hits"] + stat["misses"]
+            stat["hit_rate"] = round(stat["hits"] / lookups, 3) if lookups else 0.0
+        result["total"] = {"hits": hits, "misses": misses, "entries": entries,
+                           "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0}
+        return result
@@ -0,0 +1,148 @@
+import os
+import struct
+import time
+
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, Signal
+from PySide6.QtGui import QImage
+
+# screencap raw pixel formats (android PixelFormat) -> (bytes per pixel, QImage format)
+PIXEL_FORMATS = {
+    1: (4, QImage.Format_RGBA8888), # RGBA_8888
+    2: (4, QImage.Format_RGBX8888), # RGBX_8888
+    3: (3, QImage.Format_RGB888), # RGB_888
+    4: (2, QImage.Format_RGB16), # RGB_565
+    5: (4, QImage.Format_ARGB32), # BGRA_8888 (= ARGB32 in little-endian memory)
+}
+# Raw header is width, height, format (+ dataspace since Android 9) as LE uint32
+RAW_HEADER_SIZES = (12, 16)
+
+
+class CaptureError(Exception):
+    """screencap failed or returned something that is not a frame."""
+
+
+class RawFrame:
+    """One uncompressed framebuffer dump from `screencap` (no -p)."""
+    __slots__ = ("width", "height", "format", "header_size", "pixels", "captured_at")
+
+    def __init__(self, width, height, fmt, header_size, pixels, captured_at=None):
+        self.width = width
+        self.height = height
+        self.format = fmt
+        self.header_size = header_size
+        self.pixels = pixels # bytes-like, width * height * bpp
+        self.captured_at = captured_at or time.time()
+
+    @property
+    def bytes_per_line(self):
+        return self.width * PIXEL_FORMATS[self.format][0]
+
+    def to_image(self):
+        """QImage sharing `pixels`; copy() it if it must outlive the frame."""
+        return QImage(self.pixels, self.width, self.height, self.bytes_per_line, PIXEL_FORMATS[self.format][1])
+
+    def save(self, path, quality=-1):
+        """Encode on the host; the format follows the file suffix (png, webp, jpg...)."""
+        return self.to_image().save(path, None, quality)
+
+
+def parse_raw(data):
+    """
+    Split a raw screencap dump into header fields and pixels (no copy).
+    The header size is derived from the payload length, so both the 12 and
+    16 byte variants are handled.
+    """
+    if len(data) < RAW_HEADER_SIZES[0]:
+        raise CaptureError(f"Short screencap output ({len(data)} bytes)")
+    width, height, fmt = struct.unpack_from("<3I", data)
+    if fmt not in PIXEL_FORMATS:
+        raise CaptureError(f"Unsupported screencap pixel format {fmt}")
+    header_size = len(data) - width * height * PIXEL_FORMATS[fmt][0]
+    if header_size not in RAW_HEADER_SIZES:
+        raise CaptureError(f"Unexpected screencap size {len(data)} for {width}x{height}")
+    return RawFrame(width, height, fmt, header_size, memoryview(data)[header_size:])
+
+
+class CaptureSignals(QObject):
+    finished = Signal(str) # saved path
+    failed = Signal(str, str) # path, error
+
+
+class _EncodeJob(QRunnable):
+    def __init__(self, frame, path, quality, signals, done=None):
+        super().__init__()
+        self.frame = frame
+        self.path = path
+        self.quality = quality
+        self.signals = signals
+        self.done = done # Called on the encoder thread with (ok, encode_seconds)
+
+    def run(self):
+        started = time.perf_counter()
+        ok = self.frame.save(self.path, self.quality)
+        if self.done:
+            self.done(ok, time.perf_counter() - started)
+        if ok:
+            self.signals.finished.emit(self.path)
+        else:
+            self.signals.failed.emit(self.path, "Image encoding failed")
+
+
+class ScreenCapture:
+    """
+    Screenshots streamed straight to the host over exec-out: nothing is written
+    to the device and there is no shared remote path, so captures on different
+    devices (or back to back on one) never race.
+
+    Modes:
+    - "png": the device encodes (screencap -p) and the bytes go straight to the file.
+    - "raw": the device only dumps the framebuffer and the PNG/WebP encoding runs
+      on the host in `encode_pool`, skipping the slowest step on most head units.
+    """
+    def __init__(self, adb, encode_threads=None):
+        """
+        :param adb: AdbWrapper used for exec-out.
+        :param encode_threads: Host encoder threads. Defaults to half the cores (min 2).
+        """
+        self.adb = adb
+        self.encode_pool = QThreadPool()
+        self.encode_pool.setMaxThreadCount(encode_threads or max(2, QThread.idealThreadCount() // 2))
+
+    def grab_raw(self, serial):
+        """Blocking raw framebuffer capture. :return: RawFrame"""
+        data, err, code = self.adb.exec_out_bytes(serial, "screencap")
+        if code != 0:
+            raise CaptureError(err or f"screencap failed ({code})")
+        return parse_raw(data)
+
+    def grab_png(self, serial):
+        """Blocking device-encoded capture. :return: PNG bytes"""
+        data, err, code = self.adb.exec_out_bytes(serial, "screencap -p")
+        if code != 0 or not data.startswith(b"\x89PNG"):
+            raise CaptureError(err or "screencap -p returned no PNG")
+        return data
+
+    def encode_async(self, frame, path, signals, quality=-1, done=None):
+        """Queue a RawFrame for encoding on the host encoder pool."""
+        self.encode_pool.start(_EncodeJob(frame, path, quality, signals, done))
+
+    def save(self, serial, path, mode="raw", signals=None, quality=-1):
+        """
+        Capture and write `path`. The capture itself blocks the caller; in raw
+        mode encoding is queued on the encoder pool and `signals` report completion.
+        :raises CaptureError: When the device capture fails (encode errors go to signals.failed).
+        """
+        signals = signals or CaptureSignals()
+        if mode == "raw":
+            self.encode_async(self.grab_raw(serial), path, signals, quality)
+            return signals
+
+        tmp = path + ".part"
+        with open(tmp, "wb") as f:
+            _, err, code = self.adb.exec_out_to_fd(serial, "screencap -p", f)
+        if code != 0 or os.path.getsize(tmp) == 0:
+            os.remove(tmp)
+            raise CaptureError(err or "screencap -p returned no data")
+        os.replace(tmp, path)
+        signals.finished.emit(path)
+        return signals
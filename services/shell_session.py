@@ -0,0 +1,398 @@
+import itertools
+import os
+import queue
+import re
+import shlex
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from services.adb_socket import (SHELL_ID_STDIN, SHELL_ID_STDOUT, SHELL_ID_STDERR,
+                                 SHELL_ID_EXIT, recv_exact)
+
+MARK_BEGIN = "__TP_B_"
+MARK_END = "__TP_E_"
+
+# Extra host-side wait on top of the per-command timeout before the session is
+# considered wedged and respawned.
+TIMEOUT_GRACE = 3.0
+
+
+class _SocketChannel:
+    """Interactive shell v2 stream (no pty) opened directly on the adb server."""
+    def __init__(self, client, serial, on_data):
+        self.sock = client.open("shell,v2,raw:", serial)
+        self.sock.settimeout(None)
+        self.on_data = on_data
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _read_loop(self):
+        try:
+            while True:
+                packet_id, length = struct.unpack("<BI", recv_exact(self.sock, 5))
+                data = recv_exact(self.sock, length) if length else b""
+                if packet_id in (SHELL_ID_STDOUT, SHELL_ID_STDERR):
+                    self.on_data(packet_id, data)
+                elif packet_id == SHELL_ID_EXIT:
+                    break
+        except (OSError, struct.error):
+            pass
+        self.on_data(None, b"")
+
+    def write(self, data):
+        self.sock.sendall(struct.pack("<BI", SHELL_ID_STDIN, len(data)) + data)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR) # Wake the blocked reader thread
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class _ProcessChannel:
+    """Fallback: one long-lived `adb shell -T` client process."""
+    def __init__(self, adb_path, serial, on_data):
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        self.process = subprocess.Popen(
+            [adb_path, "-s", serial, "shell", "-T"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            bufsize=0, **kwargs)
+        self.on_data = on_data
+        self._open_streams = 2
+        self._streams_lock = threading.Lock()
+        threading.Thread(target=self._read_loop, args=(self.process.stdout, SHELL_ID_STDOUT), daemon=True).start()
+        threading.Thread(target=self._read_loop, args=(self.process.stderr, SHELL_ID_STDERR), daemon=True).start()
+
+    def _read_loop(self, pipe, stream_id):
+        while True:
+            try:
+                data = os.read(pipe.fileno(), 65536)
+            except OSError:
+                data = b""
+            if not data:
+                break
+            self.on_data(stream_id, data)
+        with self._streams_lock:
+            self._open_streams -= 1
+            last = self._open_streams == 0
+        if last:
+            self.on_data(None, b"")
+
+    def write(self, data):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def close(self):
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+
+
+class _PendingCommand:
+    def __init__(self, command, timeout):
+        self.command = command
+        self.timeout = timeout
+        self.result = None
+        self.done = threading.Event()
+        self.started = False # Taken by the dispatcher; from then on it can no longer be withdrawn
+        self.cancelled = False # Caller gave up waiting before it started; the dispatcher skips it
+
+
+class ShellSession:
+    """
+    A long-lived `adb shell` for one device.
+    Every command is framed with unique begin/end markers on both stdout and stderr,
+    and the end marker carries the exit code, so many commands share one session:
+
+        printf '__TP_B_<id>\\n'; sh -c '<cmd>' </dev/null; printf '\\n__TP_E_<id> %d\\n' $?
+
+    Commands run in their own `sh -c` so `exit`, `cd` or a syntax error cannot take
+    the session down. Callers queue FIFO on a dispatcher thread; a dead session is
+    respawned on the next command.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, adb, serial):
+        """
+        :param adb: AdbWrapper providing the transport (socket client or adb path).
+        :param serial: Device serial.
+        """
+        self.adb = adb
+        self.serial = serial
+        self.channel = None
+        self.has_timeout = False
+        self.commands_run = 0
+        self.respawns = -1 # First spawn is not a respawn
+
+        self._queue = queue.Queue()
+        self._buffers = {SHELL_ID_STDOUT: bytearray(), SHELL_ID_STDERR: bytearray()}
+        self._cond = threading.Condition()
+        self._alive = False
+        self._closed = False
+        self._generation = 0
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def depth(self):
+        """Commands queued or in flight."""
+        return self._queue.unfinished_tasks
+
+    def run(self, command, timeout=10):
+        """
+        Queue a command and block until its result is available.
+        :return: (stdout, stderr, return_code) with the same conventions as AdbWrapper.shell
+        """
+        pending = _PendingCommand(command, timeout)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout + TIMEOUT_GRACE * 2 if timeout else None):
+            with self._cond:
+                # Still queued: make sure it never reaches the device (a late `input` or `reboot` would still fire)
+                pending.cancelled = not pending.started
+            return "", "Shell session did not respond", -1
+        return pending.result
+
+    def close(self):
+        """Stop the dispatcher and tear down the session."""
+        self._closed = True
+        self._queue.put(None)
+        self._kill()
+
+    # --- Session Lifecycle ---
+    def _spawn(self):
+        with self._cond:
+            for buf in self._buffers.values():
+                buf.clear()
+            self._generation += 1
+            self._alive = True
+        # Bind the callback to this generation so a dying old channel can't poison the new one
+        generation = self._generation
+        on_data = lambda stream_id, data: self._on_data(generation, stream_id, data)
+        client = self.adb.socket_client
+        if client and "shell_v2" in client.features(self.serial):
+            self.channel = _SocketChannel(client, self.serial, on_data)
+        else:
+            self.channel = _ProcessChannel(self.adb.adb_path, self.serial, on_data)
+        self.respawns += 1
+        # Device-side `timeout` lets a slow command expire without killing the session
+        out, _, code = self._execute("command -v timeout", None, spawning=True)
+        self.has_timeout = code == 0 and bool(out)
+
+    def _kill(self):
+        with self._cond:
+            self._alive = False
+            self._cond.notify_all()
+        if self.channel:
+            self.channel.close()
+            self.channel = None
+
+    def _on_data(self, generation, stream_id, data):
+        with self._cond:
+            if generation != self._generation:
+                return
+            if stream_id is None:
+                self._alive = False
+            else:
+                self._buffers[stream_id] += data
+            self._cond.notify_all()
+
+    # --- Dispatching ---
+    def _dispatch_loop(self):
+        while True:
+            pending = self._queue.get()
+            try:
+                if pending is None:
+                    return
+                with self._cond:
+                    pending.started = not pending.cancelled
+                if not pending.started:
+                    pending.result = ("", "Cancelled: caller timed out", -1)
+                    continue
+                if self._closed:
+                    pending.result = ("", "Shell session closed", -1)
+                    continue
+                try:
+                    if not self._alive:
+                        self._spawn()
+                    pending.result = self._execute(pending.command, pending.timeout)
+                    self.commands_run += 1
+                except Exception as e:
+                    self._kill()
+                    pending.result = ("", str(e), -1)
+            finally:
+                if pending is not None:
+                    pending.done.set()
+                self._queue.task_done()
+
+    def _execute(self, command, timeout, spawning=False):
+        token = f"{os.getpid()}_{next(self._ids)}"
+        body = f"sh -c {shlex.quote(command)}"
+        if timeout and self.has_timeout and not spawning:
+            body = f"timeout {int(max(1, timeout))} {body}"
+        script = (f"printf '{MARK_BEGIN}{token}\\n'; printf '{MARK_BEGIN}{token}\\n' >&2; "
+                  f"{body} </dev/null; "
+                  f"printf '\\n{MARK_END}{token} %d\\n' $?; printf '\\n{MARK_END}{token}\\n' >&2\n")
+        self.channel.write(script.encode("utf-8"))
+
+        begin = f"{MARK_BEGIN}{token}\n".encode()
+        end_out = f"\n{MARK_END}{token} ".encode()
+        end_err = f"\n{MARK_END}{token}\n".encode()
+        deadline = time.monotonic() + (timeout + TIMEOUT_GRACE if timeout else 30)
+
+        with self._cond:
+            while True:
+                out = self._take(SHELL_ID_STDOUT, begin, end_out, need_line=True)
+                if out is not None:
+                    break
+                if not self._wait(deadline):
+                    self._abort_locked()
+                    return "", "Timeout waiting for shell session", -1
+            while True:
+                err = self._take(SHELL_ID_STDERR, begin, end_err)
+                if err is not None:
+                    break
+                # stderr marker trails stdout's closely; don't hold the result hostage
+                if not self._wait(min(deadline, time.monotonic() + 1.0)):
+                    err = (b"", b"")
+                    break
+
+        body_out, code_line = out
+        try:
+            code = int(code_line.strip() or -1)
+        except ValueError:
+            code = -1
+        return (body_out.decode("utf-8", "replace").strip(),
+                err[0].decode("utf-8", "replace").strip(),
+                code)
+
+    def _take(self, stream_id, begin, end, need_line=False):
+        """
+        Cut one framed result out of a stream buffer.
+        Anything before the begin marker is leftover noise and is dropped.
+        :return: (body, rest_of_end_line) or None if not complete yet.
+        """
+        buf = self._buffers[stream_id]
+        start = buf.find(begin)
+        if start < 0:
+            return None
+        stop = buf.find(end, start + len(begin))
+        if stop < 0:
+            return None
+        tail = b""
+        consumed = stop + len(end)
+        if need_line:
+            newline = buf.find(b"\n", consumed)
+            if newline < 0:
+                return None
+            tail = bytes(buf[consumed:newline])
+            consumed = newline + 1
+        body = bytes(buf[start + len(begin):stop])
+        del buf[:consumed]
+        return body, tail
+
+    def _wait(self, deadline):
+        """Wait for more data; False when the deadline passed or the session died."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self._alive:
+            return False
+        self._cond.wait(remaining)
+        return True
+
+    def _abort_locked(self):
+        self._alive = False
+        if self.channel:
+            self.channel.close()
+            self.channel = None
+
+
+class ShellSessionPool:
+    """
+    Per-device pool of ShellSession objects shared by all services.
+    Commands go to the least busy session; a new session is opened while all
+    existing ones are busy and the per-device cap is not reached.
+    """
+    def __init__(self, adb, max_per_device=2):
+        self.adb = adb
+        self.max_per_device = max_per_device
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, serial):
+        """Pick (or open) the session the next command for `serial` should use."""
+        with self._lock:
+            sessions = self._sessions.setdefault(serial, [])
+            idle = [s for s in sessions if s.depth == 0]
+            if idle:
+                return idle[0]
+            if len(sessions) < self.max_per_device:
+                session = ShellSession(self.adb, serial)
+                sessions.append(session)
+                return session
+            return min(sessions, key=lambda s: s.depth)
+
+    def run(self, serial, command, timeout=10):
+        return self.get(serial).run(command, timeout)
+
+    def close(self, serial=None):
+        """Close the sessions of one device, or all of them."""
+        with self._lock:
+            serials = [serial] if serial else list(self._sessions)
+            closing = [s for key in serials for s in self._sessions.pop(key, [])]
+        for session in closing:
+            session.close()
+
+    def stats(self):
+        with self._lock:
+            return {serial: {"sessions": len(sessions),
+                             "commands": sum(s.commands_run for s in sessions),
+                             "respawns": sum(max(0, s.respawns) for s in sessions),
+                             "queued": sum(s.depth for s in sessions)}
+                    for serial, sessions in self._sessions.items()}
+
+
+# --- Batch Framing ---
+def build_batch_script(commands, token):
+    """
+    Build one shell script that runs every command of `commands` (a list) in turn,
+    each framed by index-tagged markers on stdout and stderr:
+
+        printf '__TP_B_<token>_<i>\\n'; ( <cmd> ) </dev/null; printf '\\n__TP_E_<token>_<i> %d\\n' $?
+    """
+    parts = []
+    for i, command in enumerate(commands):
+        tag = f"{token}_{i}"
+        parts.append(
+            f"printf '{MARK_BEGIN}{tag}\\n'; printf '{MARK_BEGIN}{tag}\\n' >&2; "
+            f"( {command}\n) </dev/null; "
+            f"printf '\\n{MARK_END}{tag} %d\\n' $?; printf '\\n{MARK_END}{tag}\\n' >&2")
+    return "\n".join(parts)
+
+
+def split_batch_output(stdout, stderr, token, count):
+    """
+    Split the combined streams of a batch script back into per-command results.
+    :return: list of (stdout, stderr, return_code); -1 for commands that never completed.
+    """
+    results = [["", "", -1] for _ in range(count)]
+    out_re = re.compile(rf"{MARK_BEGIN}{token}_(\d+)\n(.*?)\n?\n{MARK_END}{token}_\1 (-?\d+)", re.S)
+    for match in out_re.finditer(stdout):
+        index = int(match.group(1))
+        if index < count:
+            results[index][0] = match.group(2).strip()
+            results[index][2] = int(match.group(3))
+    err_re = re.compile(rf"{MARK_BEGIN}{token}_(\d+)\n(.*?)\n?\n{MARK_END}{token}_\1(?:\n|$)", re.S)
+    for match in err_re.finditer(stderr):
+        index = int(match.group(1))
+        if index < count:
+            results[index][1] = match.group(2).strip()
+    return [tuple(r) for r in results]
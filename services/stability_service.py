@@ -2,6 +2,7 @@ import time
 import threading
 from PySide6.QtCore import QObject, Signal
 import os
+from services.command_scheduler import Priority
 
 class StabilityService(QObject):
     """
@@ -14,12 +15,14 @@ class StabilityService(QObject):
     issue_detected = Signal(str, str) # type (ANR/CRASH), details
     finished = Signal()
 
-    def __init__(self, adb):
+    def __init__(self, adb, scheduler=None):
         """
         :param adb: Initialized AdbWrapper instance.
+        :param scheduler: Optional CommandScheduler; loop commands run at AUTOMATION priority.
         """
         super().__init__()
         self.adb = adb
+        self.scheduler = scheduler
         self.is_running = False
         self._stop_event = threading.Event()
 
@@ -70,16 +73,16 @@ class StabilityService(QObject):
                     self.status_updated.emit(f"Launching {app}...")
                     
                     # Fresh logcat for this iteration
-                    self.adb.shell(serial, "logcat -c")
+                    self._shell(serial, "logcat -c")
                     
                     # Trigger launch
-                    self.adb.shell(serial, f"am start -n {app}")
+                    self._shell(serial, f"am start -n {app}")
                     
                     # Dwell time for the app to initialize
                     time.sleep(3)
                     
                     # Verify focus
-                    resumed = self.adb.get_resumed_activity(serial)
+                    resumed = self._call(serial, self.adb.get_resumed_activity)
                     if app in resumed:
                         self.status_updated.emit(f"Verified: {app} is in focus.")
                     else:
@@ -103,16 +106,27 @@ class StabilityService(QObject):
         """
         pkg = app.split('/')[0]
         # Query for high-priority errors in the main/crash buffers
-        logs = self.adb.shell_output(serial, f"logcat -d *:E | grep {pkg}")
+        logs = self._shell(serial, f"logcat -d *:E | grep {pkg}")[0]
         
         if "FATAL EXCEPTION" in logs.upper():
             self.issue_detected.emit("CRASH", f"Fatal detected in {pkg}:\n{logs[:1000]}")
         
         # Poll for ANR states via process state dump
-        anr_check = self.adb.shell_output(serial, "dumpsys activity processes | grep 'ANR in'")
+        anr_check = self._shell(serial, "dumpsys activity processes | grep 'ANR in'")[0]
         if pkg in anr_check:
             self.issue_detected.emit("ANR", f"ANR condition confirmed for {pkg}!")
 
+    def _call(self, serial, fn):
+        """Run an AdbWrapper query through the scheduler when one is available."""
+        if self.scheduler:
+            return self.scheduler.run(serial, fn, serial, priority=Priority.AUTOMATION)
+        return fn(serial)
+
+    def _shell(self, serial, cmd):
+        if self.scheduler:
+            return self.scheduler.shell(serial, cmd, Priority.AUTOMATION)
+        return self.adb.shell(serial, cmd)
+
     def get_apps(self, serial):
         """Fetch list of all launchable activities via ADB."""
         return self.adb.get_launchable_activities(serial)
@@ -8,6 +8,7 @@ from .base_view import BaseView
 from core.context import get_context
 from utils import get_icon
 from core.worker import Worker
+from services.command_scheduler import Priority
 
 class DeviceControlsView(BaseView):
     def __init__(self):
@@ -482,7 +483,8 @@ class DeviceControlsView(BaseView):
         
         self.install_console.append(f"⏳ Processing: <b>{filename}</b>")
         
-        worker = Worker(self.device_manager.adb.install, serial, current_path)
+        worker = Worker(self.device_manager.scheduler.run, serial, self.device_manager.adb.install,
+                        serial, current_path, priority=Priority.BULK)
         worker.signals.result.connect(lambda res, p=paths[1:]: self._on_install_item_finished(res, filename, serial, p))
         self.device_manager.thread_pool.start(worker)
 
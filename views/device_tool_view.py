@@ -1,33 +1,23 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                               QLabel, QTabWidget, QPlainTextEdit, QLineEdit, 
+                               QLabel, QTabWidget, QLineEdit, 
                                QComboBox, QSplitter, QProgressBar, QGroupBox, 
-                               QCheckBox, QMessageBox, QFileDialog, QScrollArea)
-from PySide6.QtCore import Qt, SLOT
-from PySide6.QtGui import QFont, QColor, QSyntaxHighlighter, QTextCharFormat, QPixmap
+                               QCheckBox, QMessageBox, QFileDialog, QScrollArea, QDateTimeEdit, QListWidget, QGridLayout)
+from PySide6.QtCore import Qt, SLOT, QTimer, QDateTime, QThreadPool
+from PySide6.QtGui import QPixmap
 from .base_view import BaseView
+from components.log_view import LogView
+from components.metric_chart import MetricChart
 from core.context import get_context
+from core.config import (LOG_STORE_CAPACITY, LOG_HIGHLIGHT_RULES, PROC_SAMPLE_PACKAGES, MEMINFO_GROWTH_MIN_KB,
+                         SELINUX_CAPTURE_INTERVAL_S)
+from core.worker import Worker
+from services.log_store import LogStore
+from services.kernel_log import DMESG
 from utils import get_icon
 from utils import get_icon
-import re
 import time
 import os
 
-class LogHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.rules = []
-        
-        # Formats
-        err_fmt = QTextCharFormat(); err_fmt.setForeground(QColor("#FF5555")); self.rules.append((r" E ", err_fmt))
-        warn_fmt = QTextCharFormat(); warn_fmt.setForeground(QColor("#FFB86C")); self.rules.append((r" W ", warn_fmt))
-        info_fmt = QTextCharFormat(); info_fmt.setForeground(QColor("#8BE9FD")); self.rules.append((r" I ", info_fmt))
-        debug_fmt = QTextCharFormat(); debug_fmt.setForeground(QColor("#50FA7B")); self.rules.append((r" D ", debug_fmt))
-
-    def highlightBlock(self, text):
-        for pattern, fmt in self.rules:
-            for match in re.finditer(pattern, text):
-                self.setFormat(match.start(), match.end() - match.start(), fmt)
-
 class DeviceToolView(BaseView):
     def __init__(self):
         super().__init__("Device Tools")
@@ -43,6 +33,7 @@ class DeviceToolView(BaseView):
         """)
         
         self._build_logcat_tab()
+        self._build_archive_tab()
         self._build_capture_tab()
         self._build_monitor_tab()
         
@@ -50,11 +41,16 @@ class DeviceToolView(BaseView):
         
         # Connect Signals
         # Connect Signals
-        self.tool_service.log_received.connect(self._on_log_line)
+        self.tool_service.log_appended.connect(self._on_log_appended)
+        self.tool_service.log_filter_reset.connect(self.log_viewer.clear)
+        self.tool_service.log_rows_loaded.connect(self.log_viewer.prepend)
+        self.tool_service.log_stream_stats.connect(self._on_log_stream_stats)
         self.tool_service.screenshot_saved.connect(self._on_screenshot_saved)
+        self.tool_service.screenshot_failed.connect(self._on_screenshot_failed)
+        self.tool_service.burst_progress.connect(self._on_burst_progress)
+        self.tool_service.burst_finished.connect(self._on_burst_finished)
         self.tool_service.recording_saved.connect(self._on_recording_saved)
-        self.tool_service.fault_detected.connect(self._on_fault_detected)
-        self.tool_service.anr_detected.connect(self._on_anr_detected)
+        self.tool_service.fault_captured.connect(self._on_fault_captured)
         self.tool_service.services_updated.connect(self._on_services_updated)
 
     def _build_logcat_tab(self):
@@ -89,25 +85,132 @@ class DeviceToolView(BaseView):
         self.cb_level.addItems(["Verbose", "Debug", "Info", "Warn", "Error", "Fatal"])
         self.cb_level.setCurrentIndex(0) 
         self.cb_level.setStyleSheet("background: #111; color: #EEE; border: 1px solid #444; padding: 4px;")
+        self.cb_level.currentIndexChanged.connect(self._on_filter_changed)
         toolbar.addWidget(self.cb_level)
 
         # Text Filter
         self.txt_filter = QLineEdit()
-        self.txt_filter.setPlaceholderText("Filter (Regex/Tag/PID)...")
+        self.txt_filter.setPlaceholderText("Filter: regex  tag:Name  pid:123  level>=W  -exclude")
+        self.txt_filter.setToolTip("Terms are ANDed. tag:Car* (glob), pid:1,2, tid:3, level>=W / level:E,\n"
+                                   "\"quoted phrase\", any term prefixed with - excludes matches.")
         self.txt_filter.setStyleSheet("background: #111; color: #FFF; padding: 6px; border: 1px solid #444;")
+        # Re-filtering the history is not free; wait for a pause in typing
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(self._on_filter_changed)
+        self.txt_filter.textChanged.connect(lambda _: self.filter_timer.start())
         toolbar.addWidget(self.txt_filter)
+
+        # Buffers (logcat -b)
+        self.cb_buffers = QComboBox()
+        for label, buffers in (("Default buffers", None), ("main", "main"), ("main,system,crash", "main,system,crash"),
+                               ("main,system,crash,events", "main,system,crash,events"), ("all", "all")):
+            self.cb_buffers.addItem(label, buffers)
+        self.cb_buffers.setStyleSheet("background: #111; color: #EEE; border: 1px solid #444; padding: 4px;")
+        self.cb_buffers.currentIndexChanged.connect(lambda _: self.tool_service.set_log_buffers(self.cb_buffers.currentData()))
+        toolbar.addWidget(self.cb_buffers)
+
+        # Device-side filtering
+        self.chk_device_filter = QCheckBox("Filter on device")
+        self.chk_device_filter.setToolTip("Let logcat on the device drop what the level/tag/pid/msg filter excludes.\n"
+                                          "Saves bandwidth; excluded lines are not kept for later re-filtering.")
+        self.chk_device_filter.setChecked(self.tool_service.device_log_filter)
+        self.chk_device_filter.toggled.connect(self.tool_service.set_device_log_filter)
+        toolbar.addWidget(self.chk_device_filter)
+
+        # Extra streams, merged into the one timeline (take effect on Start Logs)
+        self.chk_all_devices = QCheckBox("All devices")
+        self.chk_all_devices.setToolTip("Stream every connected device at once; lines are prefixed with the serial\n"
+                                        "and ordered by timestamp, corrected for each device's clock.")
+        toolbar.addWidget(self.chk_all_devices)
+        self.chk_kernel_log = QCheckBox("Kernel (dmesg)")
+        self.chk_kernel_log.setToolTip("Also stream the kernel log (dmesg -w), interleaved with logcat.\n"
+                                       "Needs a device where dmesg is readable (userdebug/eng or root).")
+        toolbar.addWidget(self.chk_kernel_log)
         
         layout.addLayout(toolbar)
+
+        self.lbl_log_rate = QLabel("")
+        self.lbl_log_rate.setStyleSheet("color: #888; font-size: 11px;")
+        layout.addWidget(self.lbl_log_rate)
         
         # Viewer
-        self.log_viewer = QPlainTextEdit()
-        self.log_viewer.setReadOnly(True)
-        self.log_viewer.setStyleSheet("background-color: #0F0F0F; color: #DDD; font-family: Consolas, monospace; font-size: 12px;")
-        self.highlighter = LogHighlighter(self.log_viewer.document())
+        # Virtualized view over the service's bounded log store
+        self.log_viewer = LogView(self.tool_service.log_store, highlight_rules=LOG_HIGHLIGHT_RULES)
         layout.addWidget(self.log_viewer)
         
         self.tabs.addTab(tab, "Live Logcat")
 
+    def _build_archive_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+        layout.setContentsMargins(10, 10, 10, 10)
+
+        toolbar = QHBoxLayout()
+        now = QDateTime.currentDateTime()
+        self.dt_archive_from = QDateTimeEdit(now.addSecs(-3600))
+        self.dt_archive_to = QDateTimeEdit(now)
+        for label, edit in (("From", self.dt_archive_from), ("To", self.dt_archive_to)):
+            edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+            edit.setCalendarPopup(True)
+            edit.setStyleSheet("background: #111; color: #EEE; border: 1px solid #444; padding: 4px;")
+            toolbar.addWidget(QLabel(label))
+            toolbar.addWidget(edit)
+
+        self.cb_archive_level = QComboBox()
+        self.cb_archive_level.addItems(["Verbose", "Debug", "Info", "Warn", "Error", "Fatal"])
+        self.cb_archive_level.setStyleSheet("background: #111; color: #EEE; border: 1px solid #444; padding: 4px;")
+        toolbar.addWidget(self.cb_archive_level)
+
+        self.txt_archive_filter = QLineEdit()
+        self.txt_archive_filter.setPlaceholderText("Filter: tag:CarService level:E \"phrase\" pid:123 (same syntax as Live Logcat)")
+        self.txt_archive_filter.setStyleSheet("background: #111; color: #FFF; padding: 6px; border: 1px solid #444;")
+        self.txt_archive_filter.returnPressed.connect(self._search_archive)
+        toolbar.addWidget(self.txt_archive_filter)
+
+        self.btn_archive_search = QPushButton("Search")
+        self.btn_archive_search.clicked.connect(self._search_archive)
+        self.btn_archive_search.setStyleSheet("background: #222; padding: 6px; border: 1px solid #444; color: #EEE;")
+        toolbar.addWidget(self.btn_archive_search)
+        layout.addLayout(toolbar)
+
+        self.lbl_archive = QLabel("Every line received in Live Logcat is archived"
+                                  if self.tool_service.log_archive else "Log archive disabled (LOG_ARCHIVE_ENABLED)")
+        self.lbl_archive.setStyleSheet("color: #888; font-size: 11px;")
+        layout.addWidget(self.lbl_archive)
+
+        self.archive_store = LogStore(LOG_STORE_CAPACITY)
+        self.archive_viewer = LogView(self.archive_store, highlight_rules=LOG_HIGHLIGHT_RULES)
+        layout.addWidget(self.archive_viewer)
+
+        self.tabs.addTab(tab, "Log Archive")
+
+    def _search_archive(self):
+        if not self.btn_archive_search.isEnabled():
+            return
+        self.btn_archive_search.setEnabled(False)
+        self.lbl_archive.setText("Searching...")
+        started = time.perf_counter()
+        # Kept referenced: once the wrapper is collected its signals are gone
+        start = self.dt_archive_from.dateTime().toSecsSinceEpoch()
+        end = self.dt_archive_to.dateTime().toSecsSinceEpoch() + 0.999
+        self._archive_worker = worker = Worker(self.tool_service.search_log_archive, self.cb_archive_level.currentIndex(),
+                                               self.txt_archive_filter.text(), start, end, limit=LOG_STORE_CAPACITY)
+        worker.signals.result.connect(lambda records: self._on_archive_results(records, started))
+        worker.signals.error.connect(lambda error: self.lbl_archive.setText(f"Search failed: {error[0]}"))
+        worker.signals.finished.connect(lambda: self.btn_archive_search.setEnabled(True))
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_archive_results(self, records, started):
+        self.archive_store.clear()
+        self.archive_viewer.clear()
+        start = self.archive_store.end_seq
+        self.archive_store.extend(records)
+        self.archive_viewer.append(start, len(records))
+        more = "+" if len(records) >= LOG_STORE_CAPACITY else ""
+        self.lbl_archive.setText(f"{len(records)}{more} lines in {(time.perf_counter() - started) * 1000:.0f} ms")
+
     def _build_capture_tab(self):
         tab = QWidget()
         layout = QVBoxLayout(tab)
@@ -126,11 +229,16 @@ class DeviceToolView(BaseView):
         btn_ss.setStyleSheet("background: #222; padding: 8px; border: 1px solid #444; color: white;")
         h_ss.addWidget(btn_ss)
         
-        btn_burst = QPushButton("Burst (5x)")
-        btn_burst.setIcon(get_icon("fa5s.images", "#FFF"))
-        btn_burst.clicked.connect(self._take_burst_screenshot)
-        btn_burst.setStyleSheet("background: #222; padding: 8px; border: 1px solid #444; color: white;")
-        h_ss.addWidget(btn_burst)
+        self.btn_burst = QPushButton("Start Burst")
+        self.btn_burst.setCheckable(True)
+        self.btn_burst.setIcon(get_icon("fa5s.images", "#FFF"))
+        self.btn_burst.clicked.connect(self._toggle_burst)
+        self.btn_burst.setStyleSheet("background: #222; padding: 8px; border: 1px solid #444; color: white;")
+        h_ss.addWidget(self.btn_burst)
+
+        self.cb_burst_fmt = QComboBox()
+        self.cb_burst_fmt.addItems(["PNG", "WebP"])
+        h_ss.addWidget(self.cb_burst_fmt)
         
         # Preview Label
         self.lbl_preview = QLabel("No Preview")
@@ -147,6 +255,10 @@ class DeviceToolView(BaseView):
         h_ss.addWidget(btn_clear_prev)
         
         vbox_ss.addLayout(h_ss)
+
+        self.lbl_burst = QLabel("Burst: idle")
+        self.lbl_burst.setStyleSheet("color: #888;")
+        vbox_ss.addWidget(self.lbl_burst)
         layout.addWidget(gb_ss)
         
         # --- Recording Section ---
@@ -243,6 +355,36 @@ class DeviceToolView(BaseView):
         self.lbl_proc.setStyleSheet("font-family: Consolas; font-size: 12px; color: #BBB; background: #000; padding: 8px; border-radius: 4px;")
         self.lbl_proc.setMinimumHeight(120)
         v_cpu.addWidget(self.lbl_proc)
+
+        self.lbl_meminfo = QLabel("Waiting for dumpsys meminfo...")
+        self.lbl_meminfo.setStyleSheet("font-family: Consolas; font-size: 12px; color: #BBB; background: #000; padding: 8px; border-radius: 4px;")
+        v_cpu.addWidget(self.lbl_meminfo)
+
+        # Live charts over the metrics store; all four share one time range
+        store = self.tool_service.metrics_store
+        self.chart_cpu = MetricChart(store, "CPU", "%", y_range=(0, 100))
+        self.chart_mem = MetricChart(store, "Memory used", "MB", scale=1 / 1024)
+        self.chart_thermal = MetricChart(store, "Thermal", "\u00b0C")
+        self.chart_proc = MetricChart(store, "Process CPU", "%")
+        self.charts = (self.chart_cpu, self.chart_mem, self.chart_thermal, self.chart_proc)
+        grid_charts = QGridLayout()
+        for index, chart in enumerate(self.charts):
+            chart.range_changed.connect(self._sync_chart_range)
+            grid_charts.addWidget(chart, index // 2, index % 2)
+        v_cpu.addLayout(grid_charts)
+
+        ctrl_charts = QHBoxLayout()
+        ctrl_charts.addWidget(QLabel("Overlay packages:"))
+        self.txt_overlay = QLineEdit(", ".join(PROC_SAMPLE_PACKAGES))
+        self.txt_overlay.setPlaceholderText("com.android.systemui, com.android.car.media")
+        self.txt_overlay.setToolTip("Sampled per process (CPU, RSS, PSS, threads, fds) while monitoring")
+        self.txt_overlay.editingFinished.connect(self._on_overlay_changed)
+        ctrl_charts.addWidget(self.txt_overlay)
+        lbl_chart_hint = QLabel("Wheel: zoom \u00b7 Drag: pan \u00b7 Double-click: live")
+        lbl_chart_hint.setStyleSheet("color: #777;")
+        ctrl_charts.addWidget(lbl_chart_hint)
+        v_cpu.addLayout(ctrl_charts)
+        self._chart_serial = None
         layout.addWidget(self.gb_cpu)
 
         # --- Section 2: Android Service Monitoring ---
@@ -274,7 +416,9 @@ class DeviceToolView(BaseView):
         self.gb_fault.setStyleSheet(gb_style + "QGroupBox { color: #FF5555; }")
         v_fault = QVBoxLayout(self.gb_fault)
         
-        self.chk_crash = QCheckBox("Auto-capture on Crash (FATAL)")
+        self.chk_crash = QCheckBox("Auto-capture on Crash / System Fault")
+        self.chk_crash.setToolTip("Java and native crashes, watchdog kills, low-memory kills, "
+                                  "system_server restarts and SELinux denials")
         self.chk_crash.toggled.connect(self._toggle_fault_mon)
         self.chk_anr = QCheckBox("Auto-capture on ANR")
         self.chk_anr.toggled.connect(self._toggle_fault_mon)
@@ -289,6 +433,20 @@ class DeviceToolView(BaseView):
         btn_save_fault_log.clicked.connect(self._save_fault_report)
         btn_save_fault_log.setStyleSheet("background: #400; padding: 8px; border-radius: 4px; color: white;")
         v_fault.addWidget(btn_save_fault_log)
+
+        # One row per crash signature; repeats bump the count instead of adding files
+        v_fault.addWidget(QLabel("Known faults (newest first):"))
+        self.fault_list = QListWidget()
+        self.fault_list.setMinimumHeight(160)
+        self.fault_list.setStyleSheet("QListWidget { background: #111; border: 1px solid #444; color: #DDD; font-family: Consolas; }")
+        v_fault.addWidget(self.fault_list)
+        self._fault_workers = set() # Kept referenced until they report back
+        self._selinux_capture_at = {} # serial -> monotonic time the next SELinux capture may save
+        self._perf_logged = 0.0 # Last console/file perf entry
+        self._perf_window_at = 0.0
+        self._perf_window_txt = ""
+        self._perf_meminfo_dumped = ""
+        self._refresh_fault_list()
         
         layout.addWidget(self.gb_fault)
         layout.addStretch()
@@ -300,7 +458,7 @@ class DeviceToolView(BaseView):
     def _toggle_fault_mon(self):
         # Enable fault logic in service
         any_checked = self.chk_crash.isChecked() or self.chk_anr.isChecked()
-        self.tool_service.fault_monitoring = any_checked
+        self.tool_service.set_fault_monitoring(any_checked)
         
     def _toggle_monitoring(self, checked):
         serial = self.device_manager.get_first_device()
@@ -312,65 +470,161 @@ class DeviceToolView(BaseView):
             # OR just auto-save if a checkbox is checked. 
             self.tool_service.start_monitoring(serial)
             self.tool_service.perf_stats_updated.connect(self._on_perf_stats)
+            self.tool_service.meminfo_updated.connect(self._on_meminfo)
+            self._chart_serial = serial
+            self._set_chart_series()
         else:
             self.tool_service.stop_monitoring()
             self.lbl_stats.setText("Monitoring Stopped.")
             try:
                 self.tool_service.perf_stats_updated.disconnect(self._on_perf_stats)
+                self.tool_service.meminfo_updated.disconnect(self._on_meminfo)
             except: pass
 
     def _on_perf_stats(self, stats):
         try:
-            # System Stats (Thermal & Memory)
-            therm = stats.get('thermal', "Unknown")
-            mem_raw = stats.get('mem', "")
-            sys_txt = f"Thermal: {therm}\nMemory Raw: {mem_raw[:80]}..."
+            # Up to 10 samples/s (PERF_SAMPLE_INTERVAL_MS); labels follow every one, console/file once a second
+            metrics = stats.get("metrics", {})
+            therm = stats.get("thermal", "Unknown")
+            load = " ".join(f"{metrics[key]:.2f}" for key in ("load.1", "load.5", "load.15") if key in metrics)
+            psi = "  ".join(f"{name[4:]} {value:.0f}%" for name, value in metrics.items()
+                            if name.startswith("psi.") and name.endswith(".some"))
+            now = time.time()
+            if now - self._perf_window_at >= 1.0:
+                self._perf_window_at = now
+                self._perf_window_txt = self._perf_window_summary(stats.get("serial"), now)
+            sys_txt = (f"{stats.get('cpu_summary', 'N/A')}\nLoad: {load or 'N/A'}  |  Memory: {stats.get('mem', 'N/A')}\n"
+                       f"Thermal: {therm}\nPressure (some): {psi or 'N/A'}\n{self._perf_window_txt}")
             self.lbl_stats.setText(sys_txt)
             
-            # 2. Process Stats (CPU Top)
-            cpu_raw = stats.get('cpu_raw', "")
-            # top output: "Tasks: ... Mem: ... swap: ... PID USER PR NI VIRT RES ..."
-            # We want lines starting from PID
-            lines = cpu_raw.splitlines()
-            proc_txt = "Top Processes:\n"
-            count = 0
-            for l in lines:
-                l = l.strip()
-                if not l: continue
-                if "PID" in l: 
-                    proc_txt += l + "\n"
-                    continue
-                # If it looks like a process line (starts with digit)
-                if l[0].isdigit():
-                    proc_txt += l + "\n"
-                    count += 1
-                if count > 8: break
-            
+            # 2. Per-core CPU
+            cores = [(int(name[8:]), value) for name, value in metrics.items() if name.startswith("cpu.core")]
+            proc_txt = "Per-core CPU:\n" + "\n".join(
+                "  ".join(f"cpu{core:<2} {value:5.1f}%" for core, value in sorted(cores)[i:i + 4])
+                for i in range(0, len(cores), 4))
+            proc_txt += f"\nRunning {metrics.get('procs.running', 0):.0f}  Blocked {metrics.get('procs.blocked', 0):.0f}" \
+                        f"  Context switches {metrics.get('ctxt.per_s', 0):.0f}/s"
+            proc_txt += self._process_summary(stats.get("serial"), metrics)
             self.lbl_proc.setText(proc_txt)
+
+            # Charts only get marked; they repaint on their own frame timer
+            if not self.chart_thermal.series and any(name.startswith("thermal.") for name in metrics):
+                self._set_chart_series()
+            for chart in self.charts:
+                chart.mark_dirty()
             
+            if now - self._perf_logged < 1.0:
+                return
+            self._perf_logged = now
             timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
             
             # Print to Console
             if self.chk_print_perf.isChecked():
-                print(f"[{timestamp}] Perf Stats: Thermal={therm} | CPU Summary: {stats.get('cpu_summary')}")
+                print(f"[{timestamp}] Perf Stats: Thermal={therm} | {stats.get('cpu_summary')}")
 
             # Auto-Dump to File
             if self.chk_record_stats.isChecked():
                 dump_file = os.path.join(os.getcwd(), "perf_monitor_dump.txt")
                 with open(dump_file, "a", encoding="utf-8") as f:
                     f.write(f"--- {timestamp} ---\n")
-                    f.write(f"Thermal: {therm}\nMemory Raw: {mem_raw}\n")
-                    f.write(f"CPU Raw:\n{cpu_raw}\n\n")
+                    f.write("".join(f"{name}={value:.6g}\n" for name, value in metrics.items()))
+                    meminfo_raw = stats.get("meminfo_raw", "")
+                    if meminfo_raw and meminfo_raw != self._perf_meminfo_dumped:
+                        self._perf_meminfo_dumped = meminfo_raw # Refreshed every PERF_DETAIL_INTERVAL_S
+                        f.write(f"Memory Raw:\n{meminfo_raw}\n")
+                    f.write("\n")
 
         except Exception as e:
             print(f"Stats Error: {e}")
 
+    def _on_meminfo(self, serial, snapshot, events):
+        # Every PERF_DETAIL_INTERVAL_S: top PSS, steadily growing processes, oom bucket moves
+        def mb(kb):
+            return f"{kb / 1024:.0f} MB"
+        txt = f"Meminfo: {len(snapshot.processes)} processes, total PSS {mb(snapshot.total_pss_kb)}"
+        if snapshot.ram_used_kb is not None:
+            txt += f", RAM used {mb(snapshot.ram_used_kb)} free {mb(snapshot.ram_free_kb)}"
+        if snapshot.lost_kb is not None:
+            txt += f" lost {mb(snapshot.lost_kb)}"
+        top = sorted(snapshot.processes, key=lambda proc: -proc.pss_kb)[:5]
+        txt += "\nTop PSS: " + ", ".join(f"{proc.name} {mb(proc.pss_kb)} ({proc.oom})" for proc in top)
+        growing = self.tool_service.meminfo_history.growth(serial, min_growth_kb=MEMINFO_GROWTH_MIN_KB)[:3]
+        if growing:
+            txt += "\nGrowing: " + ", ".join(f"{name} +{mb(growth)} ({slope:+.0f} kB/min)"
+                                             for name, slope, growth, _ in growing)
+        moves = [event for event in self.tool_service.meminfo_history.events if event[1] == serial][-3:]
+        if moves:
+            txt += "\nOOM: " + ", ".join(f"{time.strftime('%H:%M:%S', time.localtime(when))} {name} "
+                                          f"{old or '-'} -> {new or 'gone'}" for when, _, name, _, old, new in moves)
+        self.lbl_meminfo.setText(txt)
+        if self.chk_print_perf.isChecked():
+            for when, _, name, pid, old, new in events:
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(when))}] OOM {name} ({pid}): "
+                      f"{old or 'new'} -> {new or 'gone'}")
+
+    def _perf_window_summary(self, serial, now, seconds=60):
+        # Vectorized over the store's history, refreshed once a second
+        store = self.tool_service.metrics_store
+        cpu = store.stats(serial, "cpu.total", now - seconds, now, (95,))
+        mem = store.stats(serial, "mem.used_kb", now - seconds, now, ())
+        parts = []
+        if cpu:
+            parts.append(f"CPU avg {cpu['mean']:.0f}% p95 {cpu['p95']:.0f}% max {cpu['max']:.0f}%")
+        if mem:
+            parts.append(f"Memory used {mem['min'] / 1024:.0f}-{mem['max'] / 1024:.0f} MB")
+        return f"Last {seconds} s: " + "  |  ".join(parts) if parts else ""
+
+    def _process_summary(self, serial, metrics):
+        store = self.tool_service.metrics_store
+        lines = []
+        for package in self.tool_service.process_packages:
+            prefix = f"proc.{package}."
+            if prefix + "procs" not in metrics:
+                continue
+            values = dict(metrics)
+            pss = store.series(serial, prefix + "pss_kb") # Read about once a second; show the last one
+            if pss is not None and pss.last_value is not None:
+                values[prefix + "pss_kb"] = pss.last_value
+            parts = [f"{values[prefix + 'procs']:.0f} proc"]
+            for name, label, scale in (("cpu", "CPU {:.1f}%", 1), ("rss_kb", "RSS {:.0f} MB", 1024),
+                                       ("pss_kb", "PSS {:.0f} MB", 1024), ("threads", "threads {:.0f}", 1),
+                                       ("fds", "fds {:.0f}", 1), ("restarts", "restarts {:.0f}", 1)):
+                if values.get(prefix + name):
+                    parts.append(label.format(values[prefix + name] / scale))
+            lines.append(f"{package}: " + "  ".join(parts))
+        return "\n" + "\n".join(lines) if lines else ""
+
+    def _on_overlay_changed(self):
+        packages = [name.strip() for name in self.txt_overlay.text().split(",") if name.strip()]
+        if packages != self.tool_service.process_packages:
+            self.tool_service.set_process_packages(packages)
+        self._set_chart_series()
+
+    def _set_chart_series(self):
+        serial = self._chart_serial
+        if not serial:
+            return
+        store = self.tool_service.metrics_store
+        self.chart_cpu.set_series([(serial, "cpu.total", "total"), (serial, "cpu.iowait", "iowait")])
+        self.chart_mem.set_series([(serial, "mem.used_kb", "used"), (serial, "mem.swap_used_kb", "swap")])
+        zones = [metric for _, metric in store.metrics(serial) if metric.startswith("thermal.")]
+        self.chart_thermal.set_series([(serial, metric, metric[8:]) for metric in zones[:4]])
+        packages = [name.strip() for name in self.txt_overlay.text().split(",") if name.strip()]
+        self.chart_proc.set_series([(serial, f"proc.{package}.cpu", package) for package in packages])
+
+    def _sync_chart_range(self, start, end, live):
+        # Pan/zoom on one chart moves the others with it
+        for chart in self.charts:
+            if chart is not self.sender():
+                chart.set_range(start, end, live)
+
     def _save_perf_snapshot(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save Perf Snapshot", f"perf_snapshot_{int(time.time())}.txt", "Text Files (*.txt)")
         if path:
             content = f"Snapshot Time: {time.ctime()}\n"
             content += f"System Stats:\n{self.lbl_stats.text()}\n\n"
-            content += f"Process List:\n{self.lbl_proc.text()}\n"
+            content += f"Process List:\n{self.lbl_proc.text()}\n\n"
+            content += f"Meminfo:\n{self.lbl_meminfo.text()}\n"
             with open(path, "w") as f:
                 f.write(content)
             QMessageBox.information(self, "Saved", f"Perf snapshot saved to {path}")
@@ -406,31 +660,9 @@ class DeviceToolView(BaseView):
     def _save_fault_report(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save Fault Report", f"full_log_report_{int(time.time())}.txt", "Text Files (*.txt)")
         if path:
-            with open(path, "w") as f:
-                f.write(f"Fault Report Generated: {time.ctime()}\n\n")
-                f.write(self.log_viewer.toPlainText())
+            self.tool_service.save_logs(path, f"Fault Report Generated: {time.ctime()}\n\n")
             QMessageBox.information(self, "Saved", f"Full log report saved to {path}")
 
-    def _on_anr_detected(self, details):
-        if self.chk_log_anr.isChecked():
-            print(f"!!! ANR DETECTED !!!\n{details}")
-        
-        # Trigger Auto-Capture if checked
-        if self.chk_anr.isChecked():
-            print("Auto-capturing ANR fault...")
-            timestamp = int(time.time())
-            anr_path = os.path.join(os.getcwd(), f"anr_log_{timestamp}.txt")
-            with open(anr_path, "w") as f:
-                f.write(f"ANR DETECTED\nDetails: {details}\n\nBuffer Snapshot:\n")
-                f.write(self.log_viewer.toPlainText())
-            
-            serial = self.device_manager.get_first_device()
-            if serial:
-                ss_path = os.path.join(os.getcwd(), f"anr_screenshot_{timestamp}.png")
-                self.tool_service.take_screenshot(serial, ss_path)
-            
-            self.log_viewer.appendPlainText(f"\n!!! ANR CAPTURED: Saved to {anr_path} !!!\n")
-
     def _toggle_recording(self, checked):
         serial = self.device_manager.get_first_device()
         if not serial: return
@@ -477,18 +709,38 @@ class DeviceToolView(BaseView):
              
         self.tool_service.take_screenshot(serial, path)
         
-    def _take_burst_screenshot(self):
+    def _toggle_burst(self, checked):
+        if not checked:
+            self.tool_service.stop_burst()
+            return
+
         serial = self.device_manager.get_first_device()
-        if not serial: return
-        
         # Burst saves to a directory
-        dir_path = QFileDialog.getExistingDirectory(self, "Select Directory for Burst")
-        if not dir_path: return
-        
-        for i in range(5):
-            path = os.path.join(dir_path, f"ss_burst_{int(time.time())}_{i}.png")
-            self.tool_service.take_screenshot(serial, path)
-            time.sleep(0.2)
+        dir_path = QFileDialog.getExistingDirectory(self, "Select Directory for Burst") if serial else ""
+        if not dir_path:
+            self.btn_burst.setChecked(False)
+            return
+
+        self.btn_burst.setText("Stop Burst")
+        self.lbl_burst.setText("Burst: starting...")
+        self.tool_service.start_burst(serial, dir_path, self.cb_burst_fmt.currentText().lower())
+
+    def _burst_summary(self, stats):
+        return (f"{stats['saved']} saved, {stats['duplicates']} duplicates | "
+                f"{stats['capture_fps']:.1f} FPS captured, {stats['saved_fps']:.1f} FPS saved | "
+                f"frame {stats['frame_ms_p50']:.0f} ms (p95 {stats['frame_ms_p95']:.0f}), "
+                f"encode {stats['encode_ms_p50']:.0f} ms")
+
+    def _on_burst_progress(self, stats):
+        self.lbl_burst.setText(f"Burst: {self._burst_summary(stats)}")
+
+    def _on_burst_finished(self, stats):
+        self.btn_burst.setChecked(False)
+        self.btn_burst.setText("Start Burst")
+        if "error" in stats:
+            self.lbl_burst.setText(f"Burst stopped: {stats['error']}")
+        else:
+            self.lbl_burst.setText(f"Burst done: {self._burst_summary(stats)}")
 
     def _on_screenshot_saved(self, path):
         # Show in Preview
@@ -501,10 +753,13 @@ class DeviceToolView(BaseView):
         # Maybe add a small notification?
         pass
 
+    def _on_screenshot_failed(self, path, error):
+        QMessageBox.warning(self, "Screenshot Failed", f"Could not capture {os.path.basename(path)}:\n{error}")
+
     def _save_logs(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save Logs", f"logcat_{int(time.time())}.txt", "Text Files (*.txt)")
         if path:
-            self.tool_service.save_logs(self.log_viewer.toPlainText(), path)
+            self.tool_service.save_logs(path)
             QMessageBox.information(self, "Logs Saved", f"Saved to {path}")
 
     # --- Logic ---
@@ -517,70 +772,88 @@ class DeviceToolView(BaseView):
         if checked:
             self.btn_logs.setText("Stop Logs")
             self.btn_logs.setStyleSheet("background: #400; color: #FFF; padding: 6px; border: 1px solid #F00;")
-            self.tool_service.start_logcat(serial)
+            serials = [serial]
+            if self.chk_all_devices.isChecked():
+                serials += [other for other in self.device_manager.connected_devices if other != serial]
+            buffers = self.cb_buffers.currentData()
+            sources = [(device, buffers) for device in serials]
+            if self.chk_kernel_log.isChecked():
+                sources += [(device, DMESG) for device in serials]
+            self.log_viewer.log_model.show_source = len(serials) > 1
+            self.tool_service.start_log_streams(sources)
         else:
             self.btn_logs.setText("Start Logs")
             self.btn_logs.setStyleSheet("background: #222; color: #EEE; padding: 6px; border: 1px solid #444;")
             self.tool_service.stop_logcat()
 
-    def _on_log_line(self, line):
-        # 1. Level Filter
-        # Format typical: "MM-DD HH:MM:SS.ms L/Tag(PID): Msg" or just "L/Tag"
-        # We look for " V ", " D ", " I ", " W ", " E ", " F " usually, or "/D ", "/E " etc.
-        # But 'adb logcat -v time' gives: "12-18 00:01:54.434 D/Tag ( 123): Msg"
-        # So we look for " D/", " I/" etc.
-        
-        levels = ["V", "D", "I", "W", "E", "F"]
-        selected_idx = self.cb_level.currentIndex()
-        if selected_idx > 0:
-            # Check line level
-            is_pass = False
-            for i in range(selected_idx, len(levels)):
-                if f" {levels[i]}/" in line or f" {levels[i]} " in line:
-                    is_pass = True
-                    break
-            if not is_pass:
-                # Fallback for different formats? 
-                # If we can't detect level, we might let it show or hide. 
-                # Let's hide if we are strict, or show if uncertain.
-                # Assuming standard format:
-                pass 
-                return
-
-        # 2. Text/Regex Filter
-        flt = self.txt_filter.text()
-        if flt:
-            try:
-                if not re.search(flt, line, re.IGNORECASE):
-                    return
-            except:
-                # invalid regex, treat as substring
-                if flt.lower() not in line.lower():
-                    return
-            
-        self.log_viewer.appendPlainText(line.strip())
+    def _on_filter_changed(self, *_):
+        # Compiled once; applied to incoming batches on the logcat thread and re-applied to history in the background
+        self.filter_timer.stop()
+        self.tool_service.set_log_filter(self.cb_level.currentIndex(), self.txt_filter.text())
+
+    def _on_log_stream_stats(self, stats):
+        text = f"{stats['lines_per_s']:.0f} lines/s, {stats['bytes_per_s'] / 1024:.1f} KB/s"
+        if stats["device_args"]:
+            text += f"  |  device filter: {stats['device_args']}"
+            if stats["saved_bytes_per_s"] is not None:
+                text += f"  (saving ~{stats['saved_bytes_per_s'] / 1024:.1f} KB/s)"
+        streams = stats.get("streams", [])
+        if len(streams) > 1:
+            parts = []
+            for stream in streams:
+                rate = "ended" if stream["eof"] else f"{stream['lines_per_s']:.0f}/s"
+                parts.append(f"{stream['label']}: {rate}" + (f", {stream['queued']} queued" if stream["queued"] else ""))
+            text += "  |  " + "  ".join(parts)
+        self.lbl_log_rate.setText(text)
+
+    def _on_log_appended(self, start_seq, count, visible):
+        # Records are already in the store (batched ~every 50 ms); only row numbers are added here
+        self.log_viewer.append(start_seq, count, visible)
         
     def _clear_logs(self):
+        self.tool_service.clear_log_store()
         self.log_viewer.clear()
         serial = self.device_manager.get_first_device()
         if serial:
             self.tool_service.clear_logcat(serial)
 
     # --- Fault Automation ---
-    def _on_fault_detected(self, f_type, details):
+    def _on_fault_captured(self, fault):
+        wanted = self.chk_anr if fault.kind == "ANR" else self.chk_crash
+        if not wanted.isChecked():
+            return
         if self.chk_log_anr.isChecked():
-            print(f"!!! FAULT DETECTED: {f_type} !!!\n{details}")
-        
-        # 1. Save Logs
-        log_path = os.path.join(os.getcwd(), f"crash_log_{int(time.time())}.txt")
-        self.tool_service.save_logs(self.log_viewer.toPlainText(), log_path)
-        
-        # 2. Take Screenshot
-        # We need a unique name
-        serial = self.device_manager.get_first_device()
-        if serial:
-            ss_path = os.path.join(os.getcwd(), f"crash_ss_{int(time.time())}.png")
-            self.tool_service.take_screenshot(serial, ss_path)
-            
-        # Optional: Notify user
-        self.log_viewer.appendPlainText(f"\n!!! AUTO-CAPTURED FAULT: {f_type} !!!\nSaved to {log_path}\n")
+            print(f"!!! FAULT DETECTED: {fault.kind} in {fault.process or '?'} !!!\n{fault.summary}")
+        
+        # 1. File it under its signature (the log is only saved for the first few repeats)
+        save = True
+        if fault.kind == "SELINUX": # Each new denial is its own signature: capture one per interval, count the rest
+            now = time.monotonic()
+            save = now >= self._selinux_capture_at.get(fault.serial, 0.0)
+            if save:
+                self._selinux_capture_at[fault.serial] = now + SELINUX_CAPTURE_INTERVAL_S
+        worker = Worker(self.tool_service.record_fault, fault, save=save)
+        self._fault_workers.add(worker)
+        worker.signals.result.connect(lambda entry: self._on_fault_recorded(fault, entry))
+        worker.signals.finished.connect(lambda: self._fault_workers.discard(worker))
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_fault_recorded(self, fault, entry):
+        label = f"{fault.kind} ({fault.process or '?'}) [{entry['signature'][:8]}]"
+        if entry["path"]:
+            # 2. Take Screenshot
+            serial = fault.serial or self.device_manager.get_first_device()
+            if serial:
+                self.tool_service.take_screenshot(serial, os.path.splitext(entry["path"])[0] + ".png")
+            self.tool_service.add_marker(f"!!! AUTO-CAPTURED FAULT: {label} x{entry['count']} !!! Saved to {entry['path']}")
+        else:
+            self.tool_service.add_marker(f"!!! FAULT REPEATED: {label} x{entry['count']} !!!")
+        self._refresh_fault_list()
+
+    def _refresh_fault_list(self):
+        self.fault_list.clear()
+        for row in self.tool_service.crash_index.top(100):
+            seen = time.strftime("%m-%d %H:%M:%S", time.localtime(row["last_seen"]))
+            self.fault_list.addItem(f"x{row['count']:<5} {row['kind']:<14} {row['package'] or '?'}: {row['exception']}"
+                                    f"  ({row['devices']} devices, {row['builds']} builds, last {seen})")
+            self.fault_list.item(self.fault_list.count() - 1).setToolTip(row["summary"])